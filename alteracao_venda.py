@@ -0,0 +1,18 @@
+from src.models.user import db
+
+class AlteracaoVenda(db.Model):
+    """Registro de cada item incluído, alterado ou removido de uma venda
+
+    O id serve de revisão: a revisão de uma venda é o maior id das suas alterações,
+    e o cliente pede só o que mudou depois da revisão que já tem. As linhas são
+    apagadas quando a venda é finalizada ou excluída.
+    """
+    __tablename__ = 'alteracao_venda'
+    __table_args__ = (db.Index('ix_alteracao_venda_venda_id_id', 'venda_id', 'id'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    venda_id = db.Column(db.Integer, db.ForeignKey('venda.id'), nullable=False)
+    item_id = db.Column(db.Integer, nullable=False)
+    
+    def __repr__(self):
+        return f'<AlteracaoVenda #{self.venda_id} item {self.item_id} rev {self.id}>'
@@ -1,10 +1,21 @@
 from flask import Blueprint, request, jsonify, session, render_template_string
 from src.models.user import db
 from src.models.usuario import Usuario
-from flask_login import login_user, logout_user, login_required, current_user
+from src.routes.senhas import autenticar
+from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 
 auth_bp = Blueprint('auth', __name__)
 
+login_manager = LoginManager()
+
+@login_manager.user_loader
+def carregar_usuario(usuario_id):
+    return db.session.get(Usuario, int(usuario_id))
+
+@auth_bp.record_once
+def _configurar(state):
+    login_manager.init_app(state.app)
+
 # Template da página de login
 LOGIN_TEMPLATE = '''
 <!DOCTYPE html>
@@ -129,7 +140,7 @@ LOGIN_TEMPLATE = '''
         <div class="success">{{ success }}</div>
         {% endif %}
         
-        <form method="POST" action="/login">
+        <form method="POST" action="{{ url_for('auth.login') }}">
             <div class="form-group">
                 <label for="username">Usuário:</label>
                 <input type="text" id="username" name="username" required>
@@ -166,13 +177,17 @@ def login():
     if not username or not password:
         return render_template_string(LOGIN_TEMPLATE, error='Usuário e senha são obrigatórios')
     
-    usuario = Usuario.query.filter_by(username=username).first()
+    resultado = autenticar(Usuario, username, password)
     
-    if usuario and usuario.check_password(password) and usuario.ativo:
-        login_user(usuario)
+    if resultado.usuario and resultado.usuario.ativo:
+        login_user(resultado.usuario)
         return '''<script>window.location.href = "/";</script>'''
+    elif resultado.espera:
+        return render_template_string(LOGIN_TEMPLATE, error=resultado.erro), resultado.status, {
+            'Retry-After': str(max(int(resultado.espera), 1))
+        }
     else:
-        return render_template_string(LOGIN_TEMPLATE, error='Usuário ou senha incorretos')
+        return render_template_string(LOGIN_TEMPLATE, error=resultado.erro or 'Usuário ou senha incorretos')
 
 @auth_bp.route('/logout', methods=['POST'])
 @login_required
@@ -0,0 +1,275 @@
+"""Benchmark da API de vendas
+
+Cria um banco SQLite com o volume pedido, exercita as rotas reais de venda_bp,
+nota_bp e ticket_bp pelo test client do Flask e por HTTP com várias threads, e
+grava p50/p95/p99 e requisições por segundo de cada endpoint num JSON.
+
+Exemplo:
+    python benchmark.py --vendas 20000 --itens 8 --threads 4 --iteracoes 200 --saida resultado.json
+"""
+import os
+import sys
+# Mesmo ajuste de caminho do main.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import argparse
+import http.client
+import json
+import logging
+import platform
+import random
+import tempfile
+import threading
+import time
+from urllib.parse import quote
+from datetime import datetime, timedelta
+
+PRODUTOS = [
+    ('Ração Golden 15kg', 189.90), ('Ração Pedigree 10kg', 129.50), ('Alpiste 1kg', 12.00),
+    ('Anzol 12', 0.50), ('Linha de pesca 0,40', 18.90), ('Chumbada 20g', 1.20),
+    ('Aquário 40L', 249.00), ('Filtro de aquário', 89.90), ('Gaiola média', 159.00),
+    ('Ração para peixes 100g', 14.50)
+]
+FORMAS_PAGAMENTO = ['Dinheiro', 'Pix', 'Cartao de Credito', 'Cartao de Debito']
+
+def preparar_app(banco):
+    """Criar o app apontando para o banco do benchmark, com as tabelas e índices"""
+    from src.main import create_app, iniciar_banco
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{banco}'})
+    with app.app_context():
+        iniciar_banco()
+    return app
+
+def semear(app, vendas, itens_por_venda, notas, semente):
+    """Gravar vendas finalizadas, itens e notas em lote (executemany); devolve os ids das vendas e o total de itens
+
+    Os ids são atribuídos pelo banco, que precisa estar vazio: o benchmark grava
+    vendas falsas e não pode ser misturado a um banco de verdade.
+    """
+    from src.models.user import db
+    from src.models.venda import Venda, ItemVenda
+    from src.models.nota import Nota
+
+    aleatorio = random.Random(semente)
+    agora = datetime.now()
+
+    with app.app_context():
+        db.create_all()
+        if db.session.query(Venda.id).first() is not None:
+            raise SystemExit('O banco já tem vendas: use um arquivo novo em --banco (ou omita para um temporário)')
+
+        linhas_venda = []
+        itens_por_linha = []
+        for _ in range(vendas):
+            total = 0
+            itens = []
+            for _ in range(aleatorio.randint(1, itens_por_venda * 2 - 1)):
+                nome, preco = aleatorio.choice(PRODUTOS)
+                quantidade = float(aleatorio.randint(1, 5))
+                subtotal = round(quantidade * preco, 2)
+                total += round(subtotal * 100)
+                itens.append({
+                    'nome_produto': nome, 'quantidade': quantidade,
+                    'tipo_quantidade': 'unidade', 'preco_unitario': preco, 'subtotal': subtotal
+                })
+            itens_por_linha.append(itens)
+            linhas_venda.append({
+                'data_venda': agora - timedelta(minutes=aleatorio.randint(0, 365 * 24 * 60)),
+                'total': total / 100,
+                'finalizada': True,
+                'nome_cliente': aleatorio.choice([None, 'Cliente balcão', 'João', 'Maria']),
+                'forma_pagamento': aleatorio.choice(FORMAS_PAGAMENTO)
+            })
+        ids = db.session.execute(
+            db.insert(Venda).returning(Venda.id, sort_by_parameter_order=True), linhas_venda
+        ).scalars().all()
+        linhas_item = [item | {'venda_id': venda_id} for venda_id, itens in zip(ids, itens_por_linha) for item in itens]
+        db.session.execute(db.insert(ItemVenda), linhas_item)
+        db.session.execute(db.insert(Nota), [{
+            'titulo': f'Nota {numero} - {aleatorio.choice(PRODUTOS)[0]}',
+            'conteudo': ' '.join(aleatorio.choice(PRODUTOS)[0] for _ in range(20))
+        } for numero in range(notas)])
+        db.session.commit()
+        return ids, len(linhas_item)
+
+class Medicoes:
+    """Tempos por endpoint, registrados por várias threads"""
+
+    def __init__(self):
+        self._tempos = {}
+        self._erros = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, endpoint, segundos, ok):
+        with self._lock:
+            self._tempos.setdefault(endpoint, []).append(segundos)
+            if not ok:
+                self._erros[endpoint] = self._erros.get(endpoint, 0) + 1
+
+    def resumo(self, duracao):
+        resultado = {}
+        for endpoint, tempos in sorted(self._tempos.items()):
+            tempos = sorted(tempos)
+            resultado[endpoint] = {
+                'requisicoes': len(tempos),
+                'erros': self._erros.get(endpoint, 0),
+                'p50_ms': percentil(tempos, 50) * 1000,
+                'p95_ms': percentil(tempos, 95) * 1000,
+                'p99_ms': percentil(tempos, 99) * 1000,
+                'media_ms': sum(tempos) / len(tempos) * 1000,
+                'req_por_segundo': len(tempos) / duracao if duracao else 0.0
+            }
+        return resultado
+
+def percentil(valores, p):
+    """Percentil por interpolação linear de uma lista já ordenada"""
+    if not valores:
+        return 0.0
+    posicao = (len(valores) - 1) * p / 100
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(valores) - 1)
+    return valores[inferior] + (valores[superior] - valores[inferior]) * (posicao - inferior)
+
+class ClienteFlask:
+    """Chamadas pelo test client, sem rede"""
+
+    def __init__(self, app):
+        self.cliente = app.test_client()
+
+    def requisicao(self, metodo, caminho, corpo=None, cabecalhos=None):
+        resposta = self.cliente.open(caminho, method=metodo, json=corpo, headers=cabecalhos or {})
+        return resposta.status_code, resposta.get_data()
+
+class ClienteHttp:
+    """Chamadas HTTP reais com conexão persistente (uma por thread)"""
+
+    def __init__(self, porta):
+        self.conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=60)
+
+    def requisicao(self, metodo, caminho, corpo=None, cabecalhos=None):
+        cabecalhos = dict(cabecalhos or {})
+        dados = None
+        if corpo is not None:
+            dados = json.dumps(corpo)
+            cabecalhos['Content-Type'] = 'application/json'
+        self.conexao.request(metodo, caminho, body=dados, headers=cabecalhos)
+        resposta = self.conexao.getresponse()
+        return resposta.status, resposta.read()
+
+def medir(cliente, medicoes, endpoint, metodo, caminho, corpo=None, cabecalhos=None, esperado=(200, 201)):
+    inicio = time.perf_counter()
+    status, dados = cliente.requisicao(metodo, caminho, corpo, cabecalhos)
+    medicoes.registrar(endpoint, time.perf_counter() - inicio, status in esperado)
+    return status, dados
+
+def cenario_checkout(cliente, medicoes, aleatorio, terminal, itens):
+    """Criar venda, adicionar itens e finalizar"""
+    cabecalhos = {'X-Terminal': terminal}
+    status, dados = medir(cliente, medicoes, 'POST /api/vendas', 'POST', '/api/vendas', cabecalhos=cabecalhos)
+    if status != 201:
+        return None
+    venda_id = json.loads(dados)['id']
+    for _ in range(itens):
+        nome, preco = aleatorio.choice(PRODUTOS)
+        medir(cliente, medicoes, 'POST /api/vendas/<id>/itens', 'POST', f'/api/vendas/{venda_id}/itens',
+              {'nome_produto': nome, 'preco_unitario': preco, 'quantidade': aleatorio.randint(1, 5)})
+    medir(cliente, medicoes, 'PUT /api/vendas/<id>/finalizar', 'PUT', f'/api/vendas/{venda_id}/finalizar',
+          {'forma_pagamento': aleatorio.choice(FORMAS_PAGAMENTO)})
+    return venda_id
+
+def cenario_historico(cliente, medicoes):
+    """Primeira página do histórico, completa e resumida"""
+    medir(cliente, medicoes, 'GET /api/vendas', 'GET', '/api/vendas?limite=50')
+    medir(cliente, medicoes, 'GET /api/vendas?campos=resumo', 'GET', '/api/vendas?limite=50&campos=resumo')
+
+def cenario_ticket(cliente, medicoes, aleatorio, vendas_ids):
+    medir(cliente, medicoes, 'GET /api/vendas/<id>/ticket', 'GET', f'/api/vendas/{aleatorio.choice(vendas_ids)}/ticket')
+
+def cenario_notas(cliente, medicoes, aleatorio):
+    termo = aleatorio.choice(PRODUTOS)[0].split()[0].lower()
+    medir(cliente, medicoes, 'GET /api/notas?q=', 'GET', f'/api/notas?q={quote(termo)}')
+
+def executar(criar_cliente, threads, iteracoes, itens, vendas_ids, semente, rotulo):
+    """Rodar os cenários em várias threads e devolver o resumo das medições"""
+    medicoes = Medicoes()
+
+    def trabalhador(numero):
+        cliente = criar_cliente()
+        aleatorio = random.Random(semente + numero)
+        for _ in range(iteracoes):
+            cenario_checkout(cliente, medicoes, aleatorio, f'bench-{rotulo}-{numero}', itens)
+            cenario_historico(cliente, medicoes)
+            cenario_ticket(cliente, medicoes, aleatorio, vendas_ids)
+            cenario_notas(cliente, medicoes, aleatorio)
+
+    inicio = time.perf_counter()
+    trabalhadores = [threading.Thread(target=trabalhador, args=(numero,)) for numero in range(threads)]
+    for trabalhador_thread in trabalhadores:
+        trabalhador_thread.start()
+    for trabalhador_thread in trabalhadores:
+        trabalhador_thread.join()
+    duracao = time.perf_counter() - inicio
+
+    return {'duracao_s': duracao, 'threads': threads, 'endpoints': medicoes.resumo(duracao)}
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da API de vendas')
+    parser.add_argument('--vendas', type=int, default=5000, help='vendas finalizadas semeadas')
+    parser.add_argument('--itens', type=int, default=5, help='média de itens por venda')
+    parser.add_argument('--notas', type=int, default=1000, help='notas semeadas')
+    parser.add_argument('--threads', type=int, default=4, help='threads do driver HTTP')
+    parser.add_argument('--iteracoes', type=int, default=50, help='rodadas de cenários por thread')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--banco', help='arquivo SQLite (padrão: temporário)')
+    parser.add_argument('--sem-http', action='store_true', help='usar só o test client')
+    parser.add_argument('--saida', default='bench_output.json', help='arquivo JSON de resultado')
+    args = parser.parse_args()
+
+    banco = args.banco or os.path.join(tempfile.mkdtemp(prefix='bench_vendas_'), 'bench.db')
+    app = preparar_app(banco)
+
+    inicio = time.perf_counter()
+    vendas_ids, total_itens = semear(app, args.vendas, args.itens, args.notas, args.semente)
+    print(f'Banco semeado com {args.vendas} vendas e {total_itens} itens em {time.perf_counter() - inicio:.1f}s', file=sys.stderr)
+
+    resultado = {
+        'data': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'parametros': vars(args) | {'banco': banco},
+        'drivers': {}
+    }
+
+    print('Rodando com o test client...', file=sys.stderr)
+    resultado['drivers']['test_client'] = executar(
+        lambda: ClienteFlask(app), 1, args.iteracoes, args.itens, vendas_ids, args.semente, 'tc'
+    )
+
+    if not args.sem_http:
+        from werkzeug.serving import make_server
+
+        # Sem uma linha de log por requisição no meio da saída do benchmark
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        servidor = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        print(f'Rodando por HTTP com {args.threads} threads...', file=sys.stderr)
+        try:
+            resultado['drivers']['http'] = executar(
+                lambda: ClienteHttp(servidor.server_port), args.threads, args.iteracoes,
+                args.itens, vendas_ids, args.semente, 'http'
+            )
+        finally:
+            servidor.shutdown()
+
+    with open(args.saida, 'w') as arquivo:
+        json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+
+    for driver, dados in resultado['drivers'].items():
+        print(f'\n[{driver}] {dados["duracao_s"]:.1f}s')
+        for endpoint, numeros in dados['endpoints'].items():
+            print(f'  {endpoint:<34} p50 {numeros["p50_ms"]:7.2f}ms  p95 {numeros["p95_ms"]:7.2f}ms  '
+                  f'p99 {numeros["p99_ms"]:7.2f}ms  {numeros["req_por_segundo"]:8.1f} req/s  erros {numeros["erros"]}')
+    print(f'\nResultado gravado em {args.saida}')
+
+if __name__ == '__main__':
+    main()
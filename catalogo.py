@@ -0,0 +1,186 @@
+import click
+from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+from src.models.produto import Produto
+from src.models.venda import ItemVenda
+from src.models.user import db
+from src.models.versao import incrementar_versao
+from datetime import datetime
+import unicodedata
+import threading
+import math
+import bisect
+import time
+
+catalogo_bp = Blueprint('catalogo', __name__)
+
+LIMITE_SUGESTOES_PADRAO = 10
+LIMITE_SUGESTOES_MAXIMO = 50
+
+# De quanto em quanto tempo buscar no banco produtos gravados por outros workers
+RECARGA_SEGUNDOS_PADRAO = 30
+
+def normalizar(texto):
+    """Chave de busca: minúsculas e sem acentos"""
+    decomposto = unicodedata.normalize('NFKD', texto.strip().lower())
+    return ''.join(c for c in decomposto if not unicodedata.combining(c))
+
+class IndicePrefixos:
+    """Nomes de produto em lista ordenada, consultada por prefixo com bisect"""
+
+    def __init__(self):
+        self._chaves = []  # (chave normalizada, nome), sempre ordenada
+        self._produtos = {}
+        self._lock = threading.Lock()
+        self.carregado = False
+        self.versao = 0
+        self.verificado_em = 0
+
+    def atualizar(self, nome, preco_unitario, tipo_quantidade):
+        with self._lock:
+            if nome not in self._produtos:
+                bisect.insort(self._chaves, (normalizar(nome), nome))
+            self._produtos[nome] = {
+                'nome': nome,
+                'ultimo_preco': preco_unitario,
+                'tipo_quantidade': tipo_quantidade
+            }
+
+    def sugerir(self, prefixo, limite):
+        chave = normalizar(prefixo)
+        sugestoes = []
+        with self._lock:
+            posicao = bisect.bisect_left(self._chaves, (chave, ''))
+            while posicao < len(self._chaves) and len(sugestoes) < limite:
+                chave_produto, nome = self._chaves[posicao]
+                if not chave_produto.startswith(chave):
+                    break
+                sugestoes.append(self._produtos[nome])
+                posicao += 1
+        return sugestoes
+
+_indice = IndicePrefixos()
+_carga_lock = threading.Lock()
+
+def obter_indice():
+    """Índice do processo: carregado no primeiro uso e completado periodicamente com o que mudou no banco"""
+    intervalo = current_app.config.get('CATALOGO_RECARGA_SEGUNDOS', RECARGA_SEGUNDOS_PADRAO)
+    if _indice.carregado and time.monotonic() - _indice.verificado_em < intervalo:
+        return _indice
+
+    with _carga_lock:
+        if _indice.carregado and time.monotonic() - _indice.verificado_em < intervalo:
+            return _indice
+
+        # A versão só é atribuída com a trava de escrita do SQLite: um commit que ainda
+        # não apareceu terá versão maior que a última lida, ao contrário de atualizado_em
+        query = db.session.query(Produto.nome, Produto.preco_unitario, Produto.tipo_quantidade, Produto.versao)
+        query = query.filter(Produto.versao > _indice.versao)
+
+        for nome, preco_unitario, tipo_quantidade, versao in query.order_by(Produto.versao):
+            _indice.atualizar(nome, preco_unitario, tipo_quantidade)
+            _indice.versao = versao
+
+        _indice.carregado = True
+        _indice.verificado_em = time.monotonic()
+    return _indice
+
+def registrar_produtos(linhas):
+    """Gravar no catálogo (na transação atual) o último preço usado de cada produto
+
+    Cada linha é um dicionário com nome_produto, preco_unitario e tipo_quantidade.
+    """
+    if not linhas:
+        return
+    agora = datetime.utcnow()
+    versao = incrementar_versao('catalogo')
+    stmt = insert(Produto)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Produto.nome],
+        set_={
+            'preco_unitario': stmt.excluded.preco_unitario,
+            'tipo_quantidade': stmt.excluded.tipo_quantidade,
+            'atualizado_em': stmt.excluded.atualizado_em,
+            'versao': stmt.excluded.versao
+        }
+    )
+    db.session.execute(stmt, [{
+        'nome': linha['nome_produto'],
+        'preco_unitario': float(linha['preco_unitario']),
+        'tipo_quantidade': linha.get('tipo_quantidade') or 'unidade',
+        'atualizado_em': agora,
+        'versao': versao
+    } for linha in linhas])
+
+def atualizar_indice(linhas):
+    """Refletir no índice deste processo os produtos já gravados por registrar_produtos"""
+    for linha in linhas:
+        _indice.atualizar(linha['nome_produto'], float(linha['preco_unitario']), linha.get('tipo_quantidade') or 'unidade')
+
+@catalogo_bp.route('/produtos/sugestoes', methods=['GET'])
+def sugerir_produtos():
+    """Sugestões de produtos pelo início do nome, com o último preço usado"""
+    prefixo = request.args.get('prefix', request.args.get('prefixo', ''))
+    if not prefixo.strip():
+        return jsonify([]), 200
+
+    try:
+        limite = min(max(int(request.args.get('limite', LIMITE_SUGESTOES_PADRAO)), 1), LIMITE_SUGESTOES_MAXIMO)
+    except ValueError:
+        return jsonify({'erro': 'Limite inválido'}), 400
+
+    try:
+        return jsonify(obter_indice().sugerir(prefixo, limite)), 200
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+@catalogo_bp.route('/produtos', methods=['POST'])
+def cadastrar_produto():
+    """Cadastrar ou atualizar um produto do catálogo"""
+    dados = request.get_json(silent=True)
+    if not isinstance(dados, dict):
+        return jsonify({'erro': 'Nome e preço unitário são obrigatórios'}), 400
+
+    nome = dados.get('nome')
+    if not isinstance(nome, str) or not nome.strip() or dados.get('preco_unitario') is None:
+        return jsonify({'erro': 'Nome e preço unitário são obrigatórios'}), 400
+    try:
+        preco_unitario = float(dados['preco_unitario'])
+    except (TypeError, ValueError):
+        return jsonify({'erro': 'Preço inválido'}), 400
+    if not math.isfinite(preco_unitario) or preco_unitario < 0:
+        return jsonify({'erro': 'Preço inválido'}), 400
+
+    linha = {
+        'nome_produto': nome.strip(),
+        'preco_unitario': preco_unitario,
+        'tipo_quantidade': dados.get('tipo_quantidade') or 'unidade'
+    }
+
+    try:
+        registrar_produtos([linha])
+        db.session.commit()
+        atualizar_indice([linha])
+
+        produto = Produto.query.filter_by(nome=linha['nome_produto']).first()
+        return jsonify(produto.to_dict()), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'erro': str(e)}), 500
+
+@catalogo_bp.cli.command('importar')
+def importar_historico():
+    """Preencher o catálogo com o último preço de cada produto já vendido"""
+    ultimos = db.session.query(func.max(ItemVenda.id)).group_by(ItemVenda.nome_produto)
+    itens = db.session.query(
+        ItemVenda.nome_produto, ItemVenda.preco_unitario, ItemVenda.tipo_quantidade
+    ).filter(ItemVenda.id.in_(ultimos)).all()
+
+    registrar_produtos([{
+        'nome_produto': nome_produto,
+        'preco_unitario': preco_unitario,
+        'tipo_quantidade': tipo_quantidade
+    } for nome_produto, preco_unitario, tipo_quantidade in itens])
+    db.session.commit()
+    click.echo(f'{len(itens)} produto(s) importado(s) do histórico de vendas')
@@ -0,0 +1,182 @@
+import click
+from flask import Blueprint, request, make_response, current_app
+import threading
+import mimetypes
+import hashlib
+import gzip
+import os
+import re
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional: sem ele só há a variante gzip
+    brotli = None
+
+estaticos_bp = Blueprint('estaticos', __name__)
+
+TIPOS_COMPRIMIVEIS = ('text/', 'application/javascript', 'application/json', 'image/svg+xml', 'image/x-icon', 'image/vnd.microsoft.icon')
+TAMANHO_MINIMO_COMPRESSAO = 1024
+EXTENSOES_VARIANTES = {'.br': 'br', '.gz': 'gzip'}
+
+# Um ano: arquivos pedidos com ?v=<hash> nunca mudam
+MAX_AGE_VERSIONADO = 365 * 24 * 3600
+
+# href/src locais de .css e .js dentro do HTML, para acrescentar ?v=<hash>
+REFERENCIA_LOCAL = re.compile(r'(href|src)="([^":?#]+\.(?:css|js))"')
+
+class Arquivo:
+    """Um arquivo estático em memória, com as variantes comprimidas"""
+
+    def __init__(self, caminho, conteudo, modificado_em):
+        self.caminho = caminho
+        self.conteudo = conteudo
+        self.modificado_em = modificado_em
+        self.tipo = mimetypes.guess_type(caminho)[0] or 'application/octet-stream'
+        self.variantes = {}
+        self.versao = None
+        self.etag = None
+
+    def definir_conteudo(self, conteudo):
+        self.conteudo = conteudo
+        self.versao = hashlib.sha256(conteudo).hexdigest()[:12]
+        self.etag = f'{self.versao}-{len(conteudo)}'
+
+    @property
+    def comprimivel(self):
+        return len(self.conteudo) >= TAMANHO_MINIMO_COMPRESSAO and self.tipo.startswith(TIPOS_COMPRIMIVEIS)
+
+    @property
+    def content_type(self):
+        if self.tipo.startswith('text/') or self.tipo == 'application/javascript':
+            return f'{self.tipo}; charset=utf-8'
+        return self.tipo
+
+def comprimir(conteudo):
+    """Variantes comprimidas de um conteúdo, na maior compressão (feito uma vez só)"""
+    variantes = {'gzip': gzip.compress(conteudo, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variantes['br'] = brotli.compress(conteudo, quality=11)
+    return variantes
+
+class TabelaEstaticos:
+    """Arquivos da pasta static carregados uma vez, sem stat a cada requisição
+
+    Variantes .gz/.br que já existirem no disco (flask estaticos gerar) são
+    aproveitadas; as que faltarem são comprimidas em memória na carga.
+    """
+
+    def __init__(self, pasta, recarregar=False):
+        self.pasta = pasta
+        self.recarregar = recarregar
+        self._arquivos = None
+        self._lock = threading.Lock()
+
+    def _ler_pasta(self):
+        arquivos = {}
+        variantes_disco = {}
+        for raiz, _, nomes in os.walk(self.pasta):
+            for nome in nomes:
+                completo = os.path.join(raiz, nome)
+                caminho = os.path.relpath(completo, self.pasta).replace(os.sep, '/')
+                base, extensao = os.path.splitext(caminho)
+                with open(completo, 'rb') as arquivo:
+                    conteudo = arquivo.read()
+                modificado_em = os.path.getmtime(completo)
+                if extensao in EXTENSOES_VARIANTES:
+                    variantes_disco[(base, EXTENSOES_VARIANTES[extensao])] = (conteudo, modificado_em)
+                else:
+                    arquivos[caminho] = Arquivo(caminho, conteudo, modificado_em)
+        return arquivos, variantes_disco
+
+    def carregar(self):
+        arquivos, variantes_disco = self._ler_pasta()
+
+        for arquivo in arquivos.values():
+            arquivo.definir_conteudo(arquivo.conteudo)
+
+        # O HTML aponta para o CSS/JS pelo hash do conteúdo, que pode então ser guardado por um ano
+        def versionar(encontrado):
+            atributo, alvo = encontrado.groups()
+            referenciado = arquivos.get(alvo.lstrip('/'))
+            if referenciado is None:
+                return encontrado.group(0)
+            return f'{atributo}="{alvo}?v={referenciado.versao}"'
+
+        for arquivo in arquivos.values():
+            if arquivo.tipo == 'text/html':
+                html = REFERENCIA_LOCAL.sub(versionar, arquivo.conteudo.decode('utf-8'))
+                arquivo.definir_conteudo(html.encode('utf-8'))
+
+        for caminho, arquivo in arquivos.items():
+            if not arquivo.comprimivel:
+                continue
+            if arquivo.tipo != 'text/html':
+                # O HTML foi reescrito acima, então variantes gravadas no disco não servem para ele
+                for codificacao in EXTENSOES_VARIANTES.values():
+                    pronta = variantes_disco.get((caminho, codificacao))
+                    if pronta and pronta[1] >= arquivo.modificado_em:
+                        arquivo.variantes[codificacao] = pronta[0]
+            if 'gzip' not in arquivo.variantes or (brotli is not None and 'br' not in arquivo.variantes):
+                arquivo.variantes = comprimir(arquivo.conteudo) | arquivo.variantes
+
+        self._arquivos = arquivos
+        return arquivos
+
+    def _desatualizada(self):
+        for caminho, arquivo in self._arquivos.items():
+            completo = os.path.join(self.pasta, caminho)
+            if os.path.exists(completo) and os.path.getmtime(completo) != arquivo.modificado_em:
+                return True
+        return False
+
+    def obter(self, caminho):
+        """Arquivo da tabela ou None; a carga acontece no primeiro uso"""
+        arquivos = self._arquivos
+        if arquivos is None or (self.recarregar and self._desatualizada()):
+            with self._lock:
+                # Outra thread pode ter recarregado enquanto esta esperava
+                arquivos = self.carregar() if self._arquivos is arquivos else self._arquivos
+        return arquivos.get(caminho)
+
+    def responder(self, arquivo):
+        """Resposta com ETag, Cache-Control e a variante aceita pelo navegador"""
+        codificacao = None
+        for candidata in ('br', 'gzip'):
+            if candidata in arquivo.variantes and request.accept_encodings[candidata]:
+                codificacao = candidata
+                break
+
+        etag = f'{arquivo.etag}-{codificacao}' if codificacao else arquivo.etag
+        if request.if_none_match.contains(etag):
+            response = make_response('', 304)
+        else:
+            response = make_response(arquivo.variantes[codificacao] if codificacao else arquivo.conteudo)
+            response.headers['Content-Type'] = arquivo.content_type
+            if codificacao:
+                response.headers['Content-Encoding'] = codificacao
+
+        response.set_etag(etag)
+        if arquivo.variantes:
+            response.vary.add('Accept-Encoding')
+        if request.args.get('v') == arquivo.versao:
+            response.headers['Cache-Control'] = f'private, max-age={MAX_AGE_VERSIONADO}, immutable'
+        else:
+            # Sem versão na URL: guardar, mas revalidar pelo ETag (resposta 304 sem corpo)
+            response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
+@estaticos_bp.cli.command('gerar')
+def gerar_variantes():
+    """Gravar na pasta static as variantes .gz/.br dos arquivos comprimíveis"""
+    pasta = current_app.config['ESTATICOS_PASTA']
+    tabela = TabelaEstaticos(pasta)
+    for caminho, arquivo in tabela.carregar().items():
+        if arquivo.tipo == 'text/html':
+            # O HTML versionado é montado na carga; no disco fica o original
+            continue
+        completo = os.path.join(pasta, caminho)
+        for codificacao, conteudo in arquivo.variantes.items():
+            extensao = '.br' if codificacao == 'br' else '.gz'
+            with open(completo + extensao, 'wb') as destino:
+                destino.write(conteudo)
+            click.echo(f'{caminho}{extensao}: {len(arquivo.conteudo)} -> {len(conteudo)} bytes')
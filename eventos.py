@@ -0,0 +1,138 @@
+from flask import Blueprint, request, jsonify, Response, current_app
+from collections import deque
+import threading
+import json
+import time
+import os
+
+eventos_bp = Blueprint('eventos', __name__)
+
+# Eventos guardados para quem reconecta com Last-Event-ID
+BUFFER_PADRAO = 500
+# Comentário enviado quando não há eventos, para proxies não derrubarem a conexão
+KEEPALIVE_SEGUNDOS = 15
+# Depois disso o servidor encerra a conexão e o EventSource reconecta sozinho
+DURACAO_PADRAO = 300
+CONEXOES_PADRAO = 20
+# Intervalo de reconexão sugerido ao navegador, em milissegundos
+RECONEXAO_MS = 3000
+
+class BarramentoEventos:
+    """Barramento de eventos do processo, com os últimos eventos guardados para replay
+
+    Os ids levam a época do processo: um Last-Event-ID de outro processo (ou de antes
+    de um reinício) não é confundido com um id deste.
+    """
+
+    def __init__(self, tamanho_buffer):
+        self.epoca = f'{os.getpid():x}{int(time.time()):x}'
+        self._eventos = deque(maxlen=tamanho_buffer)
+        self._ultimo = 0
+        self._condicao = threading.Condition()
+
+    def publicar(self, tipo, dados):
+        with self._condicao:
+            self._ultimo += 1
+            self._eventos.append((self._ultimo, tipo, json.dumps(dados, ensure_ascii=False)))
+            self._condicao.notify_all()
+
+    def _numero(self, ultimo_id):
+        """Número do evento a partir do Last-Event-ID; None quando ele não é deste processo"""
+        if not ultimo_id:
+            return self._ultimo
+        epoca, _, numero = ultimo_id.partition('-')
+        if epoca != self.epoca or not numero.isdigit() or int(numero) > self._ultimo:
+            return None
+        return int(numero)
+
+    def posicao(self, ultimo_id):
+        """Ponto de partida de uma conexão: (número, precisa_recarregar)
+
+        Sem Last-Event-ID a conexão recebe só os eventos novos. Se o id for
+        desconhecido ou já tiver saído do buffer, o cliente precisa recarregar tudo
+        e a conexão segue a partir do último evento, sem replay do que restou.
+        """
+        with self._condicao:
+            numero = self._numero(ultimo_id)
+            mais_antigo = self._eventos[0][0] if self._eventos else self._ultimo + 1
+            if numero is None or numero + 1 < mais_antigo:
+                return self._ultimo, True
+            return numero, False
+
+    def aguardar(self, numero, tempo_maximo):
+        """Eventos depois de numero, esperando até tempo_maximo se ainda não houver nenhum"""
+        with self._condicao:
+            if self._ultimo <= numero:
+                self._condicao.wait(tempo_maximo)
+            return [evento for evento in self._eventos if evento[0] > numero]
+
+    def formatar(self, numero, tipo, dados):
+        return f'id: {self.epoca}-{numero}\nevent: {tipo}\ndata: {dados}\n\n'
+
+_barramento = None
+_barramento_lock = threading.Lock()
+_conexoes = threading.BoundedSemaphore(CONEXOES_PADRAO)
+
+def obter_barramento():
+    global _barramento
+    if _barramento is None:
+        with _barramento_lock:
+            if _barramento is None:
+                _barramento = BarramentoEventos(current_app.config.get('EVENTOS_BUFFER', BUFFER_PADRAO))
+    return _barramento
+
+def publicar(tipo, dados):
+    """Publicar um evento para as telas conectadas (chamar depois do commit)"""
+    if not current_app.config.get('EVENTOS_ATIVOS', True):
+        return
+    obter_barramento().publicar(tipo, dados)
+
+@eventos_bp.record_once
+def _configurar(state):
+    global _conexoes
+    _conexoes = threading.BoundedSemaphore(state.app.config.get('EVENTOS_CONEXOES', CONEXOES_PADRAO))
+
+def _transmitir(barramento, numero, recarregar, tipos, duracao):
+    yield f'retry: {RECONEXAO_MS}\n\n'
+    if recarregar:
+        # Eventos perdidos: o cliente deve buscar o estado completo de novo
+        yield barramento.formatar(numero, 'recarregar', '{}')
+
+    fim = time.monotonic() + duracao
+    while time.monotonic() < fim:
+        eventos = barramento.aguardar(numero, min(KEEPALIVE_SEGUNDOS, fim - time.monotonic()))
+        if not eventos:
+            yield ': keepalive\n\n'
+            continue
+        for evento_numero, tipo, dados in eventos:
+            numero = evento_numero
+            if tipos is None or tipo in tipos:
+                yield barramento.formatar(evento_numero, tipo, dados)
+
+@eventos_bp.route('/eventos', methods=['GET'])
+def transmitir_eventos():
+    """Stream SSE de vendas e notas (filtro opcional ?tipos=venda_finalizada,nota_criada)"""
+    if not current_app.config.get('EVENTOS_ATIVOS', True):
+        # 404 faz o EventSource desistir em vez de reconectar
+        return jsonify({'erro': 'Eventos desligados'}), 404
+
+    if not _conexoes.acquire(blocking=False):
+        return jsonify({'erro': 'Muitas telas conectadas, tente novamente'}), 503, {'Retry-After': '10'}
+
+    try:
+        barramento = obter_barramento()
+        # EventSource manda Last-Event-ID ao reconectar; ultimo_id permite retomar na primeira conexão
+        ultimo_id = request.headers.get('Last-Event-ID') or request.args.get('ultimo_id')
+        numero, recarregar = barramento.posicao(ultimo_id)
+        tipos = set(request.args['tipos'].split(',')) if request.args.get('tipos') else None
+        duracao = current_app.config.get('EVENTOS_DURACAO_SEGUNDOS', DURACAO_PADRAO)
+    except Exception as e:
+        _conexoes.release()
+        return jsonify({'erro': str(e)}), 500
+
+    response = Response(_transmitir(barramento, numero, recarregar, tipos, duracao), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    # Liberar a vaga quando a conexão terminar, mesmo que o stream nem tenha começado
+    response.call_on_close(_conexoes.release)
+    return response
@@ -0,0 +1,42 @@
+# Configuração do gunicorn para produção: gunicorn -c gunicorn.conf.py
+# (rodar na pasta acima de src/, depois de flask --app src.main iniciar-banco).
+# Tudo pode ser ajustado por variáveis de ambiente.
+import os
+
+wsgi_app = 'src.main:create_app()'
+bind = os.environ.get('BIND', f"0.0.0.0:{os.environ.get('PORT', 5000)}")
+
+# gthread: cada worker atende várias requisições em threads, então um PDF
+# lento ou uma conexão de eventos (SSE) não trava os outros caixas
+worker_class = 'gthread'
+
+# O barramento de eventos (SSE) fica na memória do processo: com mais de um
+# worker, uma venda gravada num worker não chegaria às telas conectadas no outro.
+# Com os eventos ligados (EVENTOS_ATIVOS=1, o padrão) roda um worker só e as
+# threads atendem os caixas; os PDFs já são montados em processos à parte.
+# WEB_WORKERS só vale com EVENTOS_ATIVOS=0 (telas sem atualização ao vivo).
+# As métricas de /metrics (METRICAS_ATIVAS) também são do processo: com vários
+# workers cada coleta vê um só, então usar WEB_WORKERS=1 quando elas estiverem ligadas.
+eventos_ativos = os.environ.get('EVENTOS_ATIVOS', '1') == '1'
+workers = 1 if eventos_ativos else int(os.environ.get('WEB_WORKERS', 2))
+threads = int(os.environ.get('WEB_THREADS', 32))
+
+# As conexões SSE ocupam uma thread cada: deixar pelo menos metade para o resto
+os.environ.setdefault('EVENTOS_CONEXOES', str(threads // 2))
+
+# No gthread o timeout vale para o worker travado, não para a requisição,
+# então conexões SSE longas não são derrubadas por ele
+timeout = int(os.environ.get('WEB_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('WEB_KEEPALIVE', 5))
+
+# Reciclar workers depois de N requisições (0 desliga)
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+
+# Sem preload: cada worker abre as próprias conexões do SQLite depois do fork
+preload_app = False
+
+accesslog = os.environ.get('WEB_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('WEB_LOG_LEVEL', 'info')
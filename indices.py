@@ -0,0 +1,24 @@
+from src.models.user import db
+from src.models.venda import Venda, ItemVenda
+from src.models.nota import Nota
+from src.models.resumo_venda import ResumoVenda
+
+# Índices de acesso usados pelos blueprints. Por estarem ligados às tabelas,
+# o db.create_all() já os cria em bancos novos; criar_indices() cobre os existentes.
+INDICES = [
+    # Histórico (finalizada=True ORDER BY data_venda, id)
+    db.Index('ix_venda_finalizada_data_venda', Venda.finalizada, Venda.data_venda),
+    # Itens de uma venda (carga dos itens, selectinload e busca de item)
+    db.Index('ix_item_venda_venda_id', ItemVenda.venda_id),
+    # Última venda de cada produto (importação do catálogo)
+    db.Index('ix_item_venda_nome_produto', ItemVenda.nome_produto),
+    # Listagem de notas por data de modificação
+    db.Index('ix_nota_data_modificacao', Nota.data_modificacao),
+    # Relatório por produto/forma de pagamento (agrupamento = ? ORDER BY total_centavos DESC)
+    db.Index('ix_resumo_venda_agrupamento_total', ResumoVenda.agrupamento, ResumoVenda.total_centavos),
+]
+
+def criar_indices():
+    """Criar os índices que ainda não existem no banco"""
+    for indice in INDICES:
+        indice.create(db.engine, checkfirst=True)
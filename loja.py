@@ -1,15 +1,67 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, make_response, current_app
 from src.models.user import db
 from src.models.loja import Loja
+from src.models.versao import ler_versao, incrementar_versao
+import threading
+import time
 
 loja_bp = Blueprint('loja', __name__)
 
+# De quanto em quanto tempo conferir a versão gravada por outros workers
+VERIFICACAO_SEGUNDOS_PADRAO = 5
+
+class CacheLoja:
+    """Dados da loja guardados no processo e conferidos pela versão em versao_dados"""
+
+    def __init__(self):
+        self.dados = None
+        self.versao = None
+        self.verificado_em = 0
+        self._lock = threading.Lock()
+
+    def obter(self):
+        """(dados, versao) da loja; dados é None quando a loja não foi configurada"""
+        intervalo = current_app.config.get('LOJA_VERIFICACAO_SEGUNDOS', VERIFICACAO_SEGUNDOS_PADRAO)
+        if self.versao is not None and time.monotonic() - self.verificado_em < intervalo:
+            return self.dados, self.versao
+
+        with self._lock:
+            if self.versao is None or time.monotonic() - self.verificado_em >= intervalo:
+                versao = ler_versao('loja')
+                if versao != self.versao:
+                    loja = Loja.query.first()
+                    self.dados = loja.to_dict() if loja else None
+                    self.versao = versao
+                self.verificado_em = time.monotonic()
+            return self.dados, self.versao
+
+    def invalidar(self):
+        with self._lock:
+            self.versao = None
+
+_cache = CacheLoja()
+
+def obter_loja():
+    """Dados e versão da loja sem consultar o banco a cada chamada (usado pelos tickets)"""
+    return _cache.obter()
+
+def etag_loja(versao):
+    return f'loja-v{versao}'
+
 @loja_bp.route('/loja', methods=['GET'])
 def get_loja_info():
-    loja = Loja.query.first()
-    if loja:
-        return jsonify(loja.to_dict()), 200
-    return jsonify({'mensagem': 'Dados da loja não configurados'}), 404
+    dados, versao = obter_loja()
+    etag = etag_loja(versao)
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    elif dados:
+        response = make_response(jsonify(dados), 200)
+    else:
+        return jsonify({'mensagem': 'Dados da loja não configurados'}), 404
+    # O navegador guarda a resposta e revalida pelo ETag
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
 @loja_bp.route('/loja', methods=['POST'])
 def configure_loja_info():
@@ -32,8 +84,8 @@ def configure_loja_info():
     else:
         loja = Loja(nome=nome, endereco=endereco, telefone=telefone)
         db.session.add(loja)
-    
+
+    incrementar_versao('loja')
     db.session.commit()
+    _cache.invalidar()
     return jsonify(loja.to_dict()), 200
-
-
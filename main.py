@@ -3,45 +3,157 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory, render_template_string, request, redirect, url_for, session, jsonify
+import click
+import tempfile
+from flask import Flask, render_template_string, request, redirect, session, current_app
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from src.models.user import db, User
-from src.models.venda import Venda, ItemVenda
+from src.models.indices import criar_indices
 from src.routes.user import user_bp
 from src.routes.venda import venda_bp
+from src.routes.nota import nota_bp, criar_indice_busca
+from src.routes.ticket import ticket_bp
+from src.routes.ticket_simple import ticket_impressora_bp
+from src.routes.loja import loja_bp
+from src.routes.auth import auth_bp
+from src.routes.catalogo import catalogo_bp
+from src.routes.relatorio import relatorio_bp
+from src.routes.metricas import metricas_bp
+from src.routes.estaticos import estaticos_bp, TabelaEstaticos
+from src.routes.senhas import autenticar, gerar_hash
+from src.routes.eventos import eventos_bp
+from src.routes.planos import planos_rotas, verificar_planos
 
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
+# Perfil do SQLite para vários caixas/workers gravando no mesmo arquivo
+SQLITE_PRAGMAS = {
+    'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -20000)),  # negativo = KiB
+}
+# DEFERRED (padrão) ou IMMEDIATE: IMMEDIATE reserva a escrita no início da transação
+# e evita o "database is locked" quando duas transações tentam promover leitura para escrita
+SQLITE_TRANSACAO = os.environ.get('SQLITE_TRANSACAO', 'DEFERRED').upper()
 
-app.register_blueprint(user_bp, url_prefix='/api')
-app.register_blueprint(venda_bp, url_prefix='/api')
 
-# Database configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
+def _aplicar_pragmas(conexao_dbapi, registro):
+    """Aplicar o perfil a cada nova conexão do pool"""
+    if SQLITE_TRANSACAO == 'IMMEDIATE':
+        # Controlar o BEGIN manualmente (ver _iniciar_transacao)
+        conexao_dbapi.isolation_level = None
+    cursor = conexao_dbapi.cursor()
+    for nome, valor in SQLITE_PRAGMAS.items():
+        cursor.execute(f'PRAGMA {nome}={valor}')
+    cursor.close()
 
-with app.app_context():
+def _iniciar_transacao(conexao):
+    conexao.exec_driver_sql('BEGIN IMMEDIATE')
+
+def _verificar_pragmas(conexao_dbapi, logger):
+    """Registrar no log os valores efetivos e avisar quando o SQLite não aceitou algum
+
+    Roda na primeira conexão de cada worker, logo depois de _aplicar_pragmas.
+    """
+    cursor = conexao_dbapi.cursor()
+    efetivos = {}
+    for nome in SQLITE_PRAGMAS:
+        # Banco em memória não devolve linha para alguns (ex.: mmap_size)
+        linha = cursor.execute(f'PRAGMA {nome}').fetchone()
+        efetivos[nome] = linha[0] if linha else None
+    cursor.close()
+    logger.info('SQLite: %s, transações %s', ', '.join(f'{nome}={valor}' for nome, valor in efetivos.items()), SQLITE_TRANSACAO)
+    if str(efetivos['journal_mode']).lower() != str(SQLITE_PRAGMAS['journal_mode']).lower():
+        logger.warning('SQLite: journal_mode %s pedido, mas o banco está em %s', SQLITE_PRAGMAS['journal_mode'], efetivos['journal_mode'])
+    return efetivos
+
+def _opcoes_engine(url):
+    """Pool e timeouts para SQLite em arquivo
+
+    Banco em memória (sqlite://) usa o StaticPool do Flask-SQLAlchemy, que não
+    aceita pool_size/max_overflow; outros bancos ficam com o padrão do SQLAlchemy.
+    """
+    url = make_url(url)
+    if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:') or url.query.get('mode') == 'memory':
+        return {}
+    return {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 3600)),
+        'connect_args': {'timeout': SQLITE_PRAGMAS['busy_timeout'] / 1000, 'check_same_thread': False},
+    }
+
+def iniciar_banco():
+    """Criar tabelas, índices, a busca das notas e o usuário padrão (uma vez por instalação, não a cada worker)"""
     db.create_all()
+    criar_indices()
+    criar_indice_busca()
     
     # Criar usuário padrão se não existir
     if not User.query.filter_by(username='agronorte').first():
-        user = User(username='agronorte')
-        user.set_password('agronorte123')
+        user = User(username='agronorte', password_hash=gerar_hash('agronorte123'))
         db.session.add(user)
         db.session.commit()
 
-@app.route('/login', methods=['GET', 'POST'])
+@click.command('iniciar-banco')
+def iniciar_banco_command():
+    """Criar as tabelas, os índices, a busca das notas e o usuário padrão"""
+    iniciar_banco()
+    click.echo('Banco iniciado')
+
+@click.command('criar-indices')
+def criar_indices_command():
+    """Criar os índices de acesso que faltam no banco"""
+    criar_indices()
+    click.echo('Índices criados')
+
+@click.command('verificar-planos')
+@click.option('--detalhes', is_flag=True, help='Mostrar o plano de todas as consultas')
+def verificar_planos_command(detalhes):
+    """Passar pelas rotas num banco temporário, rodar EXPLAIN QUERY PLAN nas consultas emitidas e falhar em varreduras completas"""
+    with tempfile.TemporaryDirectory() as pasta:
+        # O roteiro grava vendas e notas: nunca rodar no banco configurado
+        app = create_app({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(pasta, 'planos.db')}",
+            'TICKET_LOTE_DIR': pasta,
+        })
+        with app.app_context():
+            iniciar_banco()
+
+        planos = planos_rotas(app)
+        with app.app_context():
+            db.engine.dispose()
+
+    if detalhes:
+        for instrucao, (rotas, passos) in planos.items():
+            click.echo(f"{', '.join(' '.join(rota) for rota in sorted(rotas))}\n  {' '.join(instrucao.split())}\n  {' | '.join(passos)}")
+
+    problemas = verificar_planos(planos)
+
+    for rotas, instrucao, passo in problemas:
+        click.echo(f"{', '.join(' '.join(rota) for rota in rotas)}: {passo}\n  {' '.join(instrucao.split())}", err=True)
+    if problemas:
+        raise SystemExit(1)
+    click.echo('Todas as consultas usam índices')
+
 def login():
     if request.method == 'POST':
         username = request.form.get('username')
         password = request.form.get('password')
         
-        user = User.query.filter_by(username=username).first()
-        if user and user.check_password(password):
-            session['user_id'] = user.id
-            session['username'] = user.username
+        resultado = autenticar(User, username or '', password or '')
+        if resultado.usuario:
+            session['user_id'] = resultado.usuario.id
+            session['username'] = resultado.usuario.username
             return redirect('/')
         else:
+            # 429/503 só quando o login foi barrado antes de conferir a senha
+            status, headers = 200, {}
+            if resultado.espera:
+                status, headers = resultado.status, {'Retry-After': str(max(int(resultado.espera), 1))}
             return render_template_string('''
 <!DOCTYPE html>
 <html lang="pt-BR">
@@ -70,7 +182,7 @@ def login():
             <h1>🛒 Sistema de Vendas</h1>
             <p>Agronorte - Acesso Restrito</p>
         </div>
-        <div class="error">Usuário ou senha incorretos!</div>
+        <div class="error">{{ erro }}!</div>
         <form method="POST">
             <div class="form-group">
                 <label for="username">Usuário:</label>
@@ -85,7 +197,7 @@ def login():
     </div>
 </body>
 </html>
-            ''')
+            ''', erro=resultado.erro), status, headers
     
     return render_template_string('''
 <!DOCTYPE html>
@@ -130,7 +242,6 @@ def login():
 </html>
     ''')
 
-@app.route('/logout')
 def logout():
     session.clear()
     return redirect('/login')
@@ -144,23 +255,113 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
+# Arquivos da SPA em memória, com ETag e variantes gzip/brotli (ver src/routes/estaticos.py)
 @login_required
 def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
+    estaticos = current_app.extensions.get('estaticos')
+    if estaticos is None:
         return "Static folder not configured", 404
 
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
+    arquivo = estaticos.obter(path) if path != "" else None
+    if arquivo is None:
+        arquivo = estaticos.obter('index.html')
+        if arquivo is None:
             return "index.html not found", 404
+    return estaticos.responder(arquivo)
 
-if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+def create_app(config=None):
+    """Montar o app: configuração do ambiente, blueprints e banco
+
+    Nada aqui acessa o banco nem importa ReportLab/Pillow, então cada worker
+    sobe rápido. Tabelas e usuário padrão são criados por flask iniciar-banco.
+    config sobrescreve os valores lidos do ambiente.
+    """
+    # Sem a rota /static do Flask: todo estático passa pela TabelaEstaticos (serve)
+    app = Flask(__name__, static_folder=None)
+    app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
 
+    # Métricas por requisição (/metrics); desligadas, os ganchos nem são registrados
+    app.config['METRICAS_ATIVAS'] = os.environ.get('METRICAS_ATIVAS', '0') == '1'
+    app.config['METRICAS_SERVER_TIMING'] = os.environ.get('METRICAS_SERVER_TIMING', '0') == '1'
+
+    # Login: parâmetros do hash (ex.: 'scrypt:16384:8:1' ou 'pbkdf2:sha256:600000'),
+    # quantas verificações rodam ao mesmo tempo e tentativas por minuto por IP/usuário
+    app.config['SENHA_METODO'] = os.environ.get('SENHA_METODO', 'scrypt')
+    app.config['SENHA_VERIFICACOES'] = int(os.environ.get('SENHA_VERIFICACOES', 2))
+    app.config['SENHA_FILA'] = int(os.environ.get('SENHA_FILA', 8))
+    app.config['LOGIN_LIMITE_IP'] = (int(os.environ.get('LOGIN_TENTATIVAS_IP', 20)), 60)
+    app.config['LOGIN_LIMITE_USUARIO'] = (int(os.environ.get('LOGIN_TENTATIVAS_USUARIO', 5)), 60)
+
+    # Eventos (SSE): cada tela conectada ocupa uma thread enquanto a conexão dura.
+    # O barramento é do processo, então só funciona com um worker (ver gunicorn.conf.py)
+    app.config['EVENTOS_ATIVOS'] = os.environ.get('EVENTOS_ATIVOS', '1') == '1'
+    app.config['EVENTOS_CONEXOES'] = int(os.environ.get('EVENTOS_CONEXOES', 20))
+    app.config['EVENTOS_DURACAO_SEGUNDOS'] = int(os.environ.get('EVENTOS_DURACAO_SEGUNDOS', 300))
+
+    # Tickets em PDF montados ao mesmo tempo por worker e quantos podem esperar
+    app.config['TICKET_RENDERIZACOES'] = int(os.environ.get('TICKET_RENDERIZACOES', 2))
+    app.config['TICKET_FILA'] = int(os.environ.get('TICKET_FILA', 8))
+
+    # Vendas feitas offline aceitas por pedido de /api/vendas/sincronizar
+    app.config['SINCRONIZACAO_MAXIMO'] = int(os.environ.get('SINCRONIZACAO_MAXIMO', 200))
+
+    app.config['ESTATICOS_PASTA'] = os.path.join(os.path.dirname(__file__), 'static')
+    app.config['ESTATICOS_RECARREGAR'] = os.environ.get('ESTATICOS_RECARREGAR', '0') == '1'
+
+    # Database configuration
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
+        'DATABASE_URL', f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+    )
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    if config:
+        app.config.update(config)
+    # Depende da URL final; SQLALCHEMY_ENGINE_OPTIONS em config substitui tudo
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', _opcoes_engine(app.config['SQLALCHEMY_DATABASE_URI']))
+
+    app.register_blueprint(user_bp, url_prefix='/api')
+    app.register_blueprint(venda_bp, url_prefix='/api')
+    app.register_blueprint(nota_bp, url_prefix='/api')
+    app.register_blueprint(ticket_bp, url_prefix='/api')
+    app.register_blueprint(ticket_impressora_bp, url_prefix='/api')
+    app.register_blueprint(loja_bp, url_prefix='/api')
+    app.register_blueprint(catalogo_bp, url_prefix='/api')
+    app.register_blueprint(relatorio_bp, url_prefix='/api')
+    app.register_blueprint(eventos_bp, url_prefix='/api')
+    # Login com flask_login (tabela usuarios); /login continua sendo o do app
+    app.register_blueprint(auth_bp, url_prefix='/auth')
+    app.register_blueprint(metricas_bp)
+    app.register_blueprint(estaticos_bp)
+
+    db.init_app(app)
+    with app.app_context():
+        # Só registra os ganchos do engine; nenhuma conexão é aberta aqui
+        if db.engine.dialect.name == 'sqlite':
+            event.listen(db.engine, 'connect', _aplicar_pragmas)
+            event.listen(db.engine, 'connect', lambda conexao_dbapi, registro: _verificar_pragmas(conexao_dbapi, app.logger), once=True)
+            if SQLITE_TRANSACAO == 'IMMEDIATE':
+                event.listen(db.engine, 'begin', _iniciar_transacao)
+
+    for comando in (iniciar_banco_command, criar_indices_command, verificar_planos_command):
+        app.cli.add_command(comando)
+
+    app.add_url_rule('/login', view_func=login, methods=['GET', 'POST'])
+    app.add_url_rule('/logout', view_func=logout)
+    app.add_url_rule('/', view_func=serve, defaults={'path': ''})
+    app.add_url_rule('/<path:path>', view_func=serve)
+
+    if app.config['ESTATICOS_PASTA']:
+        app.extensions['estaticos'] = TabelaEstaticos(app.config['ESTATICOS_PASTA'], recarregar=app.config['ESTATICOS_RECARREGAR'])
+
+    return app
+
+if __name__ == '__main__':
+    # Servidor de desenvolvimento; em produção use o gunicorn (gunicorn.conf.py)
+    app = create_app({'ESTATICOS_RECARREGAR': True})
+    with app.app_context():
+        iniciar_banco()
+    app.run(
+        host=os.environ.get('HOST', '0.0.0.0'),
+        port=int(os.environ.get('PORT', 5000)),
+        debug=os.environ.get('FLASK_DEBUG', '0') == '1'
+    )
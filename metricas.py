@@ -0,0 +1,154 @@
+from flask import Blueprint, request, jsonify, g, current_app, has_app_context, has_request_context, make_response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from contextlib import contextmanager
+import threading
+import time
+
+# Os histogramas ficam na memória do processo: /metrics mostra só o worker que
+# atendeu a coleta. Com os eventos ligados o gunicorn roda um worker só e isso é
+# tudo; com EVENTOS_ATIVOS=0 e vários workers cada coleta cai num worker diferente,
+# então ligar as métricas só com WEB_WORKERS=1.
+metricas_bp = Blueprint('metricas', __name__)
+
+# Limites dos histogramas, em segundos
+LIMITES_TEMPO = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LIMITES_CONSULTAS = (1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+class Histograma:
+    """Histograma cumulativo no formato do Prometheus, separado por rótulos"""
+
+    def __init__(self, nome, descricao, limites, rotulos):
+        self.nome = nome
+        self.descricao = descricao
+        self.limites = limites
+        self.rotulos = rotulos
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valor, *rotulos):
+        with self._lock:
+            serie = self._series.get(rotulos)
+            if serie is None:
+                serie = self._series[rotulos] = [[0] * len(self.limites), 0.0, 0]
+            contagens = serie[0]
+            for posicao, limite in enumerate(self.limites):
+                if valor <= limite:
+                    contagens[posicao] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def exportar(self):
+        linhas = [f'# HELP {self.nome} {self.descricao}', f'# TYPE {self.nome} histogram']
+        with self._lock:
+            series = [(rotulos, list(contagens), soma, total) for rotulos, (contagens, soma, total) in self._series.items()]
+        for rotulos, contagens, soma, total in sorted(series):
+            base = ','.join(f'{nome}="{_escapar(valor)}"' for nome, valor in zip(self.rotulos, rotulos))
+            separador = ',' if base else ''
+            for limite, contagem in zip(self.limites, contagens):
+                linhas.append(f'{self.nome}_bucket{{{base}{separador}le="{limite}"}} {contagem}')
+            linhas.append(f'{self.nome}_bucket{{{base}{separador}le="+Inf"}} {total}')
+            linhas.append(f'{self.nome}_sum{{{base}}} {soma}')
+            linhas.append(f'{self.nome}_count{{{base}}} {total}')
+        return linhas
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+DURACAO_REQUISICAO = Histograma(
+    'http_request_duration_seconds', 'Tempo de resposta por rota', LIMITES_TEMPO, ('method', 'endpoint', 'status')
+)
+CONSULTAS_REQUISICAO = Histograma(
+    'db_statements_per_request', 'Comandos SQL por requisição', LIMITES_CONSULTAS, ('endpoint',)
+)
+TEMPO_BANCO_REQUISICAO = Histograma(
+    'db_time_seconds_per_request', 'Tempo total no banco por requisição', LIMITES_TEMPO, ('endpoint',)
+)
+TEMPO_PDF = Histograma(
+    'pdf_render_seconds', 'Tempo de geração de PDF', LIMITES_TEMPO, ('tipo',)
+)
+
+HISTOGRAMAS = (DURACAO_REQUISICAO, CONSULTAS_REQUISICAO, TEMPO_BANCO_REQUISICAO, TEMPO_PDF)
+
+@contextmanager
+def medir_pdf(tipo='ticket'):
+    """Medir a geração de um PDF; sem custo quando as métricas estão desligadas"""
+    if not _ativas():
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        duracao = time.perf_counter() - inicio
+        TEMPO_PDF.observar(duracao, tipo)
+        if has_request_context():
+            g.metricas_pdf = getattr(g, 'metricas_pdf', 0.0) + duracao
+
+def _ativas():
+    """Métricas ligadas no app atual (os ganchos do Engine valem para todos os apps)"""
+    return has_app_context() and 'metricas' in current_app.extensions
+
+def _antes_do_sql(conexao, cursor, instrucao, parametros, contexto, executemany):
+    if has_request_context() and _ativas():
+        conexao.info['metricas_inicio'] = time.perf_counter()
+
+def _depois_do_sql(conexao, cursor, instrucao, parametros, contexto, executemany):
+    inicio = conexao.info.pop('metricas_inicio', None)
+    if inicio is not None and has_request_context():
+        duracao = time.perf_counter() - inicio
+        g.metricas_sql = getattr(g, 'metricas_sql', 0) + 1
+        g.metricas_sql_tempo = getattr(g, 'metricas_sql_tempo', 0.0) + duracao
+
+def _inicio_requisicao():
+    g.metricas_inicio = time.perf_counter()
+
+def _fim_requisicao(response):
+    inicio = g.pop('metricas_inicio', None)
+    if inicio is None:
+        return response
+
+    duracao = time.perf_counter() - inicio
+    endpoint = request.endpoint or 'desconhecido'
+    consultas = g.pop('metricas_sql', 0)
+    tempo_banco = g.pop('metricas_sql_tempo', 0.0)
+    tempo_pdf = g.pop('metricas_pdf', None)
+
+    DURACAO_REQUISICAO.observar(duracao, request.method, endpoint, str(response.status_code))
+    CONSULTAS_REQUISICAO.observar(consultas, endpoint)
+    TEMPO_BANCO_REQUISICAO.observar(tempo_banco, endpoint)
+
+    if current_app.extensions['metricas']['server_timing']:
+        partes = [f'db;dur={tempo_banco * 1000:.2f};desc="{consultas} SQL"']
+        if tempo_pdf is not None:
+            partes.append(f'pdf;dur={tempo_pdf * 1000:.2f}')
+        partes.append(f'total;dur={duracao * 1000:.2f}')
+        response.headers['Server-Timing'] = ', '.join(partes)
+    return response
+
+@metricas_bp.record_once
+def _configurar(state):
+    """Ligar os ganchos só quando METRICAS_ATIVAS estiver ligado"""
+    app = state.app
+    if not app.config.get('METRICAS_ATIVAS'):
+        return
+    app.extensions['metricas'] = {'server_timing': bool(app.config.get('METRICAS_SERVER_TIMING'))}
+    app.before_request(_inicio_requisicao)
+    app.after_request(_fim_requisicao)
+    # Os ganchos são do Engine, não do app: registrar uma vez só por processo
+    if not event.contains(Engine, 'before_cursor_execute', _antes_do_sql):
+        event.listen(Engine, 'before_cursor_execute', _antes_do_sql)
+        event.listen(Engine, 'after_cursor_execute', _depois_do_sql)
+
+@metricas_bp.route('/metrics', methods=['GET'])
+def exportar_metricas():
+    """Métricas deste processo no formato texto do Prometheus"""
+    if not _ativas():
+        return jsonify({'erro': 'Métricas desativadas (METRICAS_ATIVAS)'}), 404
+
+    linhas = []
+    for histograma in HISTOGRAMAS:
+        linhas.extend(histograma.exportar())
+    response = make_response('\n'.join(linhas) + '\n')
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    return response
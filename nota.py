@@ -1,13 +1,110 @@
+import click
 from flask import Blueprint, request, jsonify
+from markupsafe import escape
 from src.models.nota import Nota
 from src.models.user import db
+from src.routes.eventos import publicar
 
 nota_bp = Blueprint('nota', __name__)
 
+LIMITE_BUSCA_PADRAO = 20
+LIMITE_BUSCA_MAXIMO = 100
+
+# Marcadores do snippet: trocados por <mark> depois de escapar o HTML
+_INICIO_DESTAQUE = '\x02'
+_FIM_DESTAQUE = '\x03'
+
+def criar_indice_busca():
+    """Criar a tabela FTS5 das notas e os triggers que a mantêm sincronizada"""
+    tabela = Nota.__tablename__
+    with db.engine.begin() as conexao:
+        existia = conexao.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='nota_fts'"
+        ).first()
+
+        conexao.exec_driver_sql(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS nota_fts USING fts5(
+                titulo, conteudo,
+                content='{tabela}', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )""")
+        conexao.exec_driver_sql(f"""
+            CREATE TRIGGER IF NOT EXISTS nota_fts_insert AFTER INSERT ON {tabela} BEGIN
+                INSERT INTO nota_fts(rowid, titulo, conteudo) VALUES (new.id, new.titulo, new.conteudo);
+            END""")
+        conexao.exec_driver_sql(f"""
+            CREATE TRIGGER IF NOT EXISTS nota_fts_delete AFTER DELETE ON {tabela} BEGIN
+                INSERT INTO nota_fts(nota_fts, rowid, titulo, conteudo) VALUES ('delete', old.id, old.titulo, old.conteudo);
+            END""")
+        conexao.exec_driver_sql(f"""
+            CREATE TRIGGER IF NOT EXISTS nota_fts_update AFTER UPDATE ON {tabela} BEGIN
+                INSERT INTO nota_fts(nota_fts, rowid, titulo, conteudo) VALUES ('delete', old.id, old.titulo, old.conteudo);
+                INSERT INTO nota_fts(rowid, titulo, conteudo) VALUES (new.id, new.titulo, new.conteudo);
+            END""")
+
+        # Notas gravadas antes do índice existir
+        if not existia:
+            conexao.exec_driver_sql("INSERT INTO nota_fts(nota_fts) VALUES ('rebuild')")
+
+def _consulta_fts(texto):
+    """Transformar o texto digitado numa consulta FTS5 segura (cada termo como prefixo)"""
+    termos = [termo.replace('"', '""') for termo in texto.split()]
+    return ' '.join(f'"{termo}"*' for termo in termos)
+
+def _destacar(trecho):
+    """Escapar o trecho e marcar os termos encontrados com <mark>"""
+    return str(escape(trecho)).replace(_INICIO_DESTAQUE, '<mark>').replace(_FIM_DESTAQUE, '</mark>')
+
+def buscar_notas(texto):
+    """Busca paginada no índice FTS5, ordenada por relevância"""
+    try:
+        limite = min(max(int(request.args.get('limite', LIMITE_BUSCA_PADRAO)), 1), LIMITE_BUSCA_MAXIMO)
+        pagina = max(int(request.args.get('pagina', 1)), 1)
+    except ValueError:
+        return jsonify({'erro': 'Parâmetros de paginação inválidos'}), 400
+
+    consulta = _consulta_fts(texto)
+    if not consulta:
+        return jsonify([]), 200
+
+    # Título pesa mais que o conteúdo no bm25
+    resultados = db.session.execute(db.text(f"""
+        SELECT rowid, bm25(nota_fts, 10.0, 1.0) AS relevancia,
+               snippet(nota_fts, 1, '{_INICIO_DESTAQUE}', '{_FIM_DESTAQUE}', '…', 16) AS trecho
+        FROM nota_fts
+        WHERE nota_fts MATCH :consulta
+        ORDER BY relevancia
+        LIMIT :limite OFFSET :deslocamento
+    """), {'consulta': consulta, 'limite': limite, 'deslocamento': (pagina - 1) * limite}).all()
+
+    total = db.session.execute(
+        db.text("SELECT count(*) FROM nota_fts WHERE nota_fts MATCH :consulta"),
+        {'consulta': consulta}
+    ).scalar()
+
+    notas = {nota.id: nota for nota in Nota.query.filter(Nota.id.in_([r.rowid for r in resultados]))}
+
+    resposta = []
+    for resultado in resultados:
+        nota = notas.get(resultado.rowid)
+        if nota is None:
+            continue
+        dados = nota.to_dict()
+        dados['trecho'] = _destacar(resultado.trecho)
+        dados['relevancia'] = -resultado.relevancia
+        resposta.append(dados)
+
+    return jsonify(resposta), 200, {'X-Total-Count': str(total)}
+
 @nota_bp.route('/notas', methods=['GET'])
 def listar_notas():
-    """Listar todas as notas"""
+    """Listar todas as notas ou buscar por texto com ?q= (paginado por limite/pagina)"""
     try:
+        # ?q= vazio ou só com espaços lista tudo, como antes da busca existir
+        texto = request.args.get('q')
+        if texto and texto.strip():
+            return buscar_notas(texto)
+
         notas = Nota.query.order_by(Nota.data_modificacao.desc()).all()
         return jsonify([nota.to_dict() for nota in notas]), 200
     except Exception as e:
@@ -29,6 +126,7 @@ def criar_nota():
         
         db.session.add(nova_nota)
         db.session.commit()
+        publicar('nota_criada', {'id': nova_nota.id, 'titulo': nova_nota.titulo})
         
         return jsonify(nova_nota.to_dict()), 201
     except Exception as e:
@@ -60,6 +158,7 @@ def atualizar_nota(nota_id):
             nota.conteudo = dados['conteudo']
         
         db.session.commit()
+        publicar('nota_alterada', {'id': nota.id, 'titulo': nota.titulo})
         return jsonify(nota.to_dict()), 200
     except Exception as e:
         db.session.rollback()
@@ -72,8 +171,16 @@ def excluir_nota(nota_id):
         nota = Nota.query.get_or_404(nota_id)
         db.session.delete(nota)
         db.session.commit()
+        publicar('nota_excluida', {'id': nota_id})
         return jsonify({'mensagem': 'Nota excluída com sucesso'}), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({'erro': str(e)}), 500
 
+@nota_bp.cli.command('reindexar')
+def reindexar_notas():
+    """Reconstruir o índice de busca das notas"""
+    criar_indice_busca()
+    with db.engine.begin() as conexao:
+        conexao.exec_driver_sql("INSERT INTO nota_fts(nota_fts) VALUES ('rebuild')")
+    click.echo('Índice de busca das notas reconstruído')
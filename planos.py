@@ -0,0 +1,152 @@
+from flask import request, has_request_context
+from sqlalchemy import event
+from src.models.user import db
+from datetime import datetime, timedelta
+import uuid
+
+# Rotas que por definição percorrem a tabela inteira (listas completas,
+# tabelas de uma linha só): nelas a varredura completa não é problema
+VARREDURA_PERMITIDA = {
+    ('GET', '/api/vendas/todas'),
+    ('GET', '/api/notas'),
+    ('GET', '/api/users'),
+    ('GET', '/api/loja'),
+    ('POST', '/api/loja'),
+}
+
+# Instruções que não têm plano de consulta
+_SEM_PLANO = ('PRAGMA', 'BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE', 'CREATE', 'DROP')
+
+def percorrer_rotas(client):
+    """Roteiro que passa pelas rotas que acessam o banco, com dados suficientes para cada consulta"""
+    terminal = {'X-Terminal': 'verificar-planos'}
+    hoje = datetime.now().strftime('%Y-%m-%d')
+    ontem = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+
+    # Loja e catálogo
+    client.post('/api/loja', json={'nome': 'Loja', 'endereco': 'Rua 1', 'telefone': '0000-0000'})
+    client.get('/api/loja')
+    client.post('/api/produtos', json={'nome': 'Arroz', 'preco_unitario': 25})
+    client.get('/api/produtos/sugestoes?prefixo=ar')
+
+    # Venda do terminal: itens, alterações, delta e finalização
+    venda_id = client.get('/api/vendas/atual', headers=terminal).get_json()['id']
+    item_id = client.post(f'/api/vendas/{venda_id}/itens', headers=terminal, json={
+        'nome_produto': 'Arroz', 'quantidade': 2, 'preco_unitario': 25
+    }).get_json()['id']
+    client.post(f'/api/vendas/{venda_id}/itens/lote', headers=terminal, json={'itens': [
+        {'nome_produto': 'Feijão', 'quantidade': 1, 'preco_unitario': 8},
+        {'nome_produto': 'Sal', 'quantidade': 1, 'preco_unitario': 3},
+    ]})
+    client.put(f'/api/vendas/{venda_id}/itens/{item_id}', headers=terminal, json={'quantidade': 3})
+    client.get(f'/api/vendas/{venda_id}?desde_rev=0', headers=terminal)
+    client.get(f'/api/vendas/{venda_id}', headers=terminal)
+    client.delete(f'/api/vendas/{venda_id}/itens/{item_id}', headers=terminal)
+    client.put(f'/api/vendas/{venda_id}/finalizar', headers=terminal, json={'forma_pagamento': 'Pix'})
+    client.put(f'/api/vendas/{venda_id}/finalizar', headers=terminal, json={'forma_pagamento': 'Pix'})
+
+    # Vendas offline: a primeira substitui uma venda aberta no servidor, a segunda chamada repete o uuid
+    abandonada = client.post('/api/vendas', headers=terminal, json={'uuid': str(uuid.uuid4())}).get_json()
+    lote = {'vendas': [{'uuid': abandonada['uuid'], 'venda_aberta_id': abandonada['id'], 'itens': [
+        {'nome_produto': 'Café', 'quantidade': 1, 'preco_unitario': 12}
+    ]}]}
+    client.post('/api/vendas/sincronizar', headers=terminal, json=lote)
+    client.post('/api/vendas/sincronizar', headers=terminal, json=lote)
+
+    # Venda descartada e troca da venda aberta
+    descartada = client.post('/api/vendas', headers=terminal).get_json()['id']
+    client.post(f'/api/vendas/{descartada}/itens', headers=terminal, json={
+        'nome_produto': 'Sal', 'quantidade': 1, 'preco_unitario': 3
+    })
+    client.post('/api/vendas/limpar-atual', headers=terminal)
+    client.delete(f"/api/vendas/{client.get('/api/vendas/atual', headers=terminal).get_json()['id']}", headers=terminal)
+
+    # Histórico, exportação e relatórios
+    cursor = client.get('/api/vendas?limite=1').headers.get('X-Proximo-Cursor')
+    client.get(f'/api/vendas?limite=1&cursor={cursor}')
+    client.get(f'/api/vendas?de={ontem}&ate={hoje}&forma_pagamento=Pix&campos=resumo')
+    client.get('/api/vendas/todas')
+    client.get('/api/vendas/export?formato=csv').get_data()
+    client.get(f'/api/vendas/export?formato=jsonl&de={ontem}&ate={hoje}').get_data()
+    client.get(f'/api/relatorios/vendas?agrupar=dia&de={ontem}&ate={hoje}')
+    client.get('/api/relatorios/vendas?agrupar=mes')
+    client.get('/api/relatorios/vendas?agrupar=produto&limite=10')
+    client.get('/api/relatorios/vendas?agrupar=forma_pagamento')
+
+    # Tickets
+    client.get(f'/api/vendas/{venda_id}/ticket')
+    client.get(f'/api/vendas/{venda_id}/ticket/impressora')
+
+    # Notas e busca
+    nota_id = client.post('/api/notas', json={'titulo': 'Pedido', 'conteudo': 'Ligar para o fornecedor'}).get_json()['id']
+    client.put(f'/api/notas/{nota_id}', json={'conteudo': 'Fornecedor confirmou'})
+    client.get(f'/api/notas/{nota_id}')
+    client.get('/api/notas')
+    client.get('/api/notas?q=forn')
+    client.delete(f'/api/notas/{nota_id}')
+
+    client.get('/api/users')
+
+def capturar_consultas(app, roteiro=percorrer_rotas):
+    """Executar o roteiro no app e devolver as instruções emitidas
+
+    Cada entrada é ((método, rota), sql, parâmetros), gravada pelo
+    before_cursor_execute do engine: são as consultas reais dos blueprints.
+    """
+    capturadas = []
+
+    def registrar(conexao, cursor, instrucao, parametros, contexto, executemany):
+        rota = (request.method, request.url_rule.rule) if has_request_context() and request.url_rule else None
+        if executemany and parametros and isinstance(parametros[0], (tuple, list, dict)):
+            # executemany: o plano é o mesmo para todas as linhas
+            parametros = parametros[0]
+        capturadas.append((rota, instrucao, parametros))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', registrar)
+    try:
+        roteiro(app.test_client())
+    finally:
+        event.remove(engine, 'before_cursor_execute', registrar)
+    return capturadas
+
+def plano_consulta(conexao, instrucao, parametros):
+    """Linhas do EXPLAIN QUERY PLAN de uma instrução SQL já compilada"""
+    linhas = conexao.exec_driver_sql(f'EXPLAIN QUERY PLAN {instrucao}', parametros).all()
+    return [linha[-1] for linha in linhas]
+
+def planos_rotas(app, roteiro=percorrer_rotas):
+    """Plano de cada instrução distinta emitida pelo roteiro, com as rotas que a usaram
+
+    Devolve {sql: (rotas, passos)}.
+    """
+    planos = {}
+    for rota, instrucao, parametros in capturar_consultas(app, roteiro):
+        if rota is None or instrucao.lstrip().upper().startswith(_SEM_PLANO):
+            continue
+        if instrucao not in planos:
+            planos[instrucao] = (set(), parametros)
+        planos[instrucao][0].add(rota)
+
+    with app.app_context(), db.engine.connect() as conexao:
+        return {
+            instrucao: (rotas, plano_consulta(conexao, instrucao, parametros))
+            for instrucao, (rotas, parametros) in planos.items()
+        }
+
+def verificar_planos(planos):
+    """Apontar nos planos de planos_rotas() as instruções que caem em varredura completa ou ordenam fora de índice
+
+    Devolve uma lista de (rotas, sql, passo).
+    """
+    problemas = []
+    for instrucao, (rotas, passos) in planos.items():
+        permitida = rotas <= VARREDURA_PERMITIDA
+        for passo in passos:
+            # SCAN n CONSTANT ROWS é o VALUES de um INSERT de várias linhas
+            varredura = passo.startswith('SCAN') and 'INDEX' not in passo and 'CONSTANT ROW' not in passo
+            ordenacao = 'TEMP B-TREE' in passo
+            if (varredura or ordenacao) and not permitida:
+                problemas.append((sorted(rotas), instrucao, passo))
+    return problemas
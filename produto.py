@@ -0,0 +1,25 @@
+from src.models.user import db
+from datetime import datetime
+
+class Produto(db.Model):
+    __tablename__ = 'produto'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    nome = db.Column(db.String(200), unique=True, nullable=False)
+    preco_unitario = db.Column(db.Float, nullable=False)
+    tipo_quantidade = db.Column(db.String(10), nullable=False, default='unidade')
+    atualizado_em = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # Versão 'catalogo' de versao_dados na gravação: cresce na ordem dos commits
+    versao = db.Column(db.Integer, nullable=False, default=0, index=True)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'nome': self.nome,
+            'ultimo_preco': self.preco_unitario,
+            'tipo_quantidade': self.tipo_quantidade,
+            'atualizado_em': self.atualizado_em.isoformat()
+        }
+    
+    def __repr__(self):
+        return f'<Produto {self.nome}>'
@@ -0,0 +1,135 @@
+import click
+from flask import Blueprint, request, jsonify
+from sqlalchemy.dialects.sqlite import insert
+from src.models.resumo_venda import ResumoVenda
+from src.models.user import db
+from datetime import datetime
+
+relatorio_bp = Blueprint('relatorio', __name__)
+
+AGRUPAMENTOS = ('dia', 'mes', 'forma_pagamento', 'produto')
+
+SEM_FORMA_PAGAMENTO = 'Não informado'
+
+def _somar_no_resumo(linhas):
+    """Somar as linhas (agrupamento, chave, vendas, itens, centavos) na tabela de resumo"""
+    if not linhas:
+        return
+    stmt = insert(ResumoVenda)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ResumoVenda.agrupamento, ResumoVenda.chave],
+        set_={
+            'quantidade_vendas': ResumoVenda.quantidade_vendas + stmt.excluded.quantidade_vendas,
+            'quantidade_itens': ResumoVenda.quantidade_itens + stmt.excluded.quantidade_itens,
+            'total_centavos': ResumoVenda.total_centavos + stmt.excluded.total_centavos
+        }
+    )
+    db.session.execute(stmt, [{
+        'agrupamento': agrupamento,
+        'chave': chave,
+        'quantidade_vendas': vendas,
+        'quantidade_itens': itens,
+        'total_centavos': centavos
+    } for agrupamento, chave, vendas, itens, centavos in linhas])
+
+def registrar_no_resumo(data_venda, forma_pagamento, total_centavos, itens):
+    """Acrescentar uma venda finalizada ao resumo, na mesma transação da finalização
+
+    itens é uma lista de (nome_produto, quantidade, subtotal_centavos).
+    """
+    quantidade_total = sum(quantidade for _, quantidade, _ in itens)
+
+    # Um produto repetido na venda conta como uma venda só
+    produtos = {}
+    for nome_produto, quantidade, centavos in itens:
+        quantidade_anterior, centavos_anteriores = produtos.get(nome_produto, (0, 0))
+        produtos[nome_produto] = (quantidade_anterior + quantidade, centavos_anteriores + centavos)
+
+    linhas = [
+        ('dia', data_venda.strftime('%Y-%m-%d'), 1, quantidade_total, total_centavos),
+        ('mes', data_venda.strftime('%Y-%m'), 1, quantidade_total, total_centavos),
+        ('forma_pagamento', forma_pagamento or SEM_FORMA_PAGAMENTO, 1, quantidade_total, total_centavos),
+    ]
+    linhas.extend(
+        ('produto', nome_produto, 1, quantidade, centavos)
+        for nome_produto, (quantidade, centavos) in produtos.items()
+    )
+    _somar_no_resumo(linhas)
+
+@relatorio_bp.route('/relatorios/vendas', methods=['GET'])
+def relatorio_vendas():
+    """Totais de vendas agrupados por dia, mês, forma de pagamento ou produto"""
+    try:
+        agrupar = request.args.get('agrupar', 'dia')
+        if agrupar not in AGRUPAMENTOS:
+            return jsonify({'erro': f"Agrupamento inválido, use {', '.join(AGRUPAMENTOS)}"}), 400
+
+        query = ResumoVenda.query.filter_by(agrupamento=agrupar)
+
+        if agrupar in ('dia', 'mes'):
+            # As chaves são datas ISO, então o período é um intervalo de texto
+            formato = '%Y-%m-%d' if agrupar == 'dia' else '%Y-%m'
+            try:
+                de = request.args.get('de')
+                ate = request.args.get('ate')
+                if de:
+                    query = query.filter(ResumoVenda.chave >= datetime.strptime(de, '%Y-%m-%d').strftime(formato))
+                if ate:
+                    query = query.filter(ResumoVenda.chave <= datetime.strptime(ate, '%Y-%m-%d').strftime(formato))
+            except ValueError:
+                return jsonify({'erro': 'Data inválida, use AAAA-MM-DD'}), 400
+            query = query.order_by(ResumoVenda.chave.desc())
+        else:
+            query = query.order_by(ResumoVenda.total_centavos.desc())
+
+        limite = request.args.get('limite', type=int)
+        if limite:
+            query = query.limit(limite)
+
+        return jsonify([resumo.to_dict() for resumo in query]), 200
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+def reconstruir_resumo():
+    """Recalcular na transação atual a tabela de resumo a partir das vendas finalizadas
+
+    Devolve quantas linhas cada agrupamento ficou tendo; o commit fica com quem chama.
+    """
+    centavos_venda = 'CAST(ROUND(v.total * 100) AS INTEGER)'
+    centavos_item = 'CAST(ROUND(i.subtotal * 100) AS INTEGER)'
+    itens_por_venda = '(SELECT venda_id, SUM(quantidade) AS quantidade FROM item_venda GROUP BY venda_id)'
+
+    consultas = {
+        'dia': f"""
+            SELECT strftime('%Y-%m-%d', v.data_venda), COUNT(*), COALESCE(SUM(q.quantidade), 0), SUM({centavos_venda})
+            FROM venda v LEFT JOIN {itens_por_venda} q ON q.venda_id = v.id
+            WHERE v.finalizada = 1 GROUP BY 1""",
+        'mes': f"""
+            SELECT strftime('%Y-%m', v.data_venda), COUNT(*), COALESCE(SUM(q.quantidade), 0), SUM({centavos_venda})
+            FROM venda v LEFT JOIN {itens_por_venda} q ON q.venda_id = v.id
+            WHERE v.finalizada = 1 GROUP BY 1""",
+        'forma_pagamento': f"""
+            SELECT COALESCE(NULLIF(v.forma_pagamento, ''), :sem_forma), COUNT(*), COALESCE(SUM(q.quantidade), 0), SUM({centavos_venda})
+            FROM venda v LEFT JOIN {itens_por_venda} q ON q.venda_id = v.id
+            WHERE v.finalizada = 1 GROUP BY 1""",
+        'produto': f"""
+            SELECT i.nome_produto, COUNT(DISTINCT i.venda_id), SUM(i.quantidade), SUM({centavos_item})
+            FROM item_venda i JOIN venda v ON v.id = i.venda_id
+            WHERE v.finalizada = 1 GROUP BY 1""",
+    }
+
+    ResumoVenda.query.delete()
+    quantidades = {}
+    for agrupamento, sql in consultas.items():
+        linhas = db.session.execute(db.text(sql), {'sem_forma': SEM_FORMA_PAGAMENTO}).all()
+        _somar_no_resumo([(agrupamento, *linha) for linha in linhas])
+        quantidades[agrupamento] = len(linhas)
+    return quantidades
+
+@relatorio_bp.cli.command('reconstruir')
+def reconstruir_resumo_command():
+    """Recalcular a tabela de resumo a partir das vendas finalizadas"""
+    for agrupamento, quantidade in reconstruir_resumo().items():
+        click.echo(f'{agrupamento}: {quantidade} linha(s)')
+    db.session.commit()
+    click.echo('Resumo de vendas reconstruído')
@@ -0,0 +1,24 @@
+from src.models.user import db
+
+class ResumoVenda(db.Model):
+    """Totais de vendas finalizadas por dia, mês, forma de pagamento e produto"""
+    __tablename__ = 'resumo_venda'
+    __table_args__ = (db.UniqueConstraint('agrupamento', 'chave'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    agrupamento = db.Column(db.String(20), nullable=False)
+    chave = db.Column(db.String(200), nullable=False)
+    quantidade_vendas = db.Column(db.Integer, nullable=False, default=0)
+    quantidade_itens = db.Column(db.Float, nullable=False, default=0.0)
+    total_centavos = db.Column(db.Integer, nullable=False, default=0)
+    
+    def to_dict(self):
+        return {
+            'chave': self.chave,
+            'quantidade_vendas': self.quantidade_vendas,
+            'quantidade_itens': self.quantidade_itens,
+            'total': self.total_centavos / 100
+        }
+    
+    def __repr__(self):
+        return f'<ResumoVenda {self.agrupamento} {self.chave}>'
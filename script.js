@@ -1,10 +1,39 @@
 // Estado da aplicação
 let currentSale = null;
 let salesHistory = [];
+let salesHistoryCursor = null;
+let productSuggestions = [];
+let suggestionTimer = null;
+let storeInfo = null;
+
+// Dados da loja usados quando /api/loja ainda não foi configurado
+const STORE_INFO_DEFAULT = {
+    nome: 'AGRONORTE',
+    endereco: 'Rua Araras 100 Centro',
+    telefone: '3252-6819'
+};
 
 // URLs da API
 const API_BASE = '/api';
 
+// Vendas feitas sem conexão: guardadas no IndexedDB e enviadas em lotes
+const OFFLINE_DB_NAME = 'caixa-offline';
+const OFFLINE_STORE = 'vendas';
+// Vendas recusadas pelo servidor: saem da fila e ficam guardadas para conferência
+const OFFLINE_REJECTED_STORE = 'recusadas';
+const OFFLINE_BATCH = 50;
+const OFFLINE_SYNC_INTERVAL = 30000;
+let offlineDbPromise = null;
+let offlineSyncing = false;
+let nextLocalItemId = -1;
+
+// Identificador deste caixa: cada terminal tem a sua própria venda aberta
+const TERMINAL_ID = localStorage.getItem('terminal-id') || (() => {
+    const id = crypto.randomUUID ? crypto.randomUUID() : `${Date.now()}-${Math.random().toString(16).slice(2)}`;
+    localStorage.setItem('terminal-id', id);
+    return id;
+})();
+
 // Elementos do DOM
 const productForm = document.getElementById('product-form');
 const productsList = document.getElementById('products-list');
@@ -22,6 +51,8 @@ const modalConfirm = document.getElementById('modal-confirm');
 document.addEventListener('DOMContentLoaded', function() {
     initializeApp();
     setupEventListeners();
+    connectEvents();
+    setupOfflineSync();
 });
 
 // Configurar event listeners
@@ -34,10 +65,17 @@ function setupEventListeners() {
             handleAddProduct(e);
         });
     }
+    const nomeProdutoInput = document.getElementById('nome-produto');
+    if (nomeProdutoInput) {
+        nomeProdutoInput.addEventListener('input', handleProductNameInput);
+    }
     clearSaleBtn.addEventListener('click', handleClearSale);
     finishSaleBtn.addEventListener('click', handleFinishSale);
     modalCancel.addEventListener('click', closeModal);
     
+    // Ao voltar para a janela, trazer só o que mudou na venda enquanto ela estava em segundo plano
+    window.addEventListener('focus', syncCurrentSale);
+    
     // Fechar modal clicando fora
     modal.addEventListener('click', function(e) {
         if (e.target === modal) {
@@ -63,8 +101,10 @@ async function forceCleanStart() {
         const response = await fetch(`${API_BASE}/vendas/limpar-atual`, {
             method: 'POST',
             headers: {
-                'Content-Type': 'application/json'
-            }
+                'Content-Type': 'application/json',
+                'X-Terminal': TERMINAL_ID
+            },
+            body: JSON.stringify({ uuid: newUuid() })
         });
         
         if (!response.ok) {
@@ -85,7 +125,10 @@ async function forceCleanStart() {
 // Carregar venda atual ou criar nova
 async function loadCurrentSale() {
     try {
-        const response = await fetch(`${API_BASE}/vendas/atual`);
+        // O uuid só é usado se o servidor precisar abrir uma venda nova
+        const response = await fetch(`${API_BASE}/vendas/atual?uuid=${newUuid()}`, {
+            headers: { 'X-Terminal': TERMINAL_ID }
+        });
         
         if (!response.ok) {
             throw new Error('Erro ao carregar venda atual');
@@ -112,8 +155,10 @@ async function createNewSale() {
         const response = await fetch(`${API_BASE}/vendas`, {
             method: 'POST',
             headers: {
-                'Content-Type': 'application/json'
-            }
+                'Content-Type': 'application/json',
+                'X-Terminal': TERMINAL_ID
+            },
+            body: JSON.stringify({ uuid: newUuid() })
         });
         
         if (!response.ok) {
@@ -123,6 +168,10 @@ async function createNewSale() {
         currentSale = await response.json();
         updateUI();
     } catch (error) {
+        if (isNetworkError(error)) {
+            startLocalSale();
+            return;
+        }
         console.error('Erro ao criar nova venda:', error);
         showError('Erro ao criar nova venda');
     }
@@ -144,28 +193,18 @@ async function handleAddProduct(e) {
         return;
     }
     
+    const item = {
+        nome_produto: nomeProduto,
+        quantidade: quantidade,
+        tipo_quantidade: tipoQuantidade,
+        preco_unitario: precoUnitario
+    };
+    
     try {
-        const response = await fetch(`${API_BASE}/vendas/${currentSale.id}/itens`, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify({
-                nome_produto: nomeProduto,
-                quantidade: quantidade,
-                tipo_quantidade: tipoQuantidade,
-                preco_unitario: precoUnitario
-            })
-        });
-        
-        if (!response.ok) {
-            const error = await response.json();
-            throw new Error(error.erro || 'Erro ao adicionar produto');
+        if (currentSale.local || !(await addItemOnServer(item))) {
+            addLocalItem(item);
         }
         
-        currentSale = await response.json();
-        updateUI();
-        
         // Limpar formulário
         e.target.reset();
         document.getElementById('quantidade').value = '1';
@@ -178,10 +217,78 @@ async function handleAddProduct(e) {
     }
 }
 
+// Adicionar o item na venda do servidor; false quando não há conexão (a venda passa a ser local)
+async function addItemOnServer(item) {
+    let response;
+    try {
+        response = await fetch(`${API_BASE}/vendas/${currentSale.id}/itens?desde_rev=${currentSale.revisao || 0}`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify(item)
+        });
+    } catch (error) {
+        if (!isNetworkError(error)) {
+            throw error;
+        }
+        enterOfflineMode();
+        return false;
+    }
+    
+    if (!response.ok) {
+        const error = await response.json();
+        throw new Error(error.erro || 'Erro ao adicionar produto');
+    }
+    
+    applySaleDelta(await response.json());
+    return true;
+}
+
+// Sugestões de produtos pelo início do nome
+function handleProductNameInput(e) {
+    const prefixo = e.target.value.trim();
+    
+    // Produto escolhido na lista: preencher o último preço usado
+    const sugestao = productSuggestions.find(produto => produto.nome === e.target.value);
+    if (sugestao) {
+        document.getElementById('preco-unitario').value = sugestao.ultimo_preco;
+        document.getElementById('tipo-quantidade').value = sugestao.tipo_quantidade;
+        return;
+    }
+    
+    clearTimeout(suggestionTimer);
+    if (!prefixo) {
+        return;
+    }
+    suggestionTimer = setTimeout(() => loadProductSuggestions(prefixo), 150);
+}
+
+async function loadProductSuggestions(prefixo) {
+    try {
+        const response = await fetch(`${API_BASE}/produtos/sugestoes?prefix=${encodeURIComponent(prefixo)}`);
+        
+        if (!response.ok) {
+            return;
+        }
+        
+        productSuggestions = await response.json();
+        document.getElementById('sugestoes-produtos').innerHTML = productSuggestions
+            .map(produto => `<option value="${escapeHtml(produto.nome)}">R$ ${formatCurrency(produto.ultimo_preco)}</option>`)
+            .join('');
+    } catch (error) {
+        console.error('Erro ao buscar sugestões:', error);
+    }
+}
+
 // Remover produto
 async function removeProduct(itemId) {
+    if (currentSale.local) {
+        removeLocalItem(itemId);
+        return;
+    }
     try {
-        const response = await fetch(`${API_BASE}/vendas/${currentSale.id}/itens/${itemId}`, {
+        const response = await fetch(`${API_BASE}/vendas/${currentSale.id}/itens/${itemId}?desde_rev=${currentSale.revisao || 0}`, {
             method: 'DELETE'
         });
         
@@ -190,10 +297,14 @@ async function removeProduct(itemId) {
             throw new Error(error.erro || 'Erro ao remover produto');
         }
         
-        currentSale = await response.json();
-        updateUI();
+        applySaleDelta(await response.json());
         showSuccess('Produto removido com sucesso!');
     } catch (error) {
+        if (isNetworkError(error)) {
+            enterOfflineMode();
+            removeLocalItem(itemId);
+            return;
+        }
         console.error('Erro ao remover produto:', error);
         showError(error.message);
     }
@@ -210,6 +321,12 @@ function handleClearSale() {
         'Limpar Venda',
         'Tem certeza que deseja remover todos os produtos da venda atual?',
         async () => {
+            if (currentSale.local) {
+                // A venda abandonada no servidor segue com a próxima venda local
+                startLocalSale([], currentSale.serverId);
+                showSuccess('Venda limpa com sucesso!');
+                return;
+            }
             try {
                 // Excluir venda atual e criar nova
                 await fetch(`${API_BASE}/vendas/${currentSale.id}`, {
@@ -252,27 +369,22 @@ function handleFinishSale() {
                     requestBody.forma_pagamento = formaPagamento;
                 }
                 
-                const response = await fetch(`${API_BASE}/vendas/${currentSale.id}/finalizar`, {
-                    method: 'PUT',
-                    headers: {
-                        'Content-Type': 'application/json'
-                    },
-                    body: JSON.stringify(requestBody)
-                });
+                const saleTotal = currentSale.total;
+                const finalizedSale = currentSale.local ? null : await finishSaleOnServer(requestBody);
                 
-                if (!response.ok) {
-                    const error = await response.json();
-                    throw new Error(error.erro || 'Erro ao finalizar venda');
+                if (finalizedSale) {
+                    showSuccess(`Venda finalizada! Total: R$ ${formatCurrency(finalizedSale.total)}`);
+                    
+                    // Mostrar opção de gerar ticket
+                    showTicketModal(finalizedSale.id);
+                    
+                    // Acrescentar a venda ao histórico (sem buscar a lista de novo) e criar nova venda
+                    addSaleToHistory(finalizedSale);
+                } else {
+                    // Sem conexão: guardar no caixa; o ticket fica disponível depois do envio
+                    await queueLocalSale(requestBody);
+                    showSuccess(`Venda guardada no caixa (sem conexão)! Total: R$ ${formatCurrency(saleTotal)}`);
                 }
-                
-                const finalizedSale = await response.json();
-                showSuccess(`Venda finalizada! Total: R$ ${formatCurrency(finalizedSale.total)}`);
-                
-                // Mostrar opção de gerar ticket
-                showTicketModal(finalizedSale.id);
-                
-                // Atualizar histórico e criar nova venda
-                await loadSalesHistory();
                 await createNewSale();
                 
                 // Limpar campo de nome do cliente
@@ -287,7 +399,35 @@ function handleFinishSale() {
     );
 }
 
-// Carregar histórico de vendas
+// Finalizar a venda no servidor; null quando não há conexão (a venda passa a ser local)
+// O uuid vai junto: se a resposta se perder, a venda guardada no caixa tem o mesmo
+// uuid e a sincronização não a grava de novo
+async function finishSaleOnServer(requestBody) {
+    let response;
+    try {
+        response = await fetch(`${API_BASE}/vendas/${currentSale.id}/finalizar`, {
+            method: 'PUT',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ ...requestBody, uuid: currentSale.uuid })
+        });
+    } catch (error) {
+        if (!isNetworkError(error)) {
+            throw error;
+        }
+        enterOfflineMode();
+        return null;
+    }
+    
+    if (!response.ok) {
+        const error = await response.json();
+        throw new Error(error.erro || 'Erro ao finalizar venda');
+    }
+    return response.json();
+}
+
+// Carregar histórico de vendas (primeira página)
 async function loadSalesHistory() {
     try {
         const response = await fetch(`${API_BASE}/vendas`); // Esta rota já retorna apenas vendas finalizadas
@@ -297,6 +437,29 @@ async function loadSalesHistory() {
         }
         
         salesHistory = await response.json();
+        salesHistoryCursor = response.headers.get('X-Proximo-Cursor');
+        updateSalesHistoryUI();
+    } catch (error) {
+        console.error('Erro ao carregar histórico:', error);
+        showError('Erro ao carregar histórico de vendas');
+    }
+}
+
+// Carregar a próxima página do histórico
+async function loadMoreSalesHistory() {
+    if (!salesHistoryCursor) {
+        return;
+    }
+    
+    try {
+        const response = await fetch(`${API_BASE}/vendas?cursor=${encodeURIComponent(salesHistoryCursor)}`);
+        
+        if (!response.ok) {
+            throw new Error('Erro ao carregar histórico');
+        }
+        
+        salesHistory = salesHistory.concat(await response.json());
+        salesHistoryCursor = response.headers.get('X-Proximo-Cursor');
         updateSalesHistoryUI();
     } catch (error) {
         console.error('Erro ao carregar histórico:', error);
@@ -304,6 +467,228 @@ async function loadSalesHistory() {
     }
 }
 
+// Colocar uma venda finalizada no topo do histórico, sem duplicar
+function addSaleToHistory(sale) {
+    if (salesHistory.some((item) => item.id === sale.id)) {
+        return;
+    }
+    salesHistory.unshift(sale);
+    updateSalesHistoryUI();
+}
+
+// Receber do servidor (SSE) as vendas finalizadas e alteradas em outros caixas
+function connectEvents() {
+    if (!window.EventSource) {
+        return;
+    }
+    const events = new EventSource(`${API_BASE}/eventos?tipos=venda_finalizada,venda_alterada`);
+    
+    events.addEventListener('venda_finalizada', (event) => {
+        addSaleToHistory(JSON.parse(event.data));
+    });
+    
+    events.addEventListener('venda_alterada', (event) => {
+        const change = JSON.parse(event.data);
+        if (currentSale && currentSale.id === change.id && change.revisao > (currentSale.revisao || 0)) {
+            syncCurrentSale();
+        }
+    });
+    
+    // Eventos perdidos enquanto a conexão estava fora: buscar o estado completo
+    events.addEventListener('recarregar', () => {
+        loadSalesHistory();
+        syncCurrentSale();
+    });
+}
+
+// fetch só rejeita com TypeError quando não chegou a falar com o servidor
+function isNetworkError(error) {
+    return error instanceof TypeError;
+}
+
+function newUuid() {
+    if (crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    // crypto.randomUUID só existe em HTTPS/localhost
+    return '10000000-1000-4000-8000-100000000000'.replace(/[018]/g, (c) =>
+        (c ^ crypto.getRandomValues(new Uint8Array(1))[0] & 15 >> c / 4).toString(16)
+    );
+}
+
+// Venda montada só no navegador, enviada ao servidor na sincronização; serverId é
+// a venda aberta no servidor que ela substitui, apagada lá quando a venda chegar
+function startLocalSale(itens = [], serverId = null, uuid = newUuid()) {
+    currentSale = { id: null, uuid: uuid, serverId: serverId, local: true, revisao: 0, itens: [], total: 0 };
+    itens.forEach((item) => addLocalItem(item));
+    updateUI();
+}
+
+// Servidor fora do ar: continuar a venda atual no navegador
+function enterOfflineMode() {
+    if (currentSale && currentSale.local) {
+        return;
+    }
+    showError('Sem conexão com o servidor: as vendas ficam guardadas neste caixa');
+    if (currentSale) {
+        // Mesmo uuid da venda do servidor: uma finalização que chegou lá não é gravada de novo
+        startLocalSale(currentSale.itens, currentSale.id, currentSale.uuid || newUuid());
+    } else {
+        startLocalSale();
+    }
+}
+
+function recalculateLocalTotal() {
+    const cents = currentSale.itens.reduce((sum, item) => sum + Math.round(item.subtotal * 100), 0);
+    currentSale.total = cents / 100;
+}
+
+function addLocalItem(item) {
+    currentSale.itens.push({
+        id: nextLocalItemId--,
+        nome_produto: item.nome_produto,
+        quantidade: item.quantidade,
+        tipo_quantidade: item.tipo_quantidade,
+        preco_unitario: item.preco_unitario,
+        subtotal: Math.round(item.quantidade * item.preco_unitario * 100) / 100
+    });
+    recalculateLocalTotal();
+    updateUI();
+}
+
+function removeLocalItem(itemId) {
+    currentSale.itens = currentSale.itens.filter((item) => item.id !== itemId);
+    recalculateLocalTotal();
+    updateUI();
+}
+
+function openOfflineDb() {
+    if (!offlineDbPromise) {
+        offlineDbPromise = new Promise((resolve, reject) => {
+            const request = indexedDB.open(OFFLINE_DB_NAME, 2);
+            request.onupgradeneeded = () => {
+                [OFFLINE_STORE, OFFLINE_REJECTED_STORE].forEach((name) => {
+                    if (!request.result.objectStoreNames.contains(name)) {
+                        request.result.createObjectStore(name, { keyPath: 'uuid' });
+                    }
+                });
+            };
+            request.onsuccess = () => resolve(request.result);
+            request.onerror = () => reject(request.error);
+        });
+    }
+    return offlineDbPromise;
+}
+
+// Executar action numa transação do IndexedDB; resolve com o resultado do pedido devolvido por action
+async function withOfflineStore(mode, action) {
+    const offlineDb = await openOfflineDb();
+    return new Promise((resolve, reject) => {
+        const transaction = offlineDb.transaction(OFFLINE_STORE, mode);
+        const request = action(transaction.objectStore(OFFLINE_STORE));
+        transaction.oncomplete = () => resolve(request ? request.result : undefined);
+        transaction.onerror = () => reject(transaction.error);
+    });
+}
+
+// Mover da fila para as recusadas as vendas que o servidor não aceita: reenviar não adiantaria
+async function rejectOfflineSales(sales, errors) {
+    const offlineDb = await openOfflineDb();
+    await new Promise((resolve, reject) => {
+        const transaction = offlineDb.transaction([OFFLINE_STORE, OFFLINE_REJECTED_STORE], 'readwrite');
+        sales.forEach((sale, index) => {
+            transaction.objectStore(OFFLINE_REJECTED_STORE).put({ ...sale, erro: errors[index], recusada_em: new Date().toISOString() });
+            transaction.objectStore(OFFLINE_STORE).delete(sale.uuid);
+        });
+        transaction.oncomplete = () => resolve();
+        transaction.onerror = () => reject(transaction.error);
+    });
+    console.error('Vendas guardadas recusadas pelo servidor:', errors);
+    showError(`${sales.length} venda(s) guardada(s) neste caixa foram recusadas pelo servidor: ${errors[0]}`);
+}
+
+// Guardar a venda local finalizada e tentar enviar logo
+async function queueLocalSale(requestBody) {
+    await withOfflineStore('readwrite', (store) => store.put({
+        uuid: currentSale.uuid,
+        venda_aberta_id: currentSale.serverId || null,
+        data_venda: new Date().toISOString(),
+        nome_cliente: requestBody.nome_cliente || null,
+        forma_pagamento: requestBody.forma_pagamento || null,
+        total: currentSale.total,
+        itens: currentSale.itens
+    }));
+    flushOfflineSales();
+}
+
+// Enviar as vendas guardadas em lotes; o servidor ignora as que já recebeu (mesmo uuid).
+// Cada venda do lote sai da fila: aceita, ou recusada (com erro) para a lista das recusadas
+async function flushOfflineSales() {
+    if (offlineSyncing || !window.indexedDB) {
+        return;
+    }
+    offlineSyncing = true;
+    try {
+        let pending = await withOfflineStore('readonly', (store) => store.getAll(null, OFFLINE_BATCH));
+        while (pending.length > 0) {
+            const response = await fetch(`${API_BASE}/vendas/sincronizar`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-Terminal': TERMINAL_ID
+                },
+                body: JSON.stringify({ vendas: pending })
+            });
+            
+            if (!response.ok) {
+                const error = await response.json();
+                // 4xx: o lote nunca será aceito como está; 408/413/429 são temporários
+                if (response.status < 500 && ![408, 413, 429].includes(response.status)) {
+                    await rejectOfflineSales(pending, pending.map(() => error.erro || 'Venda recusada'));
+                    pending = await withOfflineStore('readonly', (store) => store.getAll(null, OFFLINE_BATCH));
+                    continue;
+                }
+                throw new Error(error.erro || 'Erro ao sincronizar vendas');
+            }
+            
+            // A resposta traz uma entrada por venda enviada, na mesma ordem
+            const { vendas } = await response.json();
+            const accepted = pending.filter((sale, index) => !vendas[index].erro);
+            const rejected = pending.filter((sale, index) => vendas[index].erro);
+            await withOfflineStore('readwrite', (store) => {
+                accepted.forEach((sale) => store.delete(sale.uuid));
+            });
+            if (rejected.length > 0) {
+                await rejectOfflineSales(rejected, vendas.filter((venda) => venda.erro).map((venda) => venda.erro));
+            }
+            vendas.forEach((venda, index) => {
+                if (!venda.erro) {
+                    addSaleToHistory({ ...pending[index], id: venda.id, finalizada: true });
+                }
+            });
+            
+            pending = await withOfflineStore('readonly', (store) => store.getAll(null, OFFLINE_BATCH));
+        }
+        
+        // Conexão de volta e nenhuma venda em andamento: voltar a usar a venda do servidor
+        if (currentSale && currentSale.local && currentSale.itens.length === 0) {
+            await createNewSale();
+        }
+    } catch (error) {
+        if (!isNetworkError(error)) {
+            console.error('Erro ao sincronizar vendas guardadas:', error);
+        }
+    } finally {
+        offlineSyncing = false;
+    }
+}
+
+function setupOfflineSync() {
+    window.addEventListener('online', flushOfflineSales);
+    setInterval(flushOfflineSales, OFFLINE_SYNC_INTERVAL);
+    flushOfflineSales();
+}
+
 // Atualizar interface
 function updateUI() {
     updateProductsList();
@@ -311,6 +696,68 @@ function updateUI() {
     updateButtons();
 }
 
+// Aplicar na venda atual só o que mudou (resposta com desde_rev), sem redesenhar a lista inteira
+function applySaleDelta(delta) {
+    // Respostas fora de ordem: uma revisão mais nova já foi aplicada
+    if (!currentSale || delta.id !== currentSale.id || delta.revisao < (currentSale.revisao || 0)) {
+        return;
+    }
+    
+    const emptyMessage = productsList.querySelector('.empty-message');
+    
+    delta.itens_removidos.forEach(itemId => {
+        currentSale.itens = currentSale.itens.filter(item => item.id !== itemId);
+        const element = productsList.querySelector(`[data-item-id="${itemId}"]`);
+        if (element) {
+            element.remove();
+        }
+    });
+    
+    delta.itens_alterados.forEach(item => {
+        const index = currentSale.itens.findIndex(atual => atual.id === item.id);
+        if (index >= 0) {
+            currentSale.itens[index] = item;
+        } else {
+            currentSale.itens.push(item);
+        }
+        
+        const element = productsList.querySelector(`[data-item-id="${item.id}"]`);
+        if (element) {
+            element.outerHTML = renderProductItem(item);
+        } else {
+            if (emptyMessage) {
+                emptyMessage.remove();
+            }
+            productsList.insertAdjacentHTML('beforeend', renderProductItem(item));
+        }
+    });
+    
+    currentSale.total = delta.total;
+    currentSale.finalizada = delta.finalizada;
+    currentSale.revisao = delta.revisao;
+    
+    if (currentSale.itens.length === 0) {
+        updateProductsList();
+    }
+    updateTotal();
+    updateButtons();
+}
+
+// Buscar mudanças feitas na venda atual por outra aba ou janela
+async function syncCurrentSale() {
+    if (!currentSale || currentSale.local) {
+        return;
+    }
+    try {
+        const response = await fetch(`${API_BASE}/vendas/${currentSale.id}?desde_rev=${currentSale.revisao || 0}`);
+        if (response.ok) {
+            applySaleDelta(await response.json());
+        }
+    } catch (error) {
+        console.error('Erro ao sincronizar venda atual:', error);
+    }
+}
+
 // Atualizar lista de produtos
 function updateProductsList() {
     if (!currentSale || currentSale.itens.length === 0) {
@@ -318,23 +765,26 @@ function updateProductsList() {
         return;
     }
     
-    productsList.innerHTML = currentSale.itens.map(item => {
-        const tipoDisplay = item.tipo_quantidade === 'kg' ? 'kg' : 'unid.';
-        return `
-            <div class="product-item">
-                <div class="product-info">
-                    <div class="product-name">${escapeHtml(item.nome_produto)}</div>
-                    <div class="product-details">
-                        Quantidade: ${item.quantidade} ${tipoDisplay} × R$ ${formatCurrency(item.preco_unitario)}
-                    </div>
+    productsList.innerHTML = currentSale.itens.map(renderProductItem).join('');
+}
+
+// HTML de um item da venda atual
+function renderProductItem(item) {
+    const tipoDisplay = item.tipo_quantidade === 'kg' ? 'kg' : 'unid.';
+    return `
+        <div class="product-item" data-item-id="${item.id}">
+            <div class="product-info">
+                <div class="product-name">${escapeHtml(item.nome_produto)}</div>
+                <div class="product-details">
+                    Quantidade: ${item.quantidade} ${tipoDisplay} × R$ ${formatCurrency(item.preco_unitario)}
                 </div>
-                <div class="product-subtotal">R$ ${formatCurrency(item.subtotal)}</div>
-                <button class="btn btn-danger" onclick="removeProduct(${item.id})">
-                    Remover
-                </button>
             </div>
-        `;
-    }).join('');
+            <div class="product-subtotal">R$ ${formatCurrency(item.subtotal)}</div>
+            <button class="btn btn-danger" onclick="removeProduct(${item.id})">
+                Remover
+            </button>
+        </div>
+    `;
 }
 
 // Atualizar total
@@ -407,6 +857,14 @@ function updateSalesHistoryUI() {
         htmlContent += '</div>';
     });
     
+    if (salesHistoryCursor) {
+        htmlContent += `
+            <button class="btn btn-secondary" onclick="loadMoreSalesHistory()">
+                Carregar mais vendas
+            </button>
+        `;
+    }
+    
     salesHistory_div.innerHTML = htmlContent;
 }
 
@@ -464,6 +922,21 @@ function showTicketModal(vendaId) {
     });
 }
 
+// Dados da loja para o cabeçalho do ticket (buscados uma vez; o navegador revalida pelo ETag)
+async function loadStoreInfo() {
+    if (storeInfo) {
+        return storeInfo;
+    }
+    try {
+        const response = await fetch(`${API_BASE}/loja`);
+        storeInfo = response.ok ? await response.json() : STORE_INFO_DEFAULT;
+    } catch (error) {
+        console.error('Erro ao carregar dados da loja:', error);
+        return STORE_INFO_DEFAULT;
+    }
+    return storeInfo;
+}
+
 // Gerar ticket em PDF
 async function generateTicket(vendaId) {
     try {
@@ -477,6 +950,7 @@ async function generateTicket(vendaId) {
             }
             venda = await vendaResponse.json();
         }
+        const loja = await loadStoreInfo();
 
         const { jsPDF } = window.jspdf;
         const doc = new jsPDF();
@@ -496,7 +970,7 @@ async function generateTicket(vendaId) {
         // Cabeçalho
         doc.setFillColor(46, 204, 113); // Verde
         doc.rect(0, 0, pageWidth, 20, 'F'); // Retângulo verde no topo
-        addCenteredText("AGRONORTE", 10, 16, 'bold', [255, 255, 255]); // Branco
+        addCenteredText(loja.nome.toUpperCase(), 10, 16, 'bold', [255, 255, 255]); // Branco
         addCenteredText("MATERIAIS DE PESCA | RAÇÕES | PÁSSAROS E AQUARISMO", 16, 8, 'normal', [255, 255, 255]);
 
         yPosition = 25;
@@ -504,9 +978,9 @@ async function generateTicket(vendaId) {
         // Informações da Loja (mantidas)
         doc.setFontSize(9);
         doc.setTextColor(0, 0, 0); // Preto
-        doc.text("Rua Araras 100 Centro", margin, yPosition);
+        doc.text(loja.endereco, margin, yPosition);
         yPosition += 5;
-        doc.text("Tel: 3252-6819", margin, yPosition);
+        doc.text(`Tel: ${loja.telefone}`, margin, yPosition);
         yPosition += 10;
 
         // Título da Venda
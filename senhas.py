@@ -0,0 +1,130 @@
+from flask import request, current_app
+from src.models.user import db
+from werkzeug.security import generate_password_hash, check_password_hash
+from concurrent.futures import ThreadPoolExecutor
+from collections import namedtuple
+import threading
+import time
+
+# Parâmetros do hash no formato do werkzeug: 'scrypt', 'scrypt:16384:8:1',
+# 'pbkdf2:sha256:600000'... Hashes gravados com outros parâmetros são refeitos no login.
+METODO_PADRAO = 'scrypt'
+
+# Verificações de senha simultâneas (núcleos que o login pode ocupar) e fila máxima
+VERIFICACOES_PADRAO = 2
+FILA_PADRAO = 8
+
+# Tentativas de login: (capacidade, período em segundos) por IP e por usuário
+LIMITE_IP_PADRAO = (20, 60)
+LIMITE_USUARIO_PADRAO = (5, 60)
+
+# Acima disso, baldes já cheios são descartados para limitar a memória
+MAXIMO_CHAVES = 10000
+
+ResultadoLogin = namedtuple('ResultadoLogin', 'usuario erro status espera')
+
+class BaldeTokens:
+    """Limitador token bucket por chave (IP ou usuário), local ao processo"""
+
+    def __init__(self, capacidade, periodo):
+        self.capacidade = capacidade
+        self.taxa = capacidade / periodo
+        self._baldes = {}
+        self._lock = threading.Lock()
+
+    def consumir(self, chave):
+        """Gastar uma ficha; devolve 0 ou os segundos até a próxima ficha"""
+        agora = time.monotonic()
+        with self._lock:
+            fichas, ultimo = self._baldes.get(chave, (self.capacidade, agora))
+            fichas = min(self.capacidade, fichas + (agora - ultimo) * self.taxa)
+            if fichas < 1:
+                self._baldes[chave] = (fichas, agora)
+                return (1 - fichas) / self.taxa
+            self._baldes[chave] = (fichas - 1, agora)
+            if len(self._baldes) > MAXIMO_CHAVES:
+                self._descartar_cheios(agora)
+            return 0
+
+    def _descartar_cheios(self, agora):
+        for chave, (fichas, ultimo) in list(self._baldes.items()):
+            if fichas + (agora - ultimo) * self.taxa >= self.capacidade:
+                del self._baldes[chave]
+
+_executor = None
+_vagas = None
+_limitadores = {}
+_hash_referencia = None
+_lock = threading.Lock()
+
+def _configurar():
+    """Criar no primeiro uso o executor, a fila e os limitadores com a configuração do app"""
+    global _executor, _vagas, _hash_referencia
+    if _executor is not None:
+        return
+    with _lock:
+        if _executor is None:
+            config = current_app.config
+            verificacoes = config.get('SENHA_VERIFICACOES', VERIFICACOES_PADRAO)
+            _vagas = threading.BoundedSemaphore(verificacoes + config.get('SENHA_FILA', FILA_PADRAO))
+            _limitadores['ip'] = BaldeTokens(*config.get('LOGIN_LIMITE_IP', LIMITE_IP_PADRAO))
+            _limitadores['usuario'] = BaldeTokens(*config.get('LOGIN_LIMITE_USUARIO', LIMITE_USUARIO_PADRAO))
+            # Hash de referência: dá o prefixo dos parâmetros atuais e é usado
+            # quando o usuário não existe, para a resposta levar o mesmo tempo
+            _hash_referencia = gerar_hash('referencia')
+            _executor = ThreadPoolExecutor(max_workers=verificacoes, thread_name_prefix='senha')
+
+def gerar_hash(senha):
+    """Hash da senha com os parâmetros configurados em SENHA_METODO"""
+    return generate_password_hash(senha, method=current_app.config.get('SENHA_METODO', METODO_PADRAO))
+
+def precisa_rehash(hash_senha):
+    """O hash foi gravado com parâmetros diferentes dos atuais?"""
+    _configurar()
+    return hash_senha.split('$', 1)[0] != _hash_referencia.split('$', 1)[0]
+
+def _executar_limitado(funcao, *args):
+    """Rodar um cálculo de hash no executor, dentro do limite de SENHA_VERIFICACOES + SENHA_FILA
+
+    Devolve None sem calcular nada quando a fila está cheia.
+    """
+    _configurar()
+    if not _vagas.acquire(blocking=False):
+        return None
+    try:
+        return _executor.submit(funcao, *args).result()
+    finally:
+        _vagas.release()
+
+def verificar_senha(hash_senha, senha):
+    """Conferir a senha no executor limitado; None quando a fila está cheia"""
+    return _executar_limitado(check_password_hash, hash_senha, senha)
+
+def autenticar(modelo, username, senha):
+    """Limitar tentativas, conferir a senha e refazer o hash se os parâmetros mudaram
+
+    As tentativas barradas pelo limitador não chegam a calcular hash nenhum.
+    """
+    _configurar()
+    espera = _limitadores['ip'].consumir(request.remote_addr or '')
+    if not espera:
+        espera = _limitadores['usuario'].consumir(username.strip().lower())
+    if espera:
+        return ResultadoLogin(None, 'Muitas tentativas de login, aguarde e tente novamente', 429, espera)
+
+    usuario = modelo.query.filter_by(username=username).first()
+    correta = verificar_senha(usuario.password_hash if usuario else _hash_referencia, senha)
+    if correta is None:
+        return ResultadoLogin(None, 'Servidor ocupado, tente novamente em instantes', 503, 1)
+    if not usuario or not correta:
+        return ResultadoLogin(None, 'Usuário ou senha incorretos', 401, None)
+
+    if precisa_rehash(usuario.password_hash):
+        # Com a fila cheia o login segue com o hash antigo; o próximo login refaz
+        metodo = current_app.config.get('SENHA_METODO', METODO_PADRAO)
+        novo_hash = _executar_limitado(generate_password_hash, senha, metodo)
+        if novo_hash is not None:
+            usuario.password_hash = novo_hash
+            db.session.commit()
+            current_app.logger.info('Hash da senha de %s refeito com os parâmetros atuais', usuario.username)
+    return ResultadoLogin(usuario, None, 200, None)
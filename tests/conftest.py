@@ -0,0 +1,65 @@
+import os
+import sys
+# Mesmo ajuste de caminho do main.py: o pacote src fica na pasta acima
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import contextlib
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import event
+from src.main import create_app, iniciar_banco
+from src.models.user import db
+from src.models.venda import Venda, ItemVenda
+
+@pytest.fixture
+def app(tmp_path):
+    """App com um banco SQLite em arquivo próprio para cada teste"""
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'teste.db'}",
+        'TICKET_LOTE_DIR': str(tmp_path / 'lotes'),
+    })
+    with app.app_context():
+        iniciar_banco()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def consultas(app):
+    """Gravar as instruções SQL executadas dentro do bloco: with consultas() as lista"""
+    @contextlib.contextmanager
+    def capturar():
+        executadas = []
+        def registrar(conexao, cursor, instrucao, parametros, contexto, executemany):
+            executadas.append(instrucao)
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', registrar)
+        try:
+            yield executadas
+        finally:
+            event.remove(engine, 'before_cursor_execute', registrar)
+    return capturar
+
+def semear_vendas(app, quantidade, itens_por_venda=3):
+    """Gravar vendas finalizadas com itens direto no banco; devolve os ids"""
+    agora = datetime.now()
+    with app.app_context():
+        ids = db.session.execute(db.insert(Venda).returning(Venda.id, sort_by_parameter_order=True), [{
+            'data_venda': agora - timedelta(minutes=numero),
+            'total': itens_por_venda * 2.5,
+            'finalizada': True,
+            'forma_pagamento': 'Pix'
+        } for numero in range(quantidade)]).scalars().all()
+        db.session.execute(db.insert(ItemVenda), [{
+            'venda_id': venda_id, 'nome_produto': f'Produto {numero}', 'quantidade': 1.0,
+            'tipo_quantidade': 'unidade', 'preco_unitario': 2.5, 'subtotal': 2.5
+        } for venda_id in ids for numero in range(itens_por_venda)])
+        db.session.commit()
+    return ids
@@ -0,0 +1,36 @@
+from src.models.user import db
+from src.models.alteracao_venda import AlteracaoVenda
+
+def _alteracoes(app, venda_id):
+    with app.app_context():
+        return db.session.query(AlteracaoVenda).filter_by(venda_id=venda_id).count()
+
+def test_delta_desde_revisao(client):
+    venda_id = client.post('/api/vendas').get_json()['id']
+    primeiro = client.post(f'/api/vendas/{venda_id}/itens', json={
+        'nome_produto': 'Arroz', 'quantidade': 1, 'preco_unitario': 25
+    }).get_json()
+    revisao = client.get(f'/api/vendas/{venda_id}').get_json()['revisao']
+    client.post(f'/api/vendas/{venda_id}/itens', json={'nome_produto': 'Sal', 'quantidade': 1, 'preco_unitario': 3})
+    client.delete(f"/api/vendas/{venda_id}/itens/{primeiro['id']}")
+
+    delta = client.get(f'/api/vendas/{venda_id}?desde_rev={revisao}').get_json()
+    assert [item['nome_produto'] for item in delta['itens_alterados']] == ['Sal']
+    assert delta['itens_removidos'] == [primeiro['id']]
+    assert delta['revisao'] > revisao
+
+def test_finalizar_apaga_o_log_de_alteracoes(app, client):
+    venda_id = client.post('/api/vendas').get_json()['id']
+    client.post(f'/api/vendas/{venda_id}/itens/lote', json={'itens': [
+        {'nome_produto': 'Arroz', 'quantidade': 1, 'preco_unitario': 25},
+        {'nome_produto': 'Sal', 'quantidade': 1, 'preco_unitario': 3},
+    ]})
+    assert _alteracoes(app, venda_id) == 2
+
+    assert client.put(f'/api/vendas/{venda_id}/finalizar', json={}).status_code == 200
+    assert _alteracoes(app, venda_id) == 0
+
+    # Uma tela atrasada recebe a venda finalizada, sem mudanças de itens
+    delta = client.get(f'/api/vendas/{venda_id}?desde_rev=0').get_json()
+    assert delta['finalizada'] is True
+    assert delta['itens_alterados'] == [] and delta['itens_removidos'] == []
@@ -0,0 +1,33 @@
+import logging
+from src.main import create_app, iniciar_banco
+from src.models.user import db
+
+def test_banco_em_memoria():
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+    with app.app_context():
+        iniciar_banco()
+        assert 'pool_size' not in app.config['SQLALCHEMY_ENGINE_OPTIONS']
+    assert app.test_client().post('/api/vendas').status_code == 201
+
+def test_opcoes_do_engine_podem_ser_substituidas(tmp_path):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'teste.db'}",
+        'SQLALCHEMY_ENGINE_OPTIONS': {'pool_size': 2},
+    })
+    with app.app_context():
+        assert db.engine.pool.size() == 2
+        db.engine.dispose()
+
+def test_pragmas_conferidos_na_primeira_conexao_do_worker(app, client, caplog):
+    caplog.set_level(logging.INFO, logger=app.logger.name)
+    # Conexões abertas por iniciar_banco ficaram no pool do app da fixture; um
+    # worker novo sobe com create_app() e não passa por iniciar_banco
+    worker = create_app({'SQLALCHEMY_DATABASE_URI': app.config['SQLALCHEMY_DATABASE_URI']})
+    caplog.set_level(logging.INFO, logger=worker.logger.name)
+    assert worker.test_client().get('/api/vendas').status_code == 200
+
+    mensagens = [registro.getMessage() for registro in caplog.records if registro.getMessage().startswith('SQLite:')]
+    assert len(mensagens) == 1
+    assert 'journal_mode=wal' in mensagens[0]
+    with worker.app_context():
+        db.engine.dispose()
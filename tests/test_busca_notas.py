@@ -0,0 +1,42 @@
+from src.models.user import db
+
+def _criar(client, titulo, conteudo):
+    resposta = client.post('/api/notas', json={'titulo': titulo, 'conteudo': conteudo})
+    assert resposta.status_code == 201
+    return resposta.get_json()['id']
+
+def _indexadas(app, termo):
+    with app.app_context():
+        return db.session.execute(
+            db.text("SELECT rowid FROM nota_fts WHERE nota_fts MATCH :termo ORDER BY rowid"), {'termo': termo}
+        ).scalars().all()
+
+def _buscar(client, texto):
+    resposta = client.get('/api/notas', query_string={'q': texto})
+    assert resposta.status_code == 200
+    return [nota['id'] for nota in resposta.get_json()]
+
+def test_triggers_mantem_o_indice_sincronizado(app, client):
+    nota_id = _criar(client, 'Entrega de ração', 'Fazenda Boa Vista')
+    assert _indexadas(app, 'racao') == [nota_id]
+
+    client.put(f'/api/notas/{nota_id}', json={'titulo': 'Entrega de adubo'})
+    assert _indexadas(app, 'racao') == []
+    assert _indexadas(app, 'adubo') == [nota_id]
+    assert _indexadas(app, 'fazenda') == [nota_id]
+
+    client.delete(f'/api/notas/{nota_id}')
+    assert _indexadas(app, 'adubo') == []
+    assert _indexadas(app, 'fazenda') == []
+
+def test_prefixo_e_aspas_nao_quebram_a_consulta(client):
+    nota_id = _criar(client, 'Pedido "urgente"', 'Semente de milho AND sorgo')
+    assert _buscar(client, 'semen') == [nota_id]
+    assert _buscar(client, '"urgente') == [nota_id]
+    for texto in ('milho*', 'AND', 'sorgo OR', '(milho', 'NEAR(', 'titulo:milho', '-'):
+        _buscar(client, texto)
+
+def test_busca_vazia_lista_todas_as_notas(client):
+    ids = {_criar(client, 'Nota um', 'a'), _criar(client, 'Nota dois', 'b')}
+    for texto in ('', '   '):
+        assert set(_buscar(client, texto)) == ids
@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+import pytest
+from src.models.user import db
+from src.routes import catalogo
+
+@pytest.fixture(autouse=True)
+def indice_novo(app, monkeypatch):
+    """Cada teste tem banco próprio, então o índice do processo começa vazio"""
+    monkeypatch.setattr(catalogo, '_indice', catalogo.IndicePrefixos())
+    app.config['CATALOGO_RECARGA_SEGUNDOS'] = 0
+
+def _sugestoes(client, prefixo):
+    return [produto['nome'] for produto in client.get(f'/api/produtos/sugestoes?prefixo={prefixo}').get_json()]
+
+def test_commit_com_horario_anterior_aparece_na_recarga(app, client, monkeypatch):
+    assert client.post('/api/produtos', json={'nome': 'Feijão', 'preco_unitario': 8}).status_code == 200
+    assert _sugestoes(client, 'fe') == ['Feijão']
+
+    # Outro worker que pegou o horário antes, mas só fez commit agora
+    class Atrasado(datetime):
+        @classmethod
+        def utcnow(cls):
+            return datetime.utcnow() - timedelta(minutes=5)
+    monkeypatch.setattr(catalogo, 'datetime', Atrasado)
+    with app.app_context():
+        catalogo.registrar_produtos([{'nome_produto': 'Fermento', 'preco_unitario': 3, 'tipo_quantidade': 'unidade'}])
+        db.session.commit()
+
+    assert _sugestoes(client, 'fe') == ['Feijão', 'Fermento']
+
+@pytest.mark.parametrize('dados, erro', [
+    ({'nome': 'Arroz', 'preco_unitario': 'abc'}, 'Preço inválido'),
+    ({'nome': 'Arroz', 'preco_unitario': -1}, 'Preço inválido'),
+    ({'nome': 'Arroz', 'preco_unitario': None}, 'Nome e preço unitário são obrigatórios'),
+    ({'preco_unitario': 5}, 'Nome e preço unitário são obrigatórios'),
+    ({'nome': 12, 'preco_unitario': 5}, 'Nome e preço unitário são obrigatórios'),
+    ({'nome': '  ', 'preco_unitario': 5}, 'Nome e preço unitário são obrigatórios'),
+    ([], 'Nome e preço unitário são obrigatórios'),
+])
+def test_cadastro_invalido_devolve_400(client, dados, erro):
+    resposta = client.post('/api/produtos', json=dados)
+    assert resposta.status_code == 400
+    assert resposta.get_json()['erro'] == erro
@@ -0,0 +1,49 @@
+import os
+import pytest
+from src.main import create_app
+
+@pytest.fixture
+def pasta(tmp_path):
+    """Pasta static mínima: HTML, CSS e um logo"""
+    pasta = tmp_path / 'static'
+    pasta.mkdir()
+    (pasta / 'index.html').write_text('<link rel="stylesheet" href="style.css"><p>Caixa</p>')
+    (pasta / 'style.css').write_text('body { margin: 0; }\n' * 100)
+    (pasta / 'logo.png').write_bytes(b'\x89PNG\r\n\x1a\n' + bytes(2048))
+    return pasta
+
+@pytest.fixture
+def app_estaticos(pasta):
+    return create_app({'TESTING': True, 'ESTATICOS_PASTA': str(pasta), 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+
+def _cliente(app):
+    """Cliente com sessão: a SPA só é servida a quem fez login"""
+    client = app.test_client()
+    with client.session_transaction() as sessao:
+        sessao['user_id'] = 1
+    return client
+
+def test_logo_servido_como_esta(app_estaticos, pasta):
+    client = _cliente(app_estaticos)
+    assert client.get('/').status_code == 200
+    resposta = client.get('/logo.png')
+    assert resposta.mimetype == 'image/png'
+    assert resposta.data == (pasta / 'logo.png').read_bytes()
+
+def test_sem_rota_static_do_flask(app_estaticos):
+    assert 'static' not in app_estaticos.view_functions
+    resposta = _cliente(app_estaticos).get('/style.css?v=qualquer')
+    assert resposta.status_code == 200
+    assert resposta.headers['Cache-Control'] == 'private, no-cache'
+    assert resposta.get_etag()[0]
+
+def test_gerar_grava_so_as_variantes_comprimidas(app_estaticos, pasta):
+    resultado = app_estaticos.test_cli_runner().invoke(args=['estaticos', 'gerar'])
+    assert resultado.exit_code == 0, resultado.output
+    assert os.path.exists(pasta / 'style.css.gz')
+    assert sorted(nome for nome in os.listdir(pasta) if nome.startswith('logo')) == ['logo.png']
+
+    resposta = _cliente(create_app({'ESTATICOS_PASTA': str(pasta), 'SQLALCHEMY_DATABASE_URI': 'sqlite://'})).get(
+        '/style.css', headers={'Accept-Encoding': 'gzip'}
+    )
+    assert resposta.headers['Content-Encoding'] == 'gzip'
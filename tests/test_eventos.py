@@ -0,0 +1,73 @@
+import os
+import runpy
+import pytest
+from src.routes import eventos
+from src.routes.eventos import BarramentoEventos
+
+@pytest.fixture
+def barramento(app, monkeypatch):
+    """Barramento novo com buffer de 3 eventos e conexões que terminam logo"""
+    barramento = BarramentoEventos(3)
+    monkeypatch.setattr(eventos, '_barramento', barramento)
+    app.config['EVENTOS_DURACAO_SEGUNDOS'] = 0.2
+    return barramento
+
+def _publicar(barramento, quantidade):
+    for numero in range(1, quantidade + 1):
+        barramento.publicar('venda_finalizada', {'id': numero})
+
+def _receber(client, ultimo_id):
+    """(evento, id) de cada mensagem do stream, sem retry e keepalive"""
+    resposta = client.get('/api/eventos', headers={'Last-Event-ID': ultimo_id})
+    assert resposta.status_code == 200
+    recebidos = []
+    for bloco in resposta.get_data(as_text=True).split('\n\n'):
+        campos = dict(linha.split(': ', 1) for linha in bloco.splitlines() if not linha.startswith(':') and ': ' in linha)
+        if 'event' in campos:
+            recebidos.append((campos['event'], campos['id']))
+    return recebidos
+
+def test_replay_so_dos_eventos_depois_do_id(client, barramento):
+    _publicar(barramento, 3)
+    epoca = barramento.epoca
+    assert _receber(client, f'{epoca}-1') == [('venda_finalizada', f'{epoca}-2'), ('venda_finalizada', f'{epoca}-3')]
+    assert _receber(client, f'{epoca}-3') == []
+
+def test_id_de_outra_epoca_pede_recarga(client, barramento):
+    _publicar(barramento, 2)
+    epoca = barramento.epoca
+    for ultimo_id in (f'outra{epoca}-1', f'{epoca}-9', f'{epoca}-x'):
+        assert _receber(client, ultimo_id) == [('recarregar', f'{epoca}-2')]
+
+def test_id_mais_antigo_que_o_buffer_pede_recarga(client, barramento):
+    _publicar(barramento, 5)
+    epoca = barramento.epoca
+    # O buffer guarda 3, 4 e 5: depois do 1 o evento 2 já se perdeu
+    assert _receber(client, f'{epoca}-1') == [('recarregar', f'{epoca}-5')]
+    assert _receber(client, f'{epoca}-2') == [
+        ('venda_finalizada', f'{epoca}-3'), ('venda_finalizada', f'{epoca}-4'), ('venda_finalizada', f'{epoca}-5')
+    ]
+
+def _configuracao_gunicorn(monkeypatch, **ambiente):
+    """Variáveis do gunicorn.conf.py com o ambiente dado (o arquivo fica ao lado de src/)"""
+    for nome in ('EVENTOS_ATIVOS', 'WEB_WORKERS', 'EVENTOS_CONEXOES'):
+        monkeypatch.delenv(nome, raising=False)
+    for nome, valor in ambiente.items():
+        monkeypatch.setenv(nome, valor)
+    caminho = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'gunicorn.conf.py')
+    return runpy.run_path(caminho)
+
+def test_gunicorn_roda_um_worker_com_os_eventos_ligados(monkeypatch):
+    # Barramento na memória do processo: um segundo worker não veria as vendas do primeiro
+    assert _configuracao_gunicorn(monkeypatch)['workers'] == 1
+    assert _configuracao_gunicorn(monkeypatch, WEB_WORKERS='4')['workers'] == 1
+    configuracao = _configuracao_gunicorn(monkeypatch, EVENTOS_ATIVOS='0', WEB_WORKERS='4')
+    assert configuracao['workers'] == 4
+    assert configuracao['worker_class'] == 'gthread'
+
+def test_eventos_desligados(app, client, barramento):
+    app.config['EVENTOS_ATIVOS'] = False
+    assert client.get('/api/eventos').status_code == 404
+    with app.app_context():
+        eventos.publicar('venda_finalizada', {'id': 1})
+    assert barramento.aguardar(0, 0) == []
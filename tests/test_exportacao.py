@@ -0,0 +1,59 @@
+import csv
+import io
+import json
+from datetime import datetime
+from src.models.user import db
+from src.models.venda import Venda, ItemVenda
+
+def _gravar_venda(app, data_venda, itens):
+    with app.app_context():
+        venda = Venda(data_venda=data_venda, finalizada=True, forma_pagamento='Pix', nome_cliente='Ana',
+                      total=sum(quantidade * preco for _, quantidade, preco in itens))
+        venda.itens = [
+            ItemVenda(nome_produto=nome, quantidade=quantidade, tipo_quantidade='unidade',
+                      preco_unitario=preco, subtotal=quantidade * preco)
+            for nome, quantidade, preco in itens
+        ]
+        db.session.add(venda)
+        db.session.commit()
+        return venda.id
+
+def _exportar(client, formato, de, ate):
+    resposta = client.get(f'/api/vendas/export?formato={formato}&de={de}&ate={ate}')
+    assert resposta.status_code == 200
+    assert resposta.headers['Content-Disposition'] == f'attachment; filename=vendas.{formato}'
+    return resposta.get_data(as_text=True)
+
+def test_exportacao_csv_e_jsonl_no_periodo(app, client):
+    _gravar_venda(app, datetime(2026, 3, 31, 23, 59), [('Fora', 1, 1.0)])
+    primeira = _gravar_venda(app, datetime(2026, 4, 1, 8, 0), [('Ração', 2, 10.5), ('Anzol', 3, 0.5)])
+    segunda = _gravar_venda(app, datetime(2026, 4, 2, 18, 30), [('Alpiste', 1, 12.35)])
+    _gravar_venda(app, datetime(2026, 4, 3, 0, 0), [('Fora', 1, 1.0)])
+
+    linhas = list(csv.reader(io.StringIO(_exportar(client, 'csv', '2026-04-01', '2026-04-02'))))
+    assert linhas[0] == [
+        'venda_id', 'data_venda', 'nome_cliente', 'forma_pagamento', 'total_venda',
+        'item_id', 'nome_produto', 'quantidade', 'tipo_quantidade', 'preco_unitario', 'subtotal'
+    ]
+    assert [(int(linha[0]), linha[6], linha[10]) for linha in linhas[1:]] == [
+        (primeira, 'Ração', '21.00'), (primeira, 'Anzol', '1.50'), (segunda, 'Alpiste', '12.35')
+    ]
+    assert linhas[1][1:5] == ['2026-04-01T08:00:00', 'Ana', 'Pix', '22.50']
+
+    vendas = [json.loads(linha) for linha in _exportar(client, 'jsonl', '2026-04-01', '2026-04-02').splitlines()]
+    assert [venda['id'] for venda in vendas] == [primeira, segunda]
+    assert [item['nome_produto'] for item in vendas[0]['itens']] == ['Ração', 'Anzol']
+    assert vendas[1]['total'] == 12.35 and vendas[1]['data_venda'] == '2026-04-02T18:30:00'
+
+def test_exportacao_de_periodo_vazio(app, client):
+    _gravar_venda(app, datetime(2026, 4, 1, 8, 0), [('Ração', 1, 10.0)])
+    conteudo = _exportar(client, 'csv', '2026-05-01', '2026-05-31')
+    assert conteudo.splitlines() == [
+        'venda_id,data_venda,nome_cliente,forma_pagamento,total_venda,'
+        'item_id,nome_produto,quantidade,tipo_quantidade,preco_unitario,subtotal'
+    ]
+    assert _exportar(client, 'jsonl', '2026-05-01', '2026-05-31') == ''
+
+def test_exportacao_com_parametros_invalidos(client):
+    assert client.get('/api/vendas/export?formato=xml').status_code == 400
+    assert client.get('/api/vendas/export?de=01/04/2026').status_code == 400
@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+
+# Orçamento da subida de um worker (import + create_app), em ms. O padrão é folgado
+# (a subida leva uns 600 ms numa máquina comum) para pegar só regressões grandes,
+# como uma dependência pesada importada de novo; apertar com SUBIDA_LIMITE_MS=800
+LIMITE_MS = int(os.environ.get('SUBIDA_LIMITE_MS', 3000))
+# Dependências pesadas que só podem ser importadas no primeiro uso, nunca na subida
+MODULOS_SOB_DEMANDA = ('reportlab', 'PIL')
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _medir_subida():
+    """Subir o app num processo novo com python -X importtime: (ms totais, módulos importados)"""
+    codigo = (
+        'import time; inicio = time.perf_counter(); '
+        'from src.main import create_app; create_app(); '
+        'print(round((time.perf_counter() - inicio) * 1000))'
+    )
+    processo = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', codigo],
+        cwd=RAIZ, capture_output=True, text=True, check=True
+    )
+    # Linhas "import time: próprio | acumulado | módulo"; o recuo do nome indica o nível
+    modulos = []
+    for linha in processo.stderr.splitlines():
+        partes = linha.removeprefix('import time:').split('|')
+        if len(partes) == 3 and partes[1].strip().isdigit():
+            modulos.append(partes[2].strip())
+    return int(processo.stdout.split()[-1]), modulos
+
+def test_subida_nao_importa_dependencias_pesadas():
+    _, modulos = _medir_subida()
+    assert [modulo for modulo in modulos if modulo in MODULOS_SOB_DEMANDA] == []
+
+def test_subida_dentro_do_orcamento():
+    # A primeira medida aquece o cache de bytecode e do sistema de arquivos
+    _medir_subida()
+    total_ms, _ = _medir_subida()
+    assert total_ms <= LIMITE_MS, f'subida levou {total_ms} ms (limite {LIMITE_MS} ms)'
@@ -0,0 +1,33 @@
+import pytest
+
+INVALIDOS = [
+    {'nome_produto': 'Anzol', 'preco_unitario': 'abc'},
+    {'nome_produto': 'Anzol', 'preco_unitario': 1, 'quantidade': None},
+    {'preco_unitario': 1},
+]
+
+@pytest.mark.parametrize('item', INVALIDOS)
+def test_item_invalido_responde_400_como_no_lote(client, item):
+    venda_id = client.post('/api/vendas').get_json()['id']
+
+    unico = client.post(f'/api/vendas/{venda_id}/itens', json=item)
+    lote = client.post(f'/api/vendas/{venda_id}/itens/lote', json=[item])
+
+    assert unico.status_code == lote.status_code == 400
+    assert lote.get_json()['erro'] == f"Item 1: {unico.get_json()['erro']}"
+
+def test_alterar_item_com_quantidade_invalida_responde_400(client):
+    venda_id = client.post('/api/vendas').get_json()['id']
+    venda = client.post(f'/api/vendas/{venda_id}/itens', json={'nome_produto': 'Anzol', 'preco_unitario': 1}).get_json()
+    item_id = venda['itens'][0]['id']
+
+    resposta = client.put(f'/api/vendas/{venda_id}/itens/{item_id}', json={'quantidade': None})
+    assert resposta.status_code == 400
+    assert client.get(f'/api/vendas/{venda_id}').get_json()['total'] == 1.0
+
+@pytest.mark.parametrize('corpo', ['', 'não é json', '{"itens": '])
+def test_lote_sem_json_valido_responde_400(client, corpo):
+    venda_id = client.post('/api/vendas').get_json()['id']
+    resposta = client.post(f'/api/vendas/{venda_id}/itens/lote', data=corpo, content_type='application/json')
+    assert resposta.status_code == 400
+    assert resposta.get_json()['erro'] == 'Envie uma lista de itens'
@@ -0,0 +1,107 @@
+import base64
+from datetime import datetime
+from conftest import semear_vendas
+from src.models.user import db
+from src.models.venda import Venda
+
+def _consultas_listagem(client, consultas, caminho):
+    with consultas() as executadas:
+        resposta = client.get(caminho)
+    assert resposta.status_code == 200
+    return resposta.get_json(), len(executadas)
+
+def test_historico_carrega_itens_sem_n_mais_1(app, client, consultas):
+    semear_vendas(app, 3)
+    vendas, poucas = _consultas_listagem(client, consultas, '/api/vendas?limite=200')
+    assert len(vendas) == 3 and all(len(venda['itens']) == 3 for venda in vendas)
+
+    semear_vendas(app, 40)
+    vendas, muitas = _consultas_listagem(client, consultas, '/api/vendas?limite=200')
+    assert len(vendas) == 43
+    # Uma consulta para as vendas e uma para os itens da página, qualquer que seja o tamanho
+    assert muitas == poucas <= 2
+
+def test_listagem_de_debug_conta_itens_no_sql(app, client, consultas):
+    semear_vendas(app, 3)
+    _, poucas = _consultas_listagem(client, consultas, '/api/vendas/todas')
+
+    semear_vendas(app, 40)
+    vendas, muitas = _consultas_listagem(client, consultas, '/api/vendas/todas')
+    assert len(vendas) == 43 and all(venda['itens_count'] == 3 for venda in vendas)
+    assert muitas == poucas == 1
+
+def test_cursor_percorre_vendas_com_a_mesma_data(app, client):
+    ids = semear_vendas(app, 7, itens_por_venda=1)
+    with app.app_context():
+        # Metade das vendas no mesmo instante: o id desempata a ordem
+        mesma_data = db.session.get(Venda, ids[0]).data_venda
+        db.session.execute(db.update(Venda).where(Venda.id.in_(ids[:5])).values(data_venda=mesma_data))
+        db.session.commit()
+
+    vistos = []
+    caminho = '/api/vendas?limite=2&campos=resumo'
+    while caminho:
+        resposta = client.get(caminho)
+        assert resposta.status_code == 200
+        vistos.extend(venda['id'] for venda in resposta.get_json())
+        cursor = resposta.headers.get('X-Proximo-Cursor')
+        caminho = f'/api/vendas?limite=2&campos=resumo&cursor={cursor}' if cursor else None
+
+    assert len(vistos) == len(set(vistos)) == 7
+    assert vistos == sorted(ids[:5], reverse=True) + ids[5:]
+
+def test_cursor_invalido(client):
+    for cursor in ('abc', 'bmFvLWUtZGF0YQ==', base64.urlsafe_b64encode(b'2026-01-01T10:00:00|x').decode()):
+        resposta = client.get(f'/api/vendas?cursor={cursor}')
+        assert resposta.status_code == 400
+        assert resposta.get_json()['erro'] == 'Cursor inválido'
+
+def _semear_clientes(app):
+    """Vendas de 1 a 4 de abril de 2026, alternando cliente e forma de pagamento; devolve os ids"""
+    with app.app_context():
+        return db.session.execute(db.insert(Venda).returning(Venda.id, sort_by_parameter_order=True), [{
+            'data_venda': datetime(2026, 4, dia, hora),
+            'total': 10.0,
+            'finalizada': True,
+            'nome_cliente': 'Ana Souza' if hora % 2 else 'Bruno',
+            'forma_pagamento': 'Pix' if dia % 2 else 'Dinheiro'
+        } for dia in range(1, 5) for hora in (9, 10, 11, 12)]).scalars().all()
+
+def _ids(client, parametros):
+    """Ids de todas as páginas da listagem com os parâmetros dados, seguindo o cursor"""
+    ids = []
+    cursor = None
+    while True:
+        resposta = client.get('/api/vendas', query_string=parametros | ({'cursor': cursor} if cursor else {}))
+        assert resposta.status_code == 200
+        ids.extend(venda['id'] for venda in resposta.get_json())
+        cursor = resposta.headers.get('X-Proximo-Cursor')
+        if not cursor:
+            return ids
+
+def test_filtros_do_historico(app, client):
+    _semear_clientes(app)
+    with app.app_context():
+        vendas = Venda.query.all()
+
+    def esperado(condicao):
+        return [venda.id for venda in sorted(vendas, key=lambda venda: (venda.data_venda, venda.id), reverse=True) if condicao(venda)]
+
+    casos = [
+        ({'de': '2026-04-03'}, lambda venda: venda.data_venda.day >= 3),
+        ({'ate': '2026-04-02'}, lambda venda: venda.data_venda.day <= 2),
+        ({'de': '2026-04-02', 'ate': '2026-04-02'}, lambda venda: venda.data_venda.day == 2),
+        ({'cliente': 'souza'}, lambda venda: venda.nome_cliente == 'Ana Souza'),
+        ({'forma_pagamento': 'Pix'}, lambda venda: venda.forma_pagamento == 'Pix'),
+        ({'de': '2026-04-02', 'cliente': 'bruno', 'forma_pagamento': 'Dinheiro'},
+         lambda venda: venda.data_venda.day >= 2 and venda.nome_cliente == 'Bruno' and venda.forma_pagamento == 'Dinheiro'),
+    ]
+    for parametros, condicao in casos:
+        assert _ids(client, parametros | {'campos': 'resumo'}) == esperado(condicao), parametros
+        # Os mesmos filtros em páginas de 3, seguindo o cursor
+        assert _ids(client, parametros | {'campos': 'resumo', 'limite': 3}) == esperado(condicao), parametros
+
+def test_data_invalida_no_filtro(client):
+    resposta = client.get('/api/vendas?de=01/04/2026')
+    assert resposta.status_code == 400
+    assert resposta.get_json()['erro'] == "Data inválida em 'de', use AAAA-MM-DD"
@@ -0,0 +1,56 @@
+import pytest
+from werkzeug.security import generate_password_hash
+from src.models.user import db, User
+from src.routes import senhas
+
+SENHA = 'agronorte123'
+
+@pytest.fixture(autouse=True)
+def limitadores_novos(monkeypatch):
+    """Executor, fila e limitadores são do processo: cada teste configura os seus"""
+    for nome, valor in (('_executor', None), ('_vagas', None), ('_limitadores', {}), ('_hash_referencia', None)):
+        monkeypatch.setattr(senhas, nome, valor)
+
+def _login(client, senha=SENHA):
+    return client.post('/login', data={'username': 'agronorte', 'password': senha})
+
+def _hash_gravado(app):
+    with app.app_context():
+        return User.query.filter_by(username='agronorte').one().password_hash
+
+def _gravar_hash(app, metodo):
+    with app.app_context():
+        User.query.filter_by(username='agronorte').one().password_hash = generate_password_hash(SENHA, method=metodo)
+        db.session.commit()
+
+def test_limite_de_tentativas_responde_429_com_retry_after(app, client):
+    app.config['LOGIN_LIMITE_USUARIO'] = (2, 60)
+    assert _login(client, 'errada').status_code == 200
+    assert _login(client, 'errada').status_code == 200
+
+    resposta = _login(client)
+    assert resposta.status_code == 429
+    assert int(resposta.headers['Retry-After']) >= 1
+    assert 'Muitas tentativas' in resposta.get_data(as_text=True)
+
+def test_hash_desatualizado_e_refeito_no_login(app, client):
+    app.config['SENHA_METODO'] = 'pbkdf2:sha256:1000'
+    _gravar_hash(app, 'pbkdf2:sha256:500')
+
+    resposta = _login(client)
+    assert resposta.status_code == 302
+    assert _hash_gravado(app).startswith('pbkdf2:sha256:1000$')
+
+def test_rehash_respeita_a_fila_de_verificacoes(app, client, monkeypatch):
+    app.config.update(SENHA_METODO='pbkdf2:sha256:1000', SENHA_VERIFICACOES=1, SENHA_FILA=0)
+    _gravar_hash(app, 'pbkdf2:sha256:500')
+    antigo = _hash_gravado(app)
+
+    # A verificação ocupa a única vaga e não a devolve: o rehash não pode furar a fila
+    def verificar_sem_devolver(hash_senha, senha):
+        assert senhas._vagas.acquire(blocking=False)
+        return True
+    monkeypatch.setattr(senhas, 'verificar_senha', verificar_sem_devolver)
+
+    assert _login(client).status_code == 302
+    assert _hash_gravado(app) == antigo
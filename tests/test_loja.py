@@ -0,0 +1,63 @@
+import pytest
+from src.models.user import db
+from src.models.loja import Loja
+from src.models.versao import incrementar_versao
+from src.routes import loja
+
+DADOS = {'nome': 'Loja Centro', 'endereco': 'Rua A, 1', 'telefone': '1111-1111'}
+
+@pytest.fixture(autouse=True)
+def cache_vazio(monkeypatch):
+    # O cache é do processo e os bancos dos testes começam todos na versão 0
+    monkeypatch.setattr(loja, '_cache', loja.CacheLoja())
+
+def _renomear(app, nome, nova_versao):
+    """Alterar a loja como outro worker faria: direto no banco, sem passar pelo cache deste"""
+    with app.app_context():
+        Loja.query.first().nome = nome
+        if nova_versao:
+            incrementar_versao('loja')
+        db.session.commit()
+
+def test_loja_responde_304_com_o_mesmo_etag(client):
+    assert client.post('/api/loja', json=DADOS).status_code == 200
+    resposta = client.get('/api/loja')
+    assert resposta.status_code == 200
+    assert resposta.get_json()['nome'] == 'Loja Centro'
+    etag = resposta.headers['ETag']
+    assert resposta.headers['Cache-Control'] == 'private, no-cache'
+
+    resposta = client.get('/api/loja', headers={'If-None-Match': etag})
+    assert resposta.status_code == 304
+    assert resposta.data == b''
+    assert resposta.headers['ETag'] == etag
+
+    assert client.get('/api/loja', headers={'If-None-Match': '"loja-v999"'}).status_code == 200
+
+def test_cache_da_loja_segue_a_versao_gravada(app, client):
+    app.config['LOJA_VERIFICACAO_SEGUNDOS'] = 0
+    client.post('/api/loja', json=DADOS)
+    etag = client.get('/api/loja').headers['ETag']
+
+    # Sem versão nova o cache continua valendo, mesmo com a linha alterada
+    _renomear(app, 'Sem Aviso', nova_versao=False)
+    resposta = client.get('/api/loja', headers={'If-None-Match': etag})
+    assert resposta.status_code == 304
+
+    # Com a versão nova em versao_dados o cache é descartado e o ETag muda
+    _renomear(app, 'Loja Nova', nova_versao=True)
+    resposta = client.get('/api/loja', headers={'If-None-Match': etag})
+    assert resposta.status_code == 200
+    assert resposta.get_json()['nome'] == 'Loja Nova'
+    assert resposta.headers['ETag'] != etag
+
+def test_versao_so_e_conferida_depois_do_intervalo(app, client):
+    app.config['LOJA_VERIFICACAO_SEGUNDOS'] = 60
+    client.post('/api/loja', json=DADOS)
+    client.get('/api/loja')
+
+    _renomear(app, 'Loja Nova', nova_versao=True)
+    assert client.get('/api/loja').get_json()['nome'] == 'Loja Centro'
+
+    app.config['LOJA_VERIFICACAO_SEGUNDOS'] = 0
+    assert client.get('/api/loja').get_json()['nome'] == 'Loja Nova'
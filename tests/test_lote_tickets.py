@@ -0,0 +1,73 @@
+import io
+import os
+import time
+import zipfile
+from concurrent.futures.process import BrokenProcessPool
+import pytest
+from src.routes import ticket
+from conftest import semear_vendas
+
+def _aguardar_lote(client, lote_id, limite=60):
+    fim = time.monotonic() + limite
+    while time.monotonic() < fim:
+        status = client.get(f'/api/tickets/lote/{lote_id}').get_json()
+        if status['status'] not in ('pendente', 'processando'):
+            return status
+        time.sleep(0.1)
+    pytest.fail(f'Lote {lote_id} não terminou')
+
+def test_lote_zip_com_um_pdf_por_venda(app, client):
+    ids = semear_vendas(app, 3)
+    resposta = client.post('/api/tickets/lote', json={'ids': ids, 'formato': 'zip'})
+    assert resposta.status_code == 202
+
+    status = _aguardar_lote(client, resposta.get_json()['id'])
+    assert status['status'] == 'concluido'
+    assert status['concluidos'] == 3
+
+    arquivo = client.get(f"/api/tickets/lote/{status['id']}/arquivo")
+    with zipfile.ZipFile(io.BytesIO(arquivo.data)) as arquivo_zip:
+        assert sorted(arquivo_zip.namelist()) == sorted(f'ticket_venda_{venda_id}.pdf' for venda_id in ids)
+
+def test_processo_morto_grava_erro_e_pool_e_recriado(app, client):
+    ids = semear_vendas(app, 2)
+    with app.app_context():
+        pool = ticket._obter_pool(1)
+    with pytest.raises(BrokenProcessPool):
+        pool.submit(os._exit, 1).result()
+
+    # pdf sempre passa pelo pool; no zip os tickets podem vir do cache
+    resposta = client.post('/api/tickets/lote', json={'ids': ids, 'formato': 'pdf'})
+    status = _aguardar_lote(client, resposta.get_json()['id'])
+    assert status['status'] == 'erro'
+    assert status['erro']
+
+    resposta = client.post('/api/tickets/lote', json={'ids': ids, 'formato': 'pdf'})
+    assert _aguardar_lote(client, resposta.get_json()['id'])['status'] == 'concluido'
+
+def test_lote_parado_e_dado_como_interrompido(app, client):
+    pasta = app.config['TICKET_LOTE_DIR']
+    os.makedirs(pasta, exist_ok=True)
+    lote_id = 'a' * 32
+    caminho = os.path.join(pasta, f'{lote_id}.json')
+    with open(caminho, 'w') as arquivo:
+        arquivo.write('{"id": "%s", "status": "processando", "formato": "pdf", "erro": null}' % lote_id)
+    antigo = time.time() - ticket.LOTE_SEM_PROGRESSO_SEGUNDOS - 1
+    os.utime(caminho, (antigo, antigo))
+
+    status = client.get(f'/api/tickets/lote/{lote_id}').get_json()
+    assert status['status'] == 'erro'
+
+def test_novo_lote_apaga_arquivos_vencidos(app, client):
+    ids = semear_vendas(app, 1)
+    pasta = app.config['TICKET_LOTE_DIR']
+    os.makedirs(pasta, exist_ok=True)
+    vencido = os.path.join(pasta, f"{'b' * 32}.zip")
+    with open(vencido, 'wb') as arquivo:
+        arquivo.write(b'zip antigo')
+    antigo = time.time() - ticket.VALIDADE_LOTE_SEGUNDOS - 1
+    os.utime(vencido, (antigo, antigo))
+
+    resposta = client.post('/api/tickets/lote', json={'ids': ids, 'formato': 'pdf'})
+    _aguardar_lote(client, resposta.get_json()['id'])
+    assert not os.path.exists(vencido)
@@ -0,0 +1,77 @@
+import re
+import pytest
+from src.main import create_app, iniciar_banco
+from src.models.user import db
+from src.routes import metricas, ticket
+from conftest import semear_vendas
+
+@pytest.fixture
+def app_metricas(tmp_path, monkeypatch):
+    """App com /metrics e Server-Timing ligados e histogramas zerados"""
+    for histograma in metricas.HISTOGRAMAS:
+        monkeypatch.setattr(histograma, '_series', {})
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'teste.db'}",
+        'TICKET_LOTE_DIR': str(tmp_path / 'lotes'),
+        'METRICAS_ATIVAS': True,
+        'METRICAS_SERVER_TIMING': True,
+    })
+    with app.app_context():
+        iniciar_banco()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+def _valor(texto, serie):
+    """Valor de uma linha do /metrics, ex.: db_statements_per_request_count{endpoint="venda.listar_vendas"}"""
+    for linha in texto.splitlines():
+        nome, _, valor = linha.rpartition(' ')
+        if nome == serie:
+            return float(valor)
+    raise AssertionError(f'{serie} não está no /metrics')
+
+def test_server_timing_e_metrics_depois_de_uma_requisicao(app_metricas):
+    semear_vendas(app_metricas, 3)
+    client = app_metricas.test_client()
+
+    resposta = client.get('/api/vendas')
+    assert resposta.status_code == 200
+    timing = resposta.headers['Server-Timing']
+    partes = re.fullmatch(r'db;dur=([\d.]+);desc="(\d+) SQL", total;dur=([\d.]+)', timing)
+    assert partes, timing
+    tempo_banco, consultas, total = float(partes[1]), int(partes[2]), float(partes[3])
+    assert consultas >= 1
+    assert 0 < tempo_banco <= total
+
+    resposta = client.get('/metrics')
+    assert resposta.status_code == 200
+    assert resposta.headers['Content-Type'] == 'text/plain; version=0.0.4; charset=utf-8'
+    texto = resposta.get_data(as_text=True)
+
+    rotulo = 'endpoint="venda.listar_vendas"'
+    assert _valor(texto, f'http_request_duration_seconds_count{{method="GET",{rotulo},status="200"}}') == 1
+    assert _valor(texto, f'http_request_duration_seconds_bucket{{method="GET",{rotulo},status="200",le="+Inf"}}') == 1
+    # O histograma guarda os mesmos números que foram no cabeçalho
+    assert _valor(texto, f'db_statements_per_request_count{{{rotulo}}}') == 1
+    assert _valor(texto, f'db_statements_per_request_sum{{{rotulo}}}') == consultas
+    assert _valor(texto, f'db_time_seconds_per_request_sum{{{rotulo}}}') == pytest.approx(tempo_banco / 1000, abs=1e-5)
+
+def test_server_timing_inclui_o_pdf(app_metricas, monkeypatch):
+    monkeypatch.setattr(ticket, '_cache', ticket.CacheTickets(ticket.CACHE_BYTES_PADRAO))
+    venda_id, = semear_vendas(app_metricas, 1)
+    client = app_metricas.test_client()
+
+    resposta = client.get(f'/api/vendas/{venda_id}/ticket')
+    assert resposta.status_code == 200
+    assert re.search(r', pdf;dur=[\d.]+, total;dur=', resposta.headers['Server-Timing'])
+    texto = client.get('/metrics').get_data(as_text=True)
+    assert _valor(texto, 'pdf_render_seconds_count{tipo="ticket"}') == 1
+
+def test_metricas_desligadas(app, client):
+    # O app dos outros testes não liga as métricas, mesmo depois de um app com elas ligadas
+    resposta = client.get('/api/vendas')
+    assert resposta.status_code == 200
+    assert 'Server-Timing' not in resposta.headers
+    assert client.get('/metrics').status_code == 404
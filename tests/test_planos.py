@@ -0,0 +1,36 @@
+from src.models.user import db
+from src.routes.planos import planos_rotas, verificar_planos
+
+def _sql(planos):
+    return [' '.join(instrucao.split()) for instrucao in planos]
+
+def test_consultas_das_rotas_usam_indices(app):
+    problemas = verificar_planos(planos_rotas(app))
+    assert problemas == []
+
+def test_roteiro_passa_pelas_consultas_dos_blueprints(app):
+    instrucoes = _sql(planos_rotas(app))
+
+    def emitida(*trechos):
+        return any(all(trecho in instrucao for trecho in trechos) for instrucao in instrucoes)
+
+    # Exportação (junção com os itens)
+    assert emitida('FROM venda LEFT OUTER JOIN item_venda', 'ORDER BY venda.data_venda, venda.id, item_venda.id')
+    # Relatório ordenado pelo total
+    assert emitida('FROM resumo_venda', 'ORDER BY resumo_venda.total_centavos DESC')
+    # Sincronização: uuids já recebidos
+    assert emitida('FROM venda_sincronizada', 'venda_sincronizada.uuid IN')
+    # Finalização protegida com o total calculado no UPDATE
+    assert emitida('UPDATE venda SET total=(SELECT', 'venda.finalizada = 0', 'RETURNING')
+    # Delta da venda desde uma revisão
+    assert emitida('FROM alteracao_venda', 'alteracao_venda.id >')
+
+def test_varredura_fora_de_indice_e_apontada(app):
+    with app.app_context():
+        db.session.execute(db.text('DROP INDEX ix_resumo_venda_agrupamento_total'))
+        db.session.commit()
+
+    problemas = verificar_planos(planos_rotas(app))
+    assert problemas
+    assert all(rotas == [('GET', '/api/relatorios/vendas')] for rotas, _, _ in problemas)
+    assert {passo for _, _, passo in problemas} == {'USE TEMP B-TREE FOR ORDER BY'}
@@ -0,0 +1,71 @@
+from src.models.user import db
+from src.models.resumo_venda import ResumoVenda
+from src.models.venda import Venda, ItemVenda
+
+def _vender(client, itens, forma_pagamento):
+    venda_id = client.post('/api/vendas').get_json()['id']
+    client.post(f'/api/vendas/{venda_id}/itens/lote', json=itens)
+    resposta = client.put(f'/api/vendas/{venda_id}/finalizar', json={'forma_pagamento': forma_pagamento})
+    assert resposta.status_code == 200
+    return resposta.get_json()
+
+def _resumo(app):
+    with app.app_context():
+        return {
+            (resumo.agrupamento, resumo.chave): (resumo.quantidade_vendas, resumo.quantidade_itens, resumo.total_centavos)
+            for resumo in ResumoVenda.query
+        }
+
+def test_finalizacao_soma_no_resumo_e_reconstrucao_confere(app, client):
+    primeira = _vender(client, [
+        {'nome_produto': 'Ração', 'quantidade': 2, 'preco_unitario': 10.5},
+        {'nome_produto': 'Ração', 'quantidade': 1, 'preco_unitario': 10.5},
+        {'nome_produto': 'Anzol', 'quantidade': 3, 'preco_unitario': 0.35},
+    ], 'Pix')
+    _vender(client, [{'nome_produto': 'Anzol', 'quantidade': 1, 'preco_unitario': 0.35}], None)
+    # Um segundo pedido de finalização não soma a venda de novo
+    client.put(f"/api/vendas/{primeira['id']}/finalizar", json={})
+    # Venda aberta fica de fora
+    venda_aberta = client.post('/api/vendas').get_json()['id']
+    client.post(f'/api/vendas/{venda_aberta}/itens', json={'nome_produto': 'Anzol', 'preco_unitario': 1})
+
+    dia = primeira['data_venda'][:10]
+    incremental = _resumo(app)
+    assert incremental == {
+        ('dia', dia): (2, 7.0, 3290),
+        ('mes', dia[:7]): (2, 7.0, 3290),
+        ('forma_pagamento', 'Pix'): (1, 6.0, 3255),
+        ('forma_pagamento', 'Não informado'): (1, 1.0, 35),
+        ('produto', 'Ração'): (1, 3.0, 3150),
+        ('produto', 'Anzol'): (2, 4.0, 140),
+    }
+
+    resultado = app.test_cli_runner().invoke(args=['relatorio', 'reconstruir'])
+    assert resultado.exit_code == 0, resultado.output
+    assert _resumo(app) == incremental
+
+    relatorio = client.get('/api/relatorios/vendas?agrupar=produto').get_json()
+    assert [linha['chave'] for linha in relatorio] == ['Ração', 'Anzol']
+    assert relatorio[0]['total'] == 31.5
+
+def test_corrigir_totais_corrige_o_resumo(app, client):
+    venda = _vender(client, [
+        {'nome_produto': 'Ração', 'quantidade': 2, 'preco_unitario': 10.5},
+        {'nome_produto': 'Anzol', 'quantidade': 3, 'preco_unitario': 0.35},
+    ], 'Pix')
+    correto = _resumo(app)
+
+    # Subtotal gravado errado (como antes do cálculo em centavos), já somado ao resumo
+    with app.app_context():
+        item = ItemVenda.query.filter_by(venda_id=venda['id'], nome_produto='Ração').one()
+        item.subtotal = 20.99
+        db.session.get(Venda, venda['id']).total = 22.04
+        db.session.commit()
+    runner = app.test_cli_runner()
+    assert runner.invoke(args=['relatorio', 'reconstruir']).exit_code == 0
+    assert _resumo(app)[('produto', 'Ração')] == (1, 2.0, 2099)
+
+    resultado = runner.invoke(args=['venda', 'verificar-totais', '--corrigir'])
+    assert resultado.exit_code == 0, resultado.output
+    assert _resumo(app) == correto
+    assert client.get(f"/api/vendas/{venda['id']}").get_json()['total'] == 22.05
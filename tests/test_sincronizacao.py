@@ -0,0 +1,103 @@
+import uuid
+from src.models.user import db
+from src.models.venda import Venda
+from src.models.venda_aberta import VendaAberta
+
+TERMINAL = {'X-Terminal': 'caixa-1'}
+ITEM = {'nome_produto': 'Arroz', 'quantidade': 2, 'preco_unitario': 25}
+
+def _abrir_venda(client, chave):
+    venda = client.post('/api/vendas', headers=TERMINAL, json={'uuid': chave}).get_json()
+    client.post(f"/api/vendas/{venda['id']}/itens", headers=TERMINAL, json=ITEM)
+    return venda
+
+def _sincronizar(client, chave, venda_aberta_id=None):
+    venda = {'uuid': chave, 'venda_aberta_id': venda_aberta_id, 'itens': [ITEM]}
+    resposta = client.post('/api/vendas/sincronizar', headers=TERMINAL, json={'vendas': [venda]})
+    assert resposta.status_code == 200
+    return resposta.get_json()['vendas'][0]
+
+def _finalizadas(app):
+    with app.app_context():
+        return db.session.scalar(db.select(db.func.count()).select_from(Venda).where(Venda.finalizada == True))
+
+def test_resposta_perdida_nao_conta_a_venda_duas_vezes(app, client):
+    chave = str(uuid.uuid4())
+    venda = _abrir_venda(client, chave)
+    assert venda['uuid'] == chave
+    assert client.put(f"/api/vendas/{venda['id']}/finalizar", headers=TERMINAL, json={'uuid': chave}).status_code == 200
+
+    # O caixa não recebeu a resposta, guardou a venda e sincronizou depois
+    sincronizada = _sincronizar(client, chave, venda['id'])
+    assert sincronizada == {'uuid': chave, 'id': venda['id'], 'duplicada': True}
+    assert _finalizadas(app) == 1
+
+def test_uuid_da_abertura_vale_sem_uuid_na_finalizacao(app, client):
+    chave = str(uuid.uuid4())
+    venda_id = client.get(f'/api/vendas/atual?uuid={chave}', headers=TERMINAL).get_json()['id']
+    client.post(f'/api/vendas/{venda_id}/itens', headers=TERMINAL, json=ITEM)
+    assert client.put(f'/api/vendas/{venda_id}/finalizar', headers=TERMINAL, json={}).status_code == 200
+
+    assert _sincronizar(client, chave)['duplicada'] is True
+    assert _finalizadas(app) == 1
+
+def test_venda_abandonada_no_servidor_e_apagada(app, client):
+    chave = str(uuid.uuid4())
+    venda = _abrir_venda(client, chave)
+
+    # A finalização não chegou: a venda seguiu no caixa e foi enviada pela sincronização
+    sincronizada = _sincronizar(client, chave, venda['id'])
+    assert sincronizada['duplicada'] is False
+    assert sincronizada['id'] != venda['id']
+    with app.app_context():
+        assert db.session.get(Venda, venda['id']) is None
+        assert db.session.get(VendaAberta, 'caixa-1') is None
+    assert _finalizadas(app) == 1
+    assert client.get('/api/vendas/atual', headers=TERMINAL).get_json()['id'] != venda['id']
+
+def test_finalizar_depois_da_sincronizacao_devolve_a_venda_recebida(app, client):
+    chave = str(uuid.uuid4())
+    venda = _abrir_venda(client, chave)
+    sincronizada = _sincronizar(client, chave)
+
+    resposta = client.put(f"/api/vendas/{venda['id']}/finalizar", headers=TERMINAL, json={'uuid': chave})
+    assert resposta.status_code == 200
+    assert resposta.get_json()['id'] == sincronizada['id']
+    assert _finalizadas(app) == 1
+
+def test_uuid_invalido(client):
+    assert client.post('/api/vendas', headers=TERMINAL, json={'uuid': 'abc'}).status_code == 400
+    venda = _abrir_venda(client, str(uuid.uuid4()))
+    resposta = client.put(f"/api/vendas/{venda['id']}/finalizar", headers=TERMINAL, json={'uuid': 'abc'})
+    assert resposta.status_code == 400
+    assert resposta.get_json()['erro'] == 'uuid inválido'
+
+def test_outro_terminal_nao_apaga_a_venda_aberta(app, client):
+    venda_a = _abrir_venda(client, str(uuid.uuid4()))
+
+    # Caixa 2 manda o id da venda aberta do caixa 1 (id velho ou errado)
+    venda = {'uuid': str(uuid.uuid4()), 'venda_aberta_id': venda_a['id'], 'itens': [ITEM]}
+    resposta = client.post('/api/vendas/sincronizar', headers={'X-Terminal': 'caixa-2'}, json={'vendas': [venda]})
+    assert resposta.status_code == 200
+    assert resposta.get_json()['vendas'][0]['duplicada'] is False
+
+    with app.app_context():
+        assert db.session.get(Venda, venda_a['id']).itens
+        assert db.session.get(VendaAberta, 'caixa-1').venda_id == venda_a['id']
+    assert client.get('/api/vendas/atual', headers=TERMINAL).get_json()['id'] == venda_a['id']
+
+def test_venda_invalida_nao_barra_o_lote(app, client):
+    valida = str(uuid.uuid4())
+    vendas = [
+        {'uuid': str(uuid.uuid4()), 'itens': []},
+        {'uuid': valida, 'itens': [ITEM]},
+        {'uuid': 'abc', 'itens': [ITEM]},
+    ]
+    resposta = client.post('/api/vendas/sincronizar', headers=TERMINAL, json={'vendas': vendas})
+    assert resposta.status_code == 200
+
+    primeira, segunda, terceira = resposta.get_json()['vendas']
+    assert primeira['id'] is None and primeira['erro'] == 'Venda 1: não é possível finalizar uma venda sem itens'
+    assert segunda['uuid'] == valida and segunda['duplicada'] is False
+    assert terceira == {'uuid': 'abc', 'id': None, 'erro': 'Venda 3: uuid inválido'}
+    assert _finalizadas(app) == 1
@@ -0,0 +1,44 @@
+import pytest
+from conftest import semear_vendas
+
+def test_ticket_em_texto_respeita_as_colunas(app, client):
+    venda_id, = semear_vendas(app, 1)
+    resposta = client.get(f'/api/vendas/{venda_id}/ticket/impressora?colunas=42')
+    assert resposta.status_code == 200
+    assert resposta.mimetype == 'text/plain'
+
+    texto = resposta.get_data(as_text=True)
+    assert f'Venda #{venda_id}' in texto
+    assert 'TOTAL:' in texto
+    assert max(len(linha) for linha in texto.splitlines()) == 42
+
+@pytest.mark.parametrize('colunas', [48, 42])
+def test_ticket_escpos_usa_a_fonte_a_na_largura_pedida(app, client, colunas):
+    venda_id, = semear_vendas(app, 1)
+    resposta = client.get(f'/api/vendas/{venda_id}/ticket/impressora?formato=escpos&colunas={colunas}')
+    assert resposta.status_code == 200
+    assert resposta.data.startswith(b'\x1b@\x1bt\x03\x1bM\x00\x1ba\x01\x1bE\x01TICKET DE VENDA')
+    assert resposta.data.endswith(b'\x1dVB\x03')
+    # Fonte A nas duas larguras: nenhuma troca para a fonte B no meio do ticket
+    assert b'\x1bM\x01' not in resposta.data
+
+    texto = resposta.data.replace(b'\x1ba\x01', b'').replace(b'\x1ba\x00', b'')
+    texto = texto.replace(b'\x1bE\x01', b'').replace(b'\x1bE\x00', b'')
+    linhas = texto[len(b'\x1b@\x1bt\x03\x1bM\x00'):-len(b'\x1dVB\x03')].split(b'\n')
+    assert b'=' * colunas in linhas
+    assert max(len(linha) for linha in linhas) == colunas
+
+def test_pdf_continua_na_rota_do_ticket(app, client):
+    venda_id, = semear_vendas(app, 1)
+    resposta = client.get(f'/api/vendas/{venda_id}/ticket')
+    assert resposta.status_code == 200
+    assert resposta.data.startswith(b'%PDF')
+
+@pytest.mark.parametrize('consulta', ['formato=html', 'colunas=40'])
+def test_parametros_invalidos(app, client, consulta):
+    venda_id, = semear_vendas(app, 1)
+    assert client.get(f'/api/vendas/{venda_id}/ticket/impressora?{consulta}').status_code == 400
+
+def test_venda_aberta_nao_tem_ticket(app, client):
+    venda_id = client.post('/api/vendas').get_json()['id']
+    assert client.get(f'/api/vendas/{venda_id}/ticket/impressora').status_code == 400
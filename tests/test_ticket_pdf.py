@@ -0,0 +1,85 @@
+import threading
+import pytest
+from src.models.user import db
+from src.models.venda import Venda, ItemVenda
+from src.routes import ticket
+from conftest import semear_vendas
+
+@pytest.fixture(autouse=True)
+def cache_vazio(monkeypatch):
+    # Os ids se repetem entre os bancos dos testes: o cache do processo não vale entre eles
+    monkeypatch.setattr(ticket, '_cache', ticket.CacheTickets(ticket.CACHE_BYTES_PADRAO))
+
+def test_ticket_montado_no_pool_de_processos(app, client):
+    venda_id, = semear_vendas(app, 1)
+    resposta = client.get(f'/api/vendas/{venda_id}/ticket')
+    assert resposta.status_code == 200
+    assert resposta.data.startswith(b'%PDF')
+    assert 'ticket' in ticket._pools
+
+def test_fila_cheia_devolve_503(app, client, monkeypatch):
+    venda_id, = semear_vendas(app, 1)
+    vagas = threading.BoundedSemaphore(1)
+    vagas.acquire()
+    monkeypatch.setattr(ticket, '_vagas_renderizacao', vagas)
+
+    resposta = client.get(f'/api/vendas/{venda_id}/ticket')
+    assert resposta.status_code == 503
+    assert resposta.headers['Retry-After'] == '2'
+
+@pytest.fixture
+def renderizacoes(monkeypatch):
+    """Contar as vezes que um PDF é realmente montado"""
+    contagem = []
+    original = ticket.renderizar_limitado
+    def contar(venda, loja=None):
+        contagem.append(venda.id)
+        return original(venda, loja)
+    monkeypatch.setattr(ticket, 'renderizar_limitado', contar)
+    return contagem
+
+def test_reimpressao_sai_do_cache(app, client, renderizacoes):
+    venda_id, = semear_vendas(app, 1)
+    primeira = client.get(f'/api/vendas/{venda_id}/ticket')
+    segunda = client.get(f'/api/vendas/{venda_id}/ticket')
+    assert primeira.status_code == segunda.status_code == 200
+    assert segunda.data == primeira.data
+    assert renderizacoes == [venda_id]
+
+def test_etag_igual_responde_304(app, client, renderizacoes):
+    venda_id, = semear_vendas(app, 1)
+    etag = client.get(f'/api/vendas/{venda_id}/ticket').get_etag()[0]
+
+    resposta = client.get(f'/api/vendas/{venda_id}/ticket', headers={'If-None-Match': f'"{etag}"'})
+    assert resposta.status_code == 304
+    assert resposta.data == b''
+    assert resposta.get_etag()[0] == etag
+    assert renderizacoes == [venda_id]
+
+def test_venda_corrigida_muda_o_etag(app, client, renderizacoes):
+    venda_id, = semear_vendas(app, 1)
+    etag = client.get(f'/api/vendas/{venda_id}/ticket').get_etag()[0]
+
+    with app.app_context():
+        db.session.execute(db.update(ItemVenda).where(ItemVenda.venda_id == venda_id).values(subtotal=3.0))
+        db.session.execute(db.update(Venda).where(Venda.id == venda_id).values(total=9.0))
+        db.session.commit()
+
+    resposta = client.get(f'/api/vendas/{venda_id}/ticket', headers={'If-None-Match': f'"{etag}"'})
+    assert resposta.status_code == 200
+    assert resposta.get_etag()[0] != etag
+    assert renderizacoes == [venda_id, venda_id]
+
+def test_cache_descarta_o_menos_usado():
+    cache = ticket.CacheTickets(10)
+    cache.guardar('a', b'1234')
+    cache.guardar('b', b'1234')
+    assert cache.obter('a') == b'1234'
+    # Não cabe: sai 'b', o menos usado desde a leitura de 'a'
+    cache.guardar('c', b'1234')
+    assert cache.obter('b') is None
+    assert cache.obter('a') == cache.obter('c') == b'1234'
+    assert cache.tamanho == 8
+    # Maior que o limite inteiro: nem entra
+    cache.guardar('d', b'x' * 11)
+    assert cache.obter('d') is None and cache.tamanho == 8
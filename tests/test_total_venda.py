@@ -0,0 +1,42 @@
+import threading
+from src.models.user import db
+from src.models.venda import Venda, ItemVenda
+
+def _soma_itens(app, venda_id):
+    with app.app_context():
+        return sum(item.subtotal for item in ItemVenda.query.filter_by(venda_id=venda_id)), db.session.get(Venda, venda_id).total
+
+def test_total_acompanha_os_itens_com_pedidos_simultaneos(app, client):
+    venda_id = client.post('/api/vendas').get_json()['id']
+    status = []
+
+    def adicionar():
+        resposta = app.test_client().post(f'/api/vendas/{venda_id}/itens', json={
+            'nome_produto': 'Anzol', 'quantidade': 1, 'preco_unitario': 1
+        })
+        status.append(resposta.status_code)
+
+    threads = [threading.Thread(target=adicionar) for _ in range(40)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert status.count(201) == 40
+    soma, total = _soma_itens(app, venda_id)
+    assert total == soma == 40.0
+
+def test_total_em_centavos_exatos_ao_alterar_e_remover(app, client):
+    venda_id = client.post('/api/vendas').get_json()['id']
+    venda = client.post(f'/api/vendas/{venda_id}/itens/lote', json=[
+        {'nome_produto': 'Ração', 'quantidade': 3, 'preco_unitario': 0.1},
+        {'nome_produto': 'Alpiste', 'quantidade': 1, 'preco_unitario': 12.35},
+    ]).get_json()
+    assert venda['total'] == 12.65
+
+    item_id = venda['itens'][0]['id']
+    assert client.put(f'/api/vendas/{venda_id}/itens/{item_id}', json={'quantidade': 7}).get_json()['total'] == 13.05
+    assert client.delete(f'/api/vendas/{venda_id}/itens/{item_id}').get_json()['total'] == 12.35
+
+    soma, total = _soma_itens(app, venda_id)
+    assert total == soma == 12.35
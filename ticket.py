@@ -1,133 +1,644 @@
-from flask import Blueprint, request, jsonify, make_response
+import click
+from flask import Blueprint, request, jsonify, make_response, current_app, send_file
+from sqlalchemy.orm import selectinload
 from src.models.venda import Venda, ItemVenda
 from src.models.user import db
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from datetime import datetime
+from src.routes.metricas import medir_pdf
+from src.routes.loja import obter_loja
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from xml.sax.saxutils import escape
+import multiprocessing
+import threading
+import tempfile
+import time
+import zipfile
+import hashlib
+import uuid
+import json
+import os
+import re
 import io
 
 ticket_bp = Blueprint('ticket', __name__)
 
-@ticket_bp.route('/vendas/<int:venda_id>/ticket', methods=['GET'])
-def gerar_ticket(venda_id):
-    """Gerar ticket da venda em PDF"""
-    try:
-        venda = Venda.query.get_or_404(venda_id)
-        
-        if not venda.finalizada:
-            return jsonify({'erro': 'Só é possível gerar ticket de vendas finalizadas'}), 400
-        
-        # Criar PDF em memória
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch)
-        
-        # Estilos
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
+# Versão do layout do ticket: altere ao mudar o PDF para invalidar caches e ETags
+VERSAO_TEMPLATE = 1
+
+# Limite padrão do cache de PDFs em memória (pode ser alterado por TICKET_CACHE_BYTES)
+CACHE_BYTES_PADRAO = 32 * 1024 * 1024
+
+# Tickets renderizados ao mesmo tempo pelas requisições e quantos podem esperar na fila
+RENDERIZACOES_PADRAO = 2
+FILA_RENDERIZACAO_PADRAO = 8
+
+# O ReportLab só é importado no primeiro PDF (ver _layout): a subida do worker não paga por ele
+
+def _criar_estilos():
+    """Montar uma única vez os estilos usados no ticket"""
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib import colors
+
+    base = getSampleStyleSheet()
+    return {
+        'titulo': ParagraphStyle(
             'CustomTitle',
-            parent=styles['Heading1'],
+            parent=base['Heading1'],
             fontSize=18,
             spaceAfter=30,
             alignment=1,  # Centralizado
             textColor=colors.darkgreen
-        )
-        
-        header_style = ParagraphStyle(
+        ),
+        'cabecalho': ParagraphStyle(
             'CustomHeader',
-            parent=styles['Heading2'],
+            parent=base['Heading2'],
             fontSize=14,
             spaceAfter=12,
             textColor=colors.darkblue
-        )
-        
-        normal_style = styles['Normal']
-        normal_style.fontSize = 11
-        
-        # Conteúdo do PDF
-        story = []
-        
-        # Título
-        story.append(Paragraph("🛒 TICKET DE VENDA", title_style))
-        story.append(Spacer(1, 20))
-        
-        # Informações da venda
-        data_formatada = venda.data_venda.strftime("%d/%m/%Y às %H:%M")
-        story.append(Paragraph(f"<b>Venda #{venda.id}</b>", header_style))
-        story.append(Paragraph(f"Data: {data_formatada}", normal_style))
-        story.append(Spacer(1, 20))
-        
-        # Tabela de produtos
-        story.append(Paragraph("Produtos:", header_style))
-        
-        # Dados da tabela
-        data = [['Produto', 'Qtd', 'Preço Unit.', 'Subtotal']]
-        
-        for item in venda.itens:
-            data.append([
-                item.nome_produto,
-                f"{item.quantidade:.1f}",
-                f"R$ {item.preco_unitario:.2f}",
-                f"R$ {item.subtotal:.2f}"
-            ])
-        
-        # Criar tabela
-        table = Table(data, colWidths=[3*inch, 0.8*inch, 1.2*inch, 1.2*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.darkgreen),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 10),
-            ('ALIGN', (1, 1), (-1, -1), 'CENTER'),  # Alinhar números ao centro
-        ]))
-        
-        story.append(table)
-        story.append(Spacer(1, 30))
-        
-        # Total
-        total_style = ParagraphStyle(
+        ),
+        # Cópia do estilo Normal, sem alterar a folha de estilos compartilhada
+        'normal': ParagraphStyle(
+            'TicketNormal',
+            parent=base['Normal'],
+            fontSize=11
+        ),
+        'total': ParagraphStyle(
             'Total',
-            parent=styles['Normal'],
+            parent=base['Normal'],
             fontSize=16,
             alignment=1,  # Centralizado
             textColor=colors.darkgreen,
             spaceAfter=20
-        )
-        
-        story.append(Paragraph(f"<b>TOTAL: R$ {venda.total:.2f}</b>", total_style))
-        story.append(Spacer(1, 30))
-        
-        # Rodapé
-        footer_style = ParagraphStyle(
+        ),
+        'rodape': ParagraphStyle(
             'Footer',
-            parent=styles['Normal'],
+            parent=base['Normal'],
             fontSize=10,
             alignment=1,  # Centralizado
             textColor=colors.grey
         )
-        
-        story.append(Paragraph("Obrigado pela preferência!", footer_style))
-        story.append(Paragraph("Volte sempre!", footer_style))
-        
-        # Gerar PDF
-        doc.build(story)
-        
+    }
+
+def _criar_estilo_tabela():
+    from reportlab.platypus import TableStyle
+    from reportlab.lib import colors
+
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.darkgreen),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 10),
+        ('ALIGN', (1, 1), (-1, -1), 'CENTER'),  # Alinhar números ao centro
+    ])
+
+_layout_ticket = None
+
+def _layout():
+    """Estilos e larguras do ticket, montados no primeiro PDF do processo"""
+    global _layout_ticket
+    if _layout_ticket is None:
+        from reportlab.lib.units import inch
+        _layout_ticket = SimpleNamespace(
+            estilos=_criar_estilos(),
+            larguras=[3*inch, 0.8*inch, 1.2*inch, 1.2*inch],
+            estilo_tabela=_criar_estilo_tabela()
+        )
+    return _layout_ticket
+
+def _novo_documento(buffer):
+    from reportlab.platypus import SimpleDocTemplate
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
+    return SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch)
+
+class CacheTickets:
+    """Cache LRU de PDFs já gerados, limitado pelo total de bytes"""
+
+    def __init__(self, limite_bytes):
+        self.limite_bytes = limite_bytes
+        self.tamanho = 0
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, chave):
+        with self._lock:
+            pdf = self._itens.get(chave)
+            if pdf is not None:
+                self._itens.move_to_end(chave)
+            return pdf
+
+    def guardar(self, chave, pdf):
+        if len(pdf) > self.limite_bytes:
+            return
+        with self._lock:
+            antigo = self._itens.pop(chave, None)
+            if antigo is not None:
+                self.tamanho -= len(antigo)
+            self._itens[chave] = pdf
+            self.tamanho += len(pdf)
+            # Descartar os menos usados até caber no limite
+            while self.tamanho > self.limite_bytes:
+                _, removido = self._itens.popitem(last=False)
+                self.tamanho -= len(removido)
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self.tamanho = 0
+
+_cache = None
+
+def obter_cache():
+    """Cache do processo, criado no primeiro uso com o limite configurado no app"""
+    global _cache
+    if _cache is None:
+        _cache = CacheTickets(current_app.config.get('TICKET_CACHE_BYTES', CACHE_BYTES_PADRAO))
+    return _cache
+
+def montar_story(venda, loja=None):
+    """Conteúdo do ticket de uma venda como lista de flowables
+
+    loja é o dicionário de obter_loja(); sem ele o ticket sai sem cabeçalho da loja.
+    """
+    from reportlab.platypus import Paragraph, Spacer, Table
+
+    layout = _layout()
+    estilos = layout.estilos
+    story = []
+
+    # Título
+    story.append(Paragraph("🛒 TICKET DE VENDA", estilos['titulo']))
+    if loja:
+        story.append(Paragraph(f"<b>{escape(loja['nome'])}</b>", estilos['normal']))
+        story.append(Paragraph(escape(loja['endereco']), estilos['normal']))
+        story.append(Paragraph(f"Tel: {escape(loja['telefone'])}", estilos['normal']))
+    story.append(Spacer(1, 20))
+
+    # Informações da venda
+    data_formatada = venda.data_venda.strftime("%d/%m/%Y às %H:%M")
+    story.append(Paragraph(f"<b>Venda #{venda.id}</b>", estilos['cabecalho']))
+    story.append(Paragraph(f"Data: {data_formatada}", estilos['normal']))
+    story.append(Spacer(1, 20))
+
+    # Tabela de produtos
+    story.append(Paragraph("Produtos:", estilos['cabecalho']))
+
+    data = [['Produto', 'Qtd', 'Preço Unit.', 'Subtotal']]
+    for item in venda.itens:
+        data.append([
+            item.nome_produto,
+            f"{item.quantidade:.1f}",
+            f"R$ {item.preco_unitario:.2f}",
+            f"R$ {item.subtotal:.2f}"
+        ])
+
+    table = Table(data, colWidths=layout.larguras)
+    table.setStyle(layout.estilo_tabela)
+
+    story.append(table)
+    story.append(Spacer(1, 30))
+
+    # Total
+    story.append(Paragraph(f"<b>TOTAL: R$ {venda.total:.2f}</b>", estilos['total']))
+    story.append(Spacer(1, 30))
+
+    # Rodapé
+    story.append(Paragraph("Obrigado pela preferência!", estilos['rodape']))
+    story.append(Paragraph("Volte sempre!", estilos['rodape']))
+
+    return story
+
+def renderizar_pdf(venda, loja=None):
+    """Gerar o PDF do ticket em memória e devolver os bytes"""
+    buffer = io.BytesIO()
+    doc = _novo_documento(buffer)
+    doc.build(montar_story(venda, loja))
+    return buffer.getvalue()
+
+_pools = {}
+_pool_lock = threading.Lock()
+
+def _obter_pool(processos=None, nome='lote'):
+    """Pool de processos compartilhado para renderizar tickets fora do worker Flask
+
+    Os processos saem do forkserver e não de um fork do worker: um fork
+    copiaria locks seguros por outras threads (sessão do banco, logging) e
+    o filho poderia travar para sempre.
+    """
+    with _pool_lock:
+        pool = _pools.get(nome)
+        if pool is None:
+            pool = _pools[nome] = ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context('forkserver'))
+        return pool
+
+def _descartar_pool(pool):
+    """Esquecer um pool quebrado (processo filho morto) para o próximo uso criar outro"""
+    with _pool_lock:
+        for nome, atual in list(_pools.items()):
+            if atual is pool:
+                del _pools[nome]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+_vagas_renderizacao = None
+_renderizador_lock = threading.Lock()
+
+def renderizar_limitado(venda, loja=None):
+    """Renderizar no pool de processos dos tickets; None quando a fila está cheia
+
+    O ReportLab é Python puro e segura o GIL enquanto monta o PDF: numa thread
+    do worker ele atrasaria as outras requisições (finalizações de venda). Em
+    processos à parte, TICKET_RENDERIZACOES tickets são montados ao mesmo tempo
+    e no máximo TICKET_FILA esperam. venda deve vir de _copiar_venda, que pode
+    ser enviada ao outro processo.
+    """
+    global _vagas_renderizacao
+    config = current_app.config
+    renderizacoes = config.get('TICKET_RENDERIZACOES', RENDERIZACOES_PADRAO)
+    if _vagas_renderizacao is None:
+        with _renderizador_lock:
+            if _vagas_renderizacao is None:
+                _vagas_renderizacao = threading.BoundedSemaphore(
+                    renderizacoes + config.get('TICKET_FILA', FILA_RENDERIZACAO_PADRAO)
+                )
+
+    if not _vagas_renderizacao.acquire(blocking=False):
+        return None
+    try:
+        # Pool separado do da exportação em lote: um lote grande não atrasa a reimpressão
+        pool = _obter_pool(renderizacoes, 'ticket')
+        try:
+            return pool.submit(_renderizar_venda, venda, loja).result()[1]
+        except BrokenProcessPool:
+            _descartar_pool(pool)
+            raise
+    finally:
+        _vagas_renderizacao.release()
+
+def assinatura_venda(venda):
+    """Hash dos dados impressos no ticket: muda se a venda for corrigida (ex.: verificar-totais --corrigir)"""
+    dados = (venda.data_venda, venda.total, [
+        (item.nome_produto, item.quantidade, item.preco_unitario, item.subtotal) for item in venda.itens
+    ])
+    return hashlib.sha256(repr(dados).encode()).hexdigest()[:12]
+
+def chave_ticket(venda, versao_loja):
+    """Chave do cache: o PDF muda com os dados da venda, o layout e os dados da loja"""
+    return (venda.id, assinatura_venda(venda), VERSAO_TEMPLATE, versao_loja)
+
+def etag_ticket(venda, versao_loja):
+    """ETag estável enquanto a venda, o layout e os dados da loja não mudarem"""
+    return f'ticket-{venda.id}-{assinatura_venda(venda)}-v{VERSAO_TEMPLATE}-l{versao_loja}'
+
+@ticket_bp.route('/vendas/<int:venda_id>/ticket', methods=['GET'])
+def gerar_ticket(venda_id):
+    """Gerar ticket da venda em PDF (reimpressões saem do cache)"""
+    try:
+        venda = Venda.query.get_or_404(venda_id)
+
+        if not venda.finalizada:
+            return jsonify({'erro': 'Só é possível gerar ticket de vendas finalizadas'}), 400
+
+        loja, versao_loja = obter_loja()
+        copia = _copiar_venda(venda)
+        etag = etag_ticket(copia, versao_loja)
+        if request.if_none_match.contains(etag):
+            response = make_response('', 304)
+            response.set_etag(etag)
+            return response
+
+        cache = obter_cache()
+        chave = chave_ticket(copia, versao_loja)
+        pdf = cache.obter(chave)
+        if pdf is None:
+            with medir_pdf('ticket'):
+                pdf = renderizar_limitado(copia, loja)
+            if pdf is None:
+                return jsonify({'erro': 'Muitos tickets sendo gerados, tente novamente'}), 503, {'Retry-After': '2'}
+            cache.guardar(chave, pdf)
+
         # Preparar resposta
-        buffer.seek(0)
-        response = make_response(buffer.getvalue())
+        response = make_response(pdf)
         response.headers['Content-Type'] = 'application/pdf'
         response.headers['Content-Disposition'] = f'attachment; filename=ticket_venda_{venda.id}.pdf'
-        
+        response.headers['Cache-Control'] = 'private, max-age=86400'
+        response.set_etag(etag)
+
         return response
-        
+
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
 
+# Exportação de tickets em lote
+
+FORMATOS_LOTE = ('pdf', 'zip')
+
+# Exportações acompanhadas ao mesmo tempo por worker; as demais esperam na fila
+LOTES_SIMULTANEOS = 2
+
+# Arquivos de lote mais antigos que isso são apagados (pode ser alterado por TICKET_LOTE_VALIDADE)
+VALIDADE_LOTE_SEGUNDOS = 24 * 60 * 60
+
+# Lote sem nenhum progresso gravado nesse intervalo é dado como interrompido
+LOTE_SEM_PROGRESSO_SEGUNDOS = 10 * 60
+
+_lotes = None
+
+def _executor_lotes():
+    global _lotes
+    with _pool_lock:
+        if _lotes is None:
+            _lotes = ThreadPoolExecutor(max_workers=LOTES_SIMULTANEOS, thread_name_prefix='lote')
+        return _lotes
+
+def _copiar_venda(venda):
+    """Cópia simples dos dados do ticket, que pode ser enviada a outro processo"""
+    return SimpleNamespace(
+        id=venda.id,
+        data_venda=venda.data_venda,
+        total=venda.total,
+        itens=[SimpleNamespace(
+            nome_produto=item.nome_produto,
+            quantidade=item.quantidade,
+            preco_unitario=item.preco_unitario,
+            subtotal=item.subtotal
+        ) for item in venda.itens]
+    )
+
+def _renderizar_venda(venda, loja):
+    """Executado no processo filho: PDF de uma venda"""
+    return venda.id, renderizar_pdf(venda, loja)
+
+def _renderizar_combinado(vendas, loja):
+    """Executado no processo filho: um PDF com um ticket por página"""
+    from reportlab.platypus import PageBreak
+
+    story = []
+    for venda in vendas:
+        if story:
+            story.append(PageBreak())
+        story.extend(montar_story(venda, loja))
+    buffer = io.BytesIO()
+    doc = _novo_documento(buffer)
+    doc.build(story)
+    return buffer.getvalue()
+
+def buscar_vendas_lote(ids=None, de=None, ate=None):
+    """Vendas finalizadas por lista de ids ou período, com os itens carregados"""
+    query = Venda.query.filter_by(finalizada=True).options(selectinload(Venda.itens))
+    if ids:
+        query = query.filter(Venda.id.in_(ids))
+    if de:
+        query = query.filter(Venda.data_venda >= de)
+    if ate:
+        query = query.filter(Venda.data_venda < ate + timedelta(days=1))
+    return [_copiar_venda(venda) for venda in query.order_by(Venda.data_venda, Venda.id)]
+
+def _pasta_lotes():
+    pasta = current_app.config.get('TICKET_LOTE_DIR') or os.path.join(tempfile.gettempdir(), 'tickets_lote')
+    os.makedirs(pasta, exist_ok=True)
+    return pasta
+
+_status_lock = threading.Lock()
+
+def _gravar_status(pasta, lote, **alteracoes):
+    """Aplicar as alterações ao status do lote e gravá-lo em disco para que qualquer worker possa consultá-lo
+
+    Devolve uma cópia: o dicionário original continua sendo alterado pela thread do lote.
+    """
+    with _status_lock:
+        lote.update(alteracoes)
+        copia = dict(lote)
+    caminho = os.path.join(pasta, f"{copia['id']}.json")
+    temporario = f'{caminho}.{threading.get_ident()}.tmp'
+    with open(temporario, 'w') as arquivo:
+        json.dump(copia, arquivo)
+    os.replace(temporario, caminho)
+    return copia
+
+def _ler_status(pasta, lote_id):
+    caminho = os.path.join(pasta, f'{lote_id}.json')
+    try:
+        with open(caminho) as arquivo:
+            status = json.load(arquivo)
+        parado = time.time() - os.path.getmtime(caminho)
+    except FileNotFoundError:
+        return None
+    # O worker que acompanhava o lote morreu (reinício, OOM): não há mais quem grave o fim
+    if status['status'] in ('pendente', 'processando') and parado > LOTE_SEM_PROGRESSO_SEGUNDOS:
+        status['status'] = 'erro'
+        status['erro'] = 'Exportação interrompida'
+    return status
+
+def _limpar_lotes(pasta, validade):
+    """Apagar status e arquivos de lotes mais antigos que validade (segundos)"""
+    limite = time.time() - validade
+    for entrada in os.scandir(pasta):
+        try:
+            if entrada.is_file() and entrada.stat().st_mtime < limite:
+                os.remove(entrada.path)
+        except FileNotFoundError:
+            pass
+
+def exportar_lote(vendas, formato, destino, cache=None, processos=None, progresso=None, loja=None, versao_loja=0):
+    """Renderizar os tickets no pool de processos e gravar o PDF único ou o ZIP em destino
+
+    loja e versao_loja vêm de obter_loja(), lido uma vez para o lote inteiro.
+    """
+    pool = _obter_pool(processos)
+    try:
+        _exportar_no_pool(pool, vendas, formato, destino, cache, progresso, loja, versao_loja)
+    except BrokenProcessPool:
+        # Um processo filho morreu: o pool não aceita mais tarefas
+        _descartar_pool(pool)
+        raise
+
+def _exportar_no_pool(pool, vendas, formato, destino, cache, progresso, loja, versao_loja):
+    if formato == 'pdf':
+        pdf = pool.submit(_renderizar_combinado, vendas, loja).result()
+        with open(destino, 'wb') as arquivo:
+            arquivo.write(pdf)
+        if progresso:
+            progresso(len(vendas))
+        return
+
+    concluidos = 0
+    with zipfile.ZipFile(destino, 'w', zipfile.ZIP_STORED) as arquivo_zip:
+        pendentes = []
+        por_id = {venda.id: venda for venda in vendas}
+        for venda in vendas:
+            pdf = cache.obter(chave_ticket(venda, versao_loja)) if cache else None
+            if pdf is None:
+                pendentes.append(pool.submit(_renderizar_venda, venda, loja))
+                continue
+            arquivo_zip.writestr(f'ticket_venda_{venda.id}.pdf', pdf)
+            concluidos += 1
+
+        if progresso:
+            progresso(concluidos)
+
+        # Cada PDF entra no ZIP assim que fica pronto
+        for futuro in as_completed(pendentes):
+            venda_id, pdf = futuro.result()
+            arquivo_zip.writestr(f'ticket_venda_{venda_id}.pdf', pdf)
+            if cache:
+                cache.guardar(chave_ticket(por_id[venda_id], versao_loja), pdf)
+            concluidos += 1
+            if progresso:
+                progresso(concluidos)
+
+def _executar_lote(status, vendas, pasta, cache, processos, loja, versao_loja):
+    """Executado em _executor_lotes: acompanha a exportação e atualiza o status em disco
+
+    Erros não são tratados aqui, e sim em _ao_terminar_lote.
+    """
+    def progresso(concluidos):
+        _gravar_status(pasta, status, concluidos=concluidos)
+
+    _gravar_status(pasta, status, status='processando')
+    destino = os.path.join(pasta, f"{status['id']}.{status['formato']}")
+    exportar_lote(vendas, status['formato'], destino, cache, processos, progresso, loja, versao_loja)
+    _gravar_status(pasta, status, status='concluido')
+
+def _ao_terminar_lote(status, pasta):
+    """Callback do futuro do lote: grava o erro que interrompeu a exportação"""
+    def terminar(futuro):
+        erro = None if futuro.cancelled() else futuro.exception()
+        if not futuro.cancelled() and erro is None:
+            return
+        if isinstance(erro, BrokenProcessPool):
+            mensagem = 'Processo de renderização encerrado inesperadamente'
+        else:
+            mensagem = str(erro) if erro else 'Exportação cancelada'
+        _gravar_status(pasta, status, status='erro', erro=mensagem or type(erro).__name__)
+    return terminar
+
+def _ler_data_lote(dados, nome):
+    valor = dados.get(nome)
+    if not valor:
+        return None
+    try:
+        return datetime.strptime(valor, '%Y-%m-%d')
+    except ValueError:
+        raise ValueError(f"Data inválida em '{nome}', use AAAA-MM-DD")
+
+@ticket_bp.route('/tickets/lote', methods=['POST'])
+def criar_lote_tickets():
+    """Iniciar a exportação de tickets por período ou lista de ids"""
+    try:
+        dados = request.get_json() or {}
+        formato = dados.get('formato', 'pdf')
+        ids = dados.get('ids')
+
+        if formato not in FORMATOS_LOTE:
+            return jsonify({'erro': 'Formato deve ser pdf ou zip'}), 400
+        if ids is not None and (not isinstance(ids, list) or not all(isinstance(i, int) for i in ids)):
+            return jsonify({'erro': 'ids deve ser uma lista de números'}), 400
+
+        try:
+            de = _ler_data_lote(dados, 'de')
+            ate = _ler_data_lote(dados, 'ate')
+        except ValueError as e:
+            return jsonify({'erro': str(e)}), 400
+
+        if not ids and not de and not ate:
+            return jsonify({'erro': 'Informe ids ou um período (de/ate)'}), 400
+
+        vendas = buscar_vendas_lote(ids, de, ate)
+        if not vendas:
+            return jsonify({'erro': 'Nenhuma venda finalizada encontrada'}), 404
+
+        pasta = _pasta_lotes()
+        _limpar_lotes(pasta, current_app.config.get('TICKET_LOTE_VALIDADE', VALIDADE_LOTE_SEGUNDOS))
+        status = {
+            'id': uuid.uuid4().hex,
+            'status': 'pendente',
+            'formato': formato,
+            'total': len(vendas),
+            'concluidos': 0,
+            'erro': None,
+            'criado_em': datetime.now().isoformat()
+        }
+        resposta = _gravar_status(pasta, status)
+
+        futuro = _executor_lotes().submit(
+            _executar_lote,
+            status, vendas, pasta, obter_cache(), current_app.config.get('TICKET_PROCESSOS'), *obter_loja()
+        )
+        futuro.add_done_callback(_ao_terminar_lote(status, pasta))
+
+        return jsonify(resposta), 202, {'Location': f"{request.path}/{resposta['id']}"}
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+@ticket_bp.route('/tickets/lote/<lote_id>', methods=['GET'])
+def status_lote_tickets(lote_id):
+    """Consultar o andamento de uma exportação em lote"""
+    if not re.fullmatch(r'[0-9a-f]{32}', lote_id):
+        return jsonify({'erro': 'Lote não encontrado'}), 404
+
+    status = _ler_status(_pasta_lotes(), lote_id)
+    if not status:
+        return jsonify({'erro': 'Lote não encontrado'}), 404
+    return jsonify(status), 200
+
+@ticket_bp.route('/tickets/lote/<lote_id>/arquivo', methods=['GET'])
+def baixar_lote_tickets(lote_id):
+    """Baixar o PDF ou ZIP de uma exportação concluída"""
+    if not re.fullmatch(r'[0-9a-f]{32}', lote_id):
+        return jsonify({'erro': 'Lote não encontrado'}), 404
+
+    pasta = _pasta_lotes()
+    status = _ler_status(pasta, lote_id)
+    if not status:
+        return jsonify({'erro': 'Lote não encontrado'}), 404
+    if status['status'] != 'concluido':
+        return jsonify({'erro': 'Exportação ainda não concluída', 'status': status['status']}), 409
+
+    formato = status['formato']
+    return send_file(
+        os.path.join(pasta, f'{lote_id}.{formato}'),
+        mimetype='application/pdf' if formato == 'pdf' else 'application/zip',
+        as_attachment=True,
+        download_name=f'tickets_{lote_id}.{formato}'
+    )
+
+@ticket_bp.cli.command('exportar')
+@click.option('--de', help='Data inicial (AAAA-MM-DD)')
+@click.option('--ate', help='Data final (AAAA-MM-DD)')
+@click.option('--id', 'ids', type=int, multiple=True, help='Id de venda (pode repetir)')
+@click.option('--formato', type=click.Choice(FORMATOS_LOTE), default='pdf')
+@click.option('--saida', required=True, type=click.Path(dir_okay=False), help='Arquivo de saída')
+@click.option('--processos', type=int, help='Número de processos de renderização')
+def exportar_tickets(de, ate, ids, formato, saida, processos):
+    """Exportar tickets de várias vendas num PDF único ou num ZIP"""
+    try:
+        de = _ler_data_lote({'de': de}, 'de')
+        ate = _ler_data_lote({'ate': ate}, 'ate')
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+    if not ids and not de and not ate:
+        raise click.UsageError('Informe --id ou um período (--de/--ate)')
+
+    vendas = buscar_vendas_lote(list(ids), de, ate)
+    if not vendas:
+        raise click.ClickException('Nenhuma venda finalizada encontrada')
+
+    def progresso(concluidos):
+        click.echo(f'{concluidos}/{len(vendas)} tickets', err=True)
+
+    loja, versao_loja = obter_loja()
+    exportar_lote(
+        vendas, formato, saida, processos=processos or current_app.config.get('TICKET_PROCESSOS'),
+        progresso=progresso, loja=loja, versao_loja=versao_loja
+    )
+    click.echo(f'{len(vendas)} ticket(s) gravado(s) em {saida}')
@@ -1,56 +1,122 @@
-from flask import Blueprint, request, jsonify, make_response
-from src.models.venda import Venda, ItemVenda
-from src.models.user import db
-from datetime import datetime
-import io
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from src.models.venda import Venda
+from src.routes.loja import obter_loja
+import textwrap
 
-ticket_bp = Blueprint('ticket', __name__)
+# O ticket em PDF fica em ticket.py (blueprint 'ticket'); aqui ficam texto e ESC/POS
+ticket_impressora_bp = Blueprint('ticket_impressora', __name__)
 
-@ticket_bp.route('/vendas/<int:venda_id>/ticket', methods=['GET'])
-def gerar_ticket(venda_id):
-    """Gerar ticket da venda em formato texto"""
+# Colunas da fonte A (12 pontos por caractere) conforme a área de impressão:
+# 48 no papel de 80mm (área de 72mm) e 42 nas cabeças mais estreitas (área de ~64mm).
+# A fonte B daria ~64 colunas no papel de 80mm, então nunca é usada aqui.
+COLUNAS_SUPORTADAS = (48, 42)
+
+# Comandos ESC/POS
+ESC_INICIAR = b'\x1b@'
+ESC_PAGINA_CODIGO_860 = b'\x1bt\x03'  # Português (PC860)
+ESC_FONTE_A = b'\x1bM\x00'  # ESC M 0: a largura vem só do número de colunas
+ESC_CENTRALIZAR = b'\x1ba\x01'
+ESC_ESQUERDA = b'\x1ba\x00'
+ESC_NEGRITO = b'\x1bE\x01'
+ESC_NORMAL = b'\x1bE\x00'
+ESC_AVANCAR_E_CORTAR = b'\x1dVB\x03'
+
+def _colunas(texto_esquerda, texto_direita, colunas):
+    """Alinhar um texto à esquerda e outro à direita na mesma linha"""
+    espaco = max(colunas - len(texto_esquerda) - len(texto_direita), 1)
+    return f"{texto_esquerda}{' ' * espaco}{texto_direita}"
+
+def _linhas_ticket(venda, itens, colunas, loja=None):
+    """Gerar o ticket bloco a bloco como tuplas (estilo, linhas)"""
+    data_formatada = venda.data_venda.strftime("%d/%m/%Y às %H:%M")
+
+    yield 'titulo', ["TICKET DE VENDA"]
+    if loja:
+        yield 'loja', [
+            *textwrap.wrap(loja['nome'], colunas),
+            *textwrap.wrap(loja['endereco'], colunas),
+            f"Tel: {loja['telefone']}"
+        ]
+    yield 'normal', [
+        '=' * colunas,
+        '',
+        f"Venda #{venda.id}",
+        f"Data: {data_formatada}",
+        '',
+        "PRODUTOS:",
+        '-' * colunas
+    ]
+
+    for item in itens:
+        linhas = textwrap.wrap(item.nome_produto, colunas) or ['']
+        linhas.append(_colunas(
+            f"  {item.quantidade:.1f} x R$ {item.preco_unitario:.2f}",
+            f"R$ {item.subtotal:.2f}",
+            colunas
+        ))
+        yield 'normal', linhas
+
+    yield 'normal', ['-' * colunas]
+    yield 'total', [_colunas("TOTAL:", f"R$ {venda.total:.2f}", colunas)]
+    yield 'normal', ['=' * colunas, '']
+    yield 'rodape', ["Obrigado pela preferência!", "Volte sempre!"]
+    yield 'normal', ['', '=' * colunas]
+
+def gerar_texto(venda, itens, colunas, loja=None):
+    """Ticket em texto puro, entregue em pedaços"""
+    for estilo, linhas in _linhas_ticket(venda, itens, colunas, loja):
+        if estilo == 'titulo':
+            linhas = [f"🛒 {linha}" for linha in linhas]
+        elif estilo in ('loja', 'rodape'):
+            linhas = [linha.center(colunas).rstrip() for linha in linhas]
+        yield '\n'.join(linhas) + '\n'
+
+def gerar_escpos(venda, itens, colunas, loja=None):
+    """Ticket codificado em ESC/POS, pronto para o spool da impressora térmica"""
+    yield ESC_INICIAR + ESC_PAGINA_CODIGO_860 + ESC_FONTE_A
+
+    for estilo, linhas in _linhas_ticket(venda, itens, colunas, loja):
+        texto = ('\n'.join(linhas) + '\n').encode('cp860', errors='replace')
+        if estilo == 'titulo':
+            yield ESC_CENTRALIZAR + ESC_NEGRITO + texto + ESC_NORMAL + ESC_ESQUERDA
+        elif estilo == 'total':
+            yield ESC_NEGRITO + texto + ESC_NORMAL
+        elif estilo in ('loja', 'rodape'):
+            yield ESC_CENTRALIZAR + texto + ESC_ESQUERDA
+        else:
+            yield texto
+
+    yield ESC_AVANCAR_E_CORTAR
+
+@ticket_impressora_bp.route('/vendas/<int:venda_id>/ticket/impressora', methods=['GET'])
+def gerar_ticket_impressora(venda_id):
+    """Gerar ticket da venda em texto ou ESC/POS (formato=texto|escpos, colunas=48|42)"""
     try:
         venda = Venda.query.get_or_404(venda_id)
-        
+
         if not venda.finalizada:
             return jsonify({'erro': 'Só é possível gerar ticket de vendas finalizadas'}), 400
-        
-        # Gerar ticket em formato texto
-        data_formatada = venda.data_venda.strftime("%d/%m/%Y às %H:%M")
-        
-        ticket_content = f"""
-🛒 TICKET DE VENDA
-{'='*50}
-
-Venda #{venda.id}
-Data: {data_formatada}
-
-PRODUTOS:
-{'-'*50}
-"""
-        
-        for item in venda.itens:
-            ticket_content += f"{item.nome_produto}\n"
-            ticket_content += f"  Qtd: {item.quantidade:.1f} x R$ {item.preco_unitario:.2f} = R$ {item.subtotal:.2f}\n\n"
-        
-        ticket_content += f"""
-{'-'*50}
-TOTAL: R$ {venda.total:.2f}
-{'='*50}
-
-Obrigado pela preferência!
-Volte sempre!
-
-{'='*50}
-"""
-        
-        # Preparar resposta
-        response = make_response(ticket_content)
-        response.headers['Content-Type'] = 'text/plain; charset=utf-8'
-        response.headers['Content-Disposition'] = f'attachment; filename=ticket_venda_{venda.id}.txt'
-        
+
+        formato = request.args.get('formato', 'texto')
+        colunas = request.args.get('colunas', COLUNAS_SUPORTADAS[0], type=int)
+
+        if formato not in ('texto', 'escpos'):
+            return jsonify({'erro': 'Formato deve ser texto ou escpos'}), 400
+        if colunas not in COLUNAS_SUPORTADAS:
+            return jsonify({'erro': 'Colunas deve ser 48 ou 42'}), 400
+
+        # Carregar os itens e a loja (em cache) antes de começar a transmitir a resposta
+        itens = list(venda.itens)
+        loja, _ = obter_loja()
+
+        if formato == 'escpos':
+            response = Response(stream_with_context(gerar_escpos(venda, itens, colunas, loja)), mimetype='application/octet-stream')
+            response.headers['Content-Disposition'] = f'attachment; filename=ticket_venda_{venda.id}.bin'
+        else:
+            response = Response(stream_with_context(gerar_texto(venda, itens, colunas, loja)), content_type='text/plain; charset=utf-8')
+            response.headers['Content-Disposition'] = f'attachment; filename=ticket_venda_{venda.id}.txt'
+
         return response
-        
+
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
-
@@ -1,15 +1,332 @@
-from flask import Blueprint, request, jsonify
+import click
+from flask import Blueprint, request, jsonify, session, Response, stream_with_context, current_app
+from sqlalchemy import and_, or_, func
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from src.models.venda import Venda, ItemVenda
+from src.models.venda_aberta import VendaAberta
+from src.models.alteracao_venda import AlteracaoVenda
+from src.models.venda_sincronizada import VendaSincronizada
 from src.models.user import db
+from src.routes.catalogo import registrar_produtos, atualizar_indice
+from src.routes.relatorio import registrar_no_resumo, reconstruir_resumo
+from src.routes.eventos import publicar
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+import base64
+import uuid
+import json
+import csv
+import io
 
 venda_bp = Blueprint("venda", __name__)
 
+# Paginação do histórico
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 200
+
+# Vendas offline aceitas por pedido de sincronização
+SINCRONIZACAO_MAXIMO = 200
+
+# Exportação: linhas lidas do banco por vez e linhas por pedaço da resposta
+EXPORTACAO_LOTE = 1000
+COLUNAS_EXPORTACAO = [
+    "venda_id", "data_venda", "nome_cliente", "forma_pagamento", "total_venda",
+    "item_id", "nome_produto", "quantidade", "tipo_quantidade", "preco_unitario", "subtotal"
+]
+
+def _centavos(valor):
+    """Converter um valor em reais para centavos inteiros, arredondando meio para cima"""
+    return int((Decimal(str(valor or 0)) * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+def _subtotal_centavos(quantidade, preco_unitario):
+    """Subtotal exato (quantidade x preço) em centavos"""
+    valor = Decimal(str(quantidade)) * Decimal(str(preco_unitario)) * 100
+    return int(valor.quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+def _validar_item(item):
+    """Conferir um item enviado pelo caixa e montar a linha de item_venda (ValueError se inválido)
+
+    Devolve (linha, subtotal em centavos); venda_id fica por conta de quem grava.
+    """
+    if not isinstance(item, dict) or "nome_produto" not in item or "preco_unitario" not in item:
+        raise ValueError("Nome do produto e preço unitário são obrigatórios")
+    quantidade = item.get("quantidade", 1.0)
+    try:
+        subtotal = _subtotal_centavos(quantidade, item["preco_unitario"])
+    except (InvalidOperation, TypeError, ValueError):
+        raise ValueError("Quantidade ou preço inválido")
+    linha = {
+        "nome_produto": item["nome_produto"],
+        "quantidade": float(quantidade),
+        "tipo_quantidade": item.get("tipo_quantidade", "unidade"),
+        "preco_unitario": float(item["preco_unitario"]),
+        "subtotal": subtotal / 100
+    }
+    return linha, subtotal
+
+def _somar_ao_total(venda, delta_centavos):
+    """Aplicar ao total da venda apenas a diferença causada pela alteração de itens
+
+    A soma é feita no UPDATE, sobre o valor gravado: pedidos simultâneos na mesma
+    venda não sobrescrevem a parcela um do outro. O total novo volta pelo RETURNING.
+    """
+    total = db.session.execute(
+        db.update(Venda).where(Venda.id == venda.id).values(
+            total=(func.round(func.coalesce(Venda.total, 0) * 100) + delta_centavos) / 100.0
+        ).returning(Venda.total).execution_options(synchronize_session=False)
+    ).scalar_one()
+    set_committed_value(venda, "total", total)
+    return total
+
+def _total_itens_sql():
+    """Total da venda calculado no banco: soma dos subtotais em centavos"""
+    centavos = func.sum(func.round(ItemVenda.subtotal * 100))
+    return db.session.query(func.coalesce(centavos, 0) / 100.0).filter(
+        ItemVenda.venda_id == Venda.id
+    ).scalar_subquery()
+
+def _registrar_alteracoes(venda_id, itens_ids):
+    """Gravar no log de alterações os itens mudados e devolver a nova revisão da venda"""
+    return max(db.session.execute(db.insert(AlteracaoVenda).returning(AlteracaoVenda.id), [
+        {"venda_id": venda_id, "item_id": item_id} for item_id in itens_ids
+    ]).scalars().all())
+
+def _evento_alteracao(venda, revisao):
+    """Aviso para as outras telas de que a venda mudou; elas buscam o delta com desde_rev"""
+    return {"id": venda.id, "revisao": revisao, "total": float(venda.total)}
+
+def _revisao(venda_id):
+    """Revisão atual da venda (0 se nunca teve itens)"""
+    return db.session.query(func.coalesce(func.max(AlteracaoVenda.id), 0)).filter(
+        AlteracaoVenda.venda_id == venda_id
+    ).scalar()
+
+def _ler_desde_rev():
+    """Revisão informada pelo cliente em desde_rev, ou None para a venda completa"""
+    desde = request.args.get("desde_rev")
+    if desde is None or desde == "":
+        return None
+    desde = int(desde)
+    if desde < 0:
+        raise ValueError
+    return desde
+
+def _delta_venda(venda, desde):
+    """Só o que mudou na venda depois da revisão desde: itens alterados, removidos, total e revisão"""
+    alteracoes = db.session.query(AlteracaoVenda.item_id, AlteracaoVenda.id).filter(
+        AlteracaoVenda.venda_id == venda.id,
+        AlteracaoVenda.id > desde
+    ).all()
+    
+    itens_ids = sorted({item_id for item_id, _ in alteracoes})
+    alterados = ItemVenda.query.filter(
+        ItemVenda.venda_id == venda.id, ItemVenda.id.in_(itens_ids)
+    ).order_by(ItemVenda.id).all() if itens_ids else []
+    existentes = {item.id for item in alterados}
+    
+    return {
+        "id": venda.id,
+        "revisao": max((revisao for _, revisao in alteracoes), default=desde),
+        "desde_rev": desde,
+        "total": float(venda.total),
+        "finalizada": venda.finalizada,
+        "itens_alterados": [item.to_dict() for item in alterados],
+        "itens_removidos": [item_id for item_id in itens_ids if item_id not in existentes],
+    }
+
+def _apagar_alteracoes(venda_id):
+    db.session.query(AlteracaoVenda).filter(AlteracaoVenda.venda_id == venda_id).delete(synchronize_session=False)
+
+def _codificar_cursor(venda):
+    """Gerar cursor opaco a partir da chave (data_venda, id) da última venda da página"""
+    chave = f"{venda.data_venda.isoformat()}|{venda.id}"
+    return base64.urlsafe_b64encode(chave.encode()).decode()
+
+def _decodificar_cursor(cursor):
+    """Converter o cursor recebido de volta em (data_venda, id)"""
+    try:
+        data_iso, venda_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(data_iso), int(venda_id)
+    except Exception:
+        raise ValueError("Cursor inválido")
+
+def _ler_data(nome):
+    """Ler um parâmetro de data no formato AAAA-MM-DD"""
+    valor = request.args.get(nome)
+    if not valor:
+        return None
+    try:
+        return datetime.strptime(valor, "%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"Data inválida em '{nome}', use AAAA-MM-DD")
+
+def _filtrar_vendas(query):
+    """Aplicar no SQL os filtros de período, cliente e forma de pagamento"""
+    de = _ler_data("de")
+    ate = _ler_data("ate")
+    cliente = request.args.get("cliente")
+    forma_pagamento = request.args.get("forma_pagamento")
+
+    if de:
+        query = query.filter(Venda.data_venda >= de)
+    if ate:
+        # Data final inclusiva: tudo antes do início do dia seguinte
+        query = query.filter(Venda.data_venda < ate + timedelta(days=1))
+    if cliente:
+        query = query.filter(Venda.nome_cliente.ilike(f"%{cliente}%"))
+    if forma_pagamento:
+        query = query.filter(Venda.forma_pagamento == forma_pagamento)
+    return query
+
+def _resumo_venda(venda):
+    """Dados da venda sem a lista de itens"""
+    return {
+        "id": venda.id,
+        "data_venda": venda.data_venda.isoformat(),
+        "total": float(venda.total),
+        "finalizada": venda.finalizada,
+        "nome_cliente": venda.nome_cliente,
+        "forma_pagamento": venda.forma_pagamento
+    }
+
 @venda_bp.route("/vendas", methods=["GET"])
 def listar_vendas():
-    """Listar todas as vendas finalizadas para o histórico"""
+    """Listar as vendas finalizadas para o histórico, paginadas por cursor
+
+    Parâmetros: limite, cursor, de, ate, cliente, forma_pagamento e
+    campos=resumo (omite os itens). O cursor da próxima página vem no
+    cabeçalho X-Proximo-Cursor.
+    """
     try:
-        vendas = Venda.query.filter_by(finalizada=True).order_by(Venda.data_venda.desc()).all()
-        return jsonify([venda.to_dict() for venda in vendas]), 200
+        try:
+            limite = min(max(int(request.args.get("limite", LIMITE_PADRAO)), 1), LIMITE_MAXIMO)
+        except ValueError:
+            return jsonify({"erro": "Limite inválido"}), 400
+
+        campos = request.args.get("campos", request.args.get("fields", "completo"))
+
+        try:
+            query = _filtrar_vendas(Venda.query.filter_by(finalizada=True))
+
+            cursor = request.args.get("cursor")
+            if cursor:
+                data_cursor, id_cursor = _decodificar_cursor(cursor)
+                # data_venda <= cursor permite ao índice começar direto na posição do cursor
+                query = query.filter(Venda.data_venda <= data_cursor, or_(
+                    Venda.data_venda < data_cursor,
+                    and_(Venda.data_venda == data_cursor, Venda.id < id_cursor)
+                ))
+        except ValueError as e:
+            return jsonify({"erro": str(e)}), 400
+
+        if campos != "resumo":
+            # Carregar os itens da página inteira numa única consulta (evita N+1)
+            query = query.options(selectinload(Venda.itens))
+
+        # Buscar um registro a mais para saber se existe próxima página
+        vendas = query.order_by(Venda.data_venda.desc(), Venda.id.desc()).limit(limite + 1).all()
+        tem_mais = len(vendas) > limite
+        vendas = vendas[:limite]
+
+        if campos == "resumo":
+            resposta = jsonify([_resumo_venda(venda) for venda in vendas])
+        else:
+            resposta = jsonify([venda.to_dict() for venda in vendas])
+
+        if tem_mais:
+            resposta.headers["X-Proximo-Cursor"] = _codificar_cursor(vendas[-1])
+        return resposta, 200
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
+def _linhas_exportacao(consulta):
+    """Percorrer a consulta com cursor no servidor, sem carregar o resultado inteiro"""
+    resultado = db.session.execute(consulta, execution_options={"yield_per": EXPORTACAO_LOTE})
+    for particao in resultado.partitions():
+        yield particao
+
+def _exportar_csv(consulta):
+    """CSV com uma linha por item (vendas sem itens saem com as colunas do item vazias)"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(COLUNAS_EXPORTACAO)
+    for particao in _linhas_exportacao(consulta):
+        for linha in particao:
+            escritor.writerow([
+                linha.venda_id, linha.data_venda.isoformat(), linha.nome_cliente, linha.forma_pagamento,
+                f"{linha.total_venda:.2f}", linha.item_id, linha.nome_produto, linha.quantidade,
+                linha.tipo_quantidade, linha.preco_unitario,
+                f"{linha.subtotal:.2f}" if linha.subtotal is not None else None
+            ])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+def _exportar_jsonl(consulta):
+    """JSON Lines com uma venda por linha e os itens aninhados"""
+    atual = None
+    for particao in _linhas_exportacao(consulta):
+        pedaco = []
+        for linha in particao:
+            if atual is None or atual["id"] != linha.venda_id:
+                if atual is not None:
+                    pedaco.append(json.dumps(atual, ensure_ascii=False))
+                atual = {
+                    "id": linha.venda_id,
+                    "data_venda": linha.data_venda.isoformat(),
+                    "nome_cliente": linha.nome_cliente,
+                    "forma_pagamento": linha.forma_pagamento,
+                    "total": float(linha.total_venda),
+                    "itens": []
+                }
+            if linha.item_id is not None:
+                atual["itens"].append({
+                    "id": linha.item_id,
+                    "nome_produto": linha.nome_produto,
+                    "quantidade": linha.quantidade,
+                    "tipo_quantidade": linha.tipo_quantidade,
+                    "preco_unitario": linha.preco_unitario,
+                    "subtotal": linha.subtotal
+                })
+        if pedaco:
+            yield "\n".join(pedaco) + "\n"
+    if atual is not None:
+        yield json.dumps(atual, ensure_ascii=False) + "\n"
+
+@venda_bp.route("/vendas/export", methods=["GET"])
+def exportar_vendas():
+    """Exportar vendas finalizadas e seus itens em CSV ou JSON Lines, transmitindo aos poucos"""
+    try:
+        formato = request.args.get("formato", "csv")
+        if formato not in ("csv", "jsonl"):
+            return jsonify({"erro": "Formato deve ser csv ou jsonl"}), 400
+
+        consulta = db.select(
+            Venda.id.label("venda_id"), Venda.data_venda, Venda.nome_cliente, Venda.forma_pagamento,
+            Venda.total.label("total_venda"), ItemVenda.id.label("item_id"), ItemVenda.nome_produto,
+            ItemVenda.quantidade, ItemVenda.tipo_quantidade, ItemVenda.preco_unitario, ItemVenda.subtotal
+        ).outerjoin(ItemVenda, ItemVenda.venda_id == Venda.id).where(Venda.finalizada == True)
+
+        try:
+            consulta = _filtrar_vendas(consulta)
+        except ValueError as e:
+            return jsonify({"erro": str(e)}), 400
+
+        # Ordenar por venda para agrupar os itens de cada uma sem guardar estado
+        consulta = consulta.order_by(Venda.data_venda, Venda.id, ItemVenda.id)
+
+        if formato == "csv":
+            gerador, tipo = _exportar_csv(consulta), "text/csv; charset=utf-8"
+        else:
+            gerador, tipo = _exportar_jsonl(consulta), "application/x-ndjson; charset=utf-8"
+
+        response = Response(stream_with_context(gerador), content_type=tipo)
+        response.headers["Content-Disposition"] = f"attachment; filename=vendas.{formato}"
+        return response
     except Exception as e:
         return jsonify({"erro": str(e)}), 500
 
@@ -17,61 +334,132 @@ def listar_vendas():
 def listar_todas_vendas():
     """Listar todas as vendas (para debug)"""
     try:
-        vendas = Venda.query.all()
+        # Contagem de itens agregada no SQL em vez de carregar os itens de cada venda
+        itens_count = func.count(ItemVenda.id).label("itens_count")
+        vendas = db.session.query(Venda, itens_count).outerjoin(
+            ItemVenda, ItemVenda.venda_id == Venda.id
+        ).group_by(Venda.id).all()
         return jsonify([{
             "id": venda.id,
             "finalizada": venda.finalizada,
             "total": float(venda.total),
             "data_venda": venda.data_venda.isoformat(),
-            "itens_count": len(venda.itens)
-        } for venda in vendas]), 200
+            "itens_count": count
+        } for venda, count in vendas]), 200
     except Exception as e:
         return jsonify({"erro": str(e)}), 500
 
+def _terminal_atual():
+    """Identificador do caixa: cabeçalho X-Terminal ou, na falta dele, a sessão do navegador"""
+    terminal = request.headers.get("X-Terminal") or request.args.get("terminal")
+    if not terminal:
+        terminal = session.get("terminal")
+        if not terminal:
+            terminal = session["terminal"] = uuid.uuid4().hex
+    return terminal[:64]
+
+def _ler_uuid(valor):
+    """uuid no formato canônico (ValueError se inválido)"""
+    return str(uuid.UUID(str(valor)))
+
+def _uuid_nova_venda(valor):
+    """uuid gerado pelo caixa no início da venda; sem ele, o servidor gera um"""
+    return _ler_uuid(valor) if valor else str(uuid.uuid4())
+
+def _vincular_venda(terminal, venda_id, chave, venda_anterior=None, substituir=False):
+    """Registrar venda_id (com o uuid do caixa) como a venda aberta do terminal num único INSERT ... ON CONFLICT
+
+    Sem venda_anterior só grava se o terminal ainda não tiver venda; com ela, só troca
+    se o vínculo ainda apontar para a anterior. Devolve False quando outro pedido do
+    mesmo terminal chegou antes.
+    """
+    stmt = insert(VendaAberta).values(terminal=terminal, venda_id=venda_id, uuid=chave)
+    if substituir:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[VendaAberta.terminal],
+            set_={"venda_id": stmt.excluded.venda_id, "uuid": stmt.excluded.uuid}
+        )
+    elif venda_anterior is None:
+        stmt = stmt.on_conflict_do_nothing(index_elements=[VendaAberta.terminal])
+    else:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[VendaAberta.terminal],
+            set_={"venda_id": stmt.excluded.venda_id, "uuid": stmt.excluded.uuid},
+            where=VendaAberta.venda_id == venda_anterior
+        )
+    return db.session.execute(stmt).rowcount == 1
+
 @venda_bp.route("/vendas/atual", methods=["GET"])
 def obter_venda_atual():
-    """Obter a venda atual (não finalizada) - sempre garantir venda limpa"""
+    """Obter a venda atual (não finalizada) do terminal, criando uma se necessário"""
     try:
-        # Buscar venda não finalizada
-        venda_atual = Venda.query.filter_by(finalizada=False).first()
+        terminal = _terminal_atual()
+        try:
+            chave = _uuid_nova_venda(request.args.get("uuid"))
+        except ValueError:
+            return jsonify({"erro": "uuid inválido"}), 400
         
-        # Se não existe venda não finalizada, criar uma nova
-        if not venda_atual:
+        for _ in range(3):
+            # Buscar a venda aberta deste terminal
+            vinculo = db.session.get(VendaAberta, terminal)
+            venda_atual = db.session.get(Venda, vinculo.venda_id) if vinculo else None
+            
+            if venda_atual and not venda_atual.finalizada:
+                return jsonify(venda_atual.to_dict() | {"uuid": vinculo.uuid, "revisao": _revisao(venda_atual.id)}), 200
+            
+            # Sem venda aberta (ou a anterior já foi finalizada/excluída): criar uma nova
             nova_venda = Venda()
             db.session.add(nova_venda)
-            db.session.commit()
-            return jsonify(nova_venda.to_dict()), 200
+            db.session.flush()
+            
+            if _vincular_venda(terminal, nova_venda.id, chave, vinculo.venda_id if vinculo else None):
+                db.session.commit()
+                return jsonify(nova_venda.to_dict() | {"uuid": chave, "revisao": 0}), 200
+            
+            # Outro pedido do mesmo terminal criou a venda primeiro: usar a dele
+            db.session.rollback()
         
-        # Se existe venda não finalizada, verificar se tem itens
-        # Se tiver itens, retornar a venda atual
-        # Se não tiver itens, também retornar (venda limpa)
-        return jsonify(venda_atual.to_dict()), 200
+        return jsonify({"erro": "Não foi possível obter a venda atual, tente novamente"}), 409
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({"erro": str(e)}), 500
 
 @venda_bp.route("/vendas/limpar-atual", methods=["POST"])
 def limpar_venda_atual():
-    """Limpar completamente a venda atual e criar uma nova"""
+    """Limpar completamente a venda atual do terminal e criar uma nova"""
     try:
-        # Buscar venda não finalizada
-        venda_atual = Venda.query.filter_by(finalizada=False).first()
+        terminal = _terminal_atual()
+        dados = request.get_json(silent=True)
+        try:
+            chave = _uuid_nova_venda(dados.get("uuid") if isinstance(dados, dict) else None)
+        except ValueError:
+            return jsonify({"erro": "uuid inválido"}), 400
+        
+        vinculo = db.session.get(VendaAberta, terminal)
+        venda_atual = db.session.get(Venda, vinculo.venda_id) if vinculo else None
+        
+        # Criar nova venda limpa e trocar o vínculo do terminal
+        nova_venda = Venda()
+        db.session.add(nova_venda)
+        db.session.flush()
+        
+        if not _vincular_venda(terminal, nova_venda.id, chave, vinculo.venda_id if vinculo else None):
+            db.session.rollback()
+            return jsonify({"erro": "A venda atual foi alterada em outro pedido, tente novamente"}), 409
         
-        if venda_atual:
+        if venda_atual and not venda_atual.finalizada:
             # Remover todos os itens da venda atual
             for item in venda_atual.itens:
                 db.session.delete(item)
             
             # Remover a venda atual
+            _apagar_alteracoes(venda_atual.id)
             db.session.delete(venda_atual)
-            db.session.commit()
         
-        # Criar nova venda limpa
-        nova_venda = Venda()
-        db.session.add(nova_venda)
         db.session.commit()
         
-        return jsonify(nova_venda.to_dict()), 200
+        return jsonify(nova_venda.to_dict() | {"uuid": chave, "revisao": 0}), 200
         
     except Exception as e:
         db.session.rollback()
@@ -79,101 +467,208 @@ def limpar_venda_atual():
 
 @venda_bp.route("/vendas", methods=["POST"])
 def criar_venda():
-    """Criar uma nova venda"""
+    """Criar uma nova venda, que passa a ser a venda aberta do terminal"""
     try:
+        dados = request.get_json(silent=True)
+        try:
+            chave = _uuid_nova_venda(dados.get("uuid") if isinstance(dados, dict) else None)
+        except ValueError:
+            return jsonify({"erro": "uuid inválido"}), 400
+        
         nova_venda = Venda()
         db.session.add(nova_venda)
+        db.session.flush()
+        
+        _vincular_venda(_terminal_atual(), nova_venda.id, chave, substituir=True)
         db.session.commit()
         
-        return jsonify(nova_venda.to_dict()), 201
+        return jsonify(nova_venda.to_dict() | {"uuid": chave, "revisao": 0}), 201
     except Exception as e:
         db.session.rollback()
         return jsonify({"erro": str(e)}), 500
 
 @venda_bp.route("/vendas/<int:venda_id>", methods=["GET"])
 def obter_venda(venda_id):
-    """Obter uma venda específica"""
+    """Obter uma venda específica; com desde_rev, só as mudanças depois dessa revisão"""
     try:
+        try:
+            desde = _ler_desde_rev()
+        except ValueError:
+            return jsonify({"erro": "desde_rev inválido"}), 400
+        
         venda = Venda.query.get_or_404(venda_id)
-        return jsonify(venda.to_dict()), 200
+        if desde is not None:
+            return jsonify(_delta_venda(venda, desde)), 200
+        return jsonify(venda.to_dict() | {"revisao": _revisao(venda.id)}), 200
     except Exception as e:
         return jsonify({"erro": str(e)}), 500
 
 @venda_bp.route("/vendas/<int:venda_id>/itens", methods=["POST"])
 def adicionar_item(venda_id):
-    """Adicionar item à venda"""
+    """Adicionar item à venda (com desde_rev, responde só as mudanças)"""
     try:
+        try:
+            desde = _ler_desde_rev()
+        except ValueError:
+            return jsonify({"erro": "desde_rev inválido"}), 400
+        
         venda = Venda.query.get_or_404(venda_id)
         
         if venda.finalizada:
             return jsonify({"erro": "Não é possível adicionar itens a uma venda finalizada"}), 400
         
-        dados = request.get_json()
+        # Mesma validação do lote: dados inválidos respondem 400 com a mesma mensagem
+        try:
+            linha, subtotal = _validar_item(request.get_json(silent=True))
+        except ValueError as e:
+            return jsonify({"erro": str(e)}), 400
         
-        if not dados or "nome_produto" not in dados or "preco_unitario" not in dados:
-            return jsonify({"erro": "Nome do produto e preço unitário são obrigatórios"}), 400
-        
-        quantidade = dados.get("quantidade", 1.0)
-        tipo_quantidade = dados.get("tipo_quantidade", "unidade")      
-        novo_item = ItemVenda(
-            venda_id=venda_id,
-            nome_produto=dados["nome_produto"],
-            quantidade=quantidade,
-            tipo_quantidade=tipo_quantidade,
-            preco_unitario=dados["preco_unitario"]
-        )
-        # Calcular subtotal
-        novo_item.calcular_subtotal()
+        novo_item = ItemVenda(venda_id=venda_id, **linha)
         
         db.session.add(novo_item)
+        db.session.flush()
+        revisao = _registrar_alteracoes(venda_id, [novo_item.id])
+        
+        # Atualizar total da venda somando só o novo item
+        _somar_ao_total(venda, subtotal)
         
-        # Recalcular total da venda
-        venda.calcular_total()
+        # Guardar o último preço usado no catálogo de produtos
+        produto = {
+            "nome_produto": novo_item.nome_produto,
+            "preco_unitario": novo_item.preco_unitario,
+            "tipo_quantidade": novo_item.tipo_quantidade
+        }
+        registrar_produtos([produto])
         
+        # Montar a resposta antes do commit, que expira a venda e os itens
+        resposta = _delta_venda(venda, desde) if desde is not None else venda.to_dict()
+        evento = _evento_alteracao(venda, revisao)
         db.session.commit()
+        publicar("venda_alterada", evento)
+        atualizar_indice([produto])
         
-        return jsonify(venda.to_dict()), 201
+        return jsonify(resposta), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"erro": str(e)}), 500
+
+@venda_bp.route("/vendas/<int:venda_id>/itens/lote", methods=["POST"])
+def adicionar_itens_lote(venda_id):
+    """Adicionar vários itens à venda numa única transação (com desde_rev, responde só as mudanças)"""
+    try:
+        try:
+            desde = _ler_desde_rev()
+        except ValueError:
+            return jsonify({"erro": "desde_rev inválido"}), 400
+        
+        venda = Venda.query.get_or_404(venda_id)
+        
+        if venda.finalizada:
+            return jsonify({"erro": "Não é possível adicionar itens a uma venda finalizada"}), 400
+        
+        dados = request.get_json(silent=True)
+        itens = dados.get("itens") if isinstance(dados, dict) else dados
+        
+        if not isinstance(itens, list) or not itens:
+            return jsonify({"erro": "Envie uma lista de itens"}), 400
+        
+        # Validar todos os itens antes de gravar qualquer um
+        linhas = []
+        total_lote = 0
+        for posicao, item in enumerate(itens, start=1):
+            try:
+                linha, subtotal = _validar_item(item)
+            except ValueError as e:
+                return jsonify({"erro": f"Item {posicao}: {e}"}), 400
+            
+            total_lote += subtotal
+            linhas.append(linha | {"venda_id": venda_id})
+        
+        # Um único INSERT com executemany para todas as linhas
+        itens_ids = db.session.execute(db.insert(ItemVenda).returning(ItemVenda.id), linhas).scalars().all()
+        revisao = _registrar_alteracoes(venda_id, itens_ids)
+        
+        # Atualizar o total uma única vez
+        _somar_ao_total(venda, total_lote)
+        
+        registrar_produtos(linhas)
+        
+        resposta = _delta_venda(venda, desde) if desde is not None else venda.to_dict()
+        evento = _evento_alteracao(venda, revisao)
+        db.session.commit()
+        publicar("venda_alterada", evento)
+        atualizar_indice(linhas)
+        
+        return jsonify(resposta), 201
     except Exception as e:
         db.session.rollback()
         return jsonify({"erro": str(e)}), 500
 
 @venda_bp.route("/vendas/<int:venda_id>/itens/<int:item_id>", methods=["PUT"])
 def atualizar_item(venda_id, item_id):
-    """Atualizar quantidade ou preço de um item"""
+    """Atualizar quantidade ou preço de um item (com desde_rev, responde só as mudanças)"""
     try:
+        try:
+            desde = _ler_desde_rev()
+        except ValueError:
+            return jsonify({"erro": "desde_rev inválido"}), 400
+        
         venda = Venda.query.get_or_404(venda_id)
         
         if venda.finalizada:
             return jsonify({"erro": "Não é possível modificar itens de uma venda finalizada"}), 400
         
         item = ItemVenda.query.filter_by(id=item_id, venda_id=venda_id).first_or_404()
-        dados = request.get_json()
+        dados = request.get_json(silent=True)
         if not dados:
             return jsonify({"erro": "Dados não fornecidos"}), 400
         
-        if "quantidade" in dados:
-            item.quantidade = dados["quantidade"]
-        if "tipo_quantidade" in dados:
-            item.tipo_quantidade = dados["tipo_quantidade"]
-        if "preco_unitario" in dados:
-            item.preco_unitario = dados["preco_unitario"]   
-        # Recalcular subtotal do item
-        item.calcular_subtotal()
+        subtotal_anterior = _centavos(item.subtotal)
+        
+        # Validar o item com os valores novos antes de alterar qualquer campo
+        try:
+            linha, subtotal = _validar_item({
+                "nome_produto": item.nome_produto,
+                "quantidade": dados.get("quantidade", item.quantidade),
+                "tipo_quantidade": dados.get("tipo_quantidade", item.tipo_quantidade),
+                "preco_unitario": dados.get("preco_unitario", item.preco_unitario)
+            })
+        except ValueError as e:
+            return jsonify({"erro": str(e)}), 400
+        for campo, valor in linha.items():
+            setattr(item, campo, valor)
         
-        # Recalcular total da venda
-        venda.calcular_total()
+        # Atualizar total da venda com a diferença do item
+        _somar_ao_total(venda, subtotal - subtotal_anterior)
+        revisao = _registrar_alteracoes(venda_id, [item.id])
         
+        produto = {
+            "nome_produto": item.nome_produto,
+            "preco_unitario": item.preco_unitario,
+            "tipo_quantidade": item.tipo_quantidade
+        }
+        registrar_produtos([produto])
+        
+        resposta = _delta_venda(venda, desde) if desde is not None else venda.to_dict()
+        evento = _evento_alteracao(venda, revisao)
         db.session.commit()
+        publicar("venda_alterada", evento)
+        atualizar_indice([produto])
         
-        return jsonify(venda.to_dict()), 200
+        return jsonify(resposta), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({"erro": str(e)}), 500
 
 @venda_bp.route("/vendas/<int:venda_id>/itens/<int:item_id>", methods=["DELETE"])
 def remover_item(venda_id, item_id):
-    """Remover item da venda"""
+    """Remover item da venda (com desde_rev, responde só as mudanças)"""
     try:
+        try:
+            desde = _ler_desde_rev()
+        except ValueError:
+            return jsonify({"erro": "desde_rev inválido"}), 400
+        
         venda = Venda.query.get_or_404(venda_id)
         
         if venda.finalizada:
@@ -183,63 +678,317 @@ def remover_item(venda_id, item_id):
         
         db.session.delete(item)
         
-        # Recalcular total da venda
-        venda.calcular_total()
+        # Descontar o item do total da venda
+        _somar_ao_total(venda, -_centavos(item.subtotal))
+        revisao = _registrar_alteracoes(venda_id, [item.id])
         
+        resposta = _delta_venda(venda, desde) if desde is not None else venda.to_dict()
+        evento = _evento_alteracao(venda, revisao)
         db.session.commit()
+        publicar("venda_alterada", evento)
         
-        return jsonify(venda.to_dict()), 200
+        return jsonify(resposta), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({"erro": str(e)}), 500
 
 @venda_bp.route("/vendas/<int:venda_id>/finalizar", methods=["PUT"])
 def finalizar_venda(venda_id):
-    """Finalizar uma venda"""
+    """Finalizar uma venda
+
+    A finalização é um único UPDATE protegido por finalizada = 0, com o total
+    somado pelo próprio banco. Um segundo pedido (duplo clique) não altera nada
+    e recebe a venda já finalizada.
+
+    O uuid da venda (enviado pelo caixa ou gravado na abertura) entra em
+    venda_sincronizada na mesma transação: se a resposta se perder e o caixa
+    guardar a venda offline, a sincronização a reconhece como já recebida.
+    """
+    chave = None
     try:
-        print(f"DEBUG: Iniciando finalização da venda {venda_id}")
-        venda = Venda.query.get_or_404(venda_id)
-        print(f"DEBUG: Venda encontrada - ID: {venda.id}, Finalizada: {venda.finalizada}")
-        
-        if venda.finalizada:
-            return jsonify({"erro": "Venda já está finalizada"}), 400
-        
-        if not venda.itens:
-            return jsonify({"erro": "Não é possível finalizar uma venda sem itens"}), 400
-        
-        # Verificar se foi enviado nome do cliente e forma de pagamento
-        dados = request.get_json()
+        valores = {"finalizada": True, "total": _total_itens_sql()}
+
+        # Verificar se foi enviado nome do cliente, forma de pagamento e uuid
+        dados = request.get_json(silent=True)
         if dados:
             if "nome_cliente" in dados:
-                venda.nome_cliente = dados["nome_cliente"]
-                print(f"DEBUG: Nome do cliente definido: {venda.nome_cliente}")
+                valores["nome_cliente"] = dados["nome_cliente"]
             if "forma_pagamento" in dados:
-                venda.forma_pagamento = dados["forma_pagamento"]
-                print(f"DEBUG: Forma de pagamento definida: {venda.forma_pagamento}")
+                valores["forma_pagamento"] = dados["forma_pagamento"]
+            if isinstance(dados, dict) and dados.get("uuid"):
+                try:
+                    chave = _ler_uuid(dados["uuid"])
+                except ValueError:
+                    return jsonify({"erro": "uuid inválido"}), 400
+
+        stmt = db.update(Venda).where(
+            Venda.id == venda_id,
+            Venda.finalizada == False,
+            ItemVenda.query.filter(ItemVenda.venda_id == Venda.id).exists()
+        ).values(valores).returning(
+            Venda.id, Venda.data_venda, Venda.total, Venda.nome_cliente, Venda.forma_pagamento
+        ).execution_options(synchronize_session=False)
+        linha = db.session.execute(stmt).first()
+
+        if linha is None:
+            # Nada foi alterado: descobrir o motivo fora do caminho normal
+            venda = db.session.get(Venda, venda_id)
+            if venda is None:
+                return jsonify({"erro": "Venda não encontrada"}), 404
+            if venda.finalizada:
+                return jsonify(venda.to_dict()), 200
+            return jsonify({"erro": "Não é possível finalizar uma venda sem itens"}), 400
+
+        if chave is None:
+            chave = db.session.execute(
+                db.select(VendaAberta.uuid).where(VendaAberta.venda_id == venda_id)
+            ).scalars().first()
+        if chave:
+            db.session.execute(db.insert(VendaSincronizada).values(
+                uuid=chave, venda_id=venda_id, terminal=_terminal_atual()
+            ))
+
+        itens = ItemVenda.query.filter_by(venda_id=venda_id).all()
+
+        # Venda finalizada não muda mais: o log de alterações dela não serve para nada
+        _apagar_alteracoes(venda_id)
+
+        # Somar a venda nos totais do relatório, na mesma transação
+        registrar_no_resumo(
+            linha.data_venda,
+            linha.forma_pagamento,
+            _centavos(linha.total),
+            [(item.nome_produto, item.quantidade, _centavos(item.subtotal)) for item in itens]
+        )
+        # Serializar antes do commit, que expira os objetos carregados
+        itens = [item.to_dict() for item in itens]
+        db.session.commit()
+
+        venda = {
+            "id": linha.id,
+            "data_venda": linha.data_venda.isoformat() if linha.data_venda else None,
+            "total": float(linha.total),
+            "finalizada": True,
+            "nome_cliente": linha.nome_cliente,
+            "forma_pagamento": linha.forma_pagamento,
+            "itens": itens,
+        }
+        # Os outros caixas acrescentam a venda ao histórico sem buscar a lista de novo
+        publicar("venda_finalizada", venda)
+        return jsonify(venda), 200
+    except IntegrityError as e:
+        # O uuid já chegou pela sincronização offline: a venda registrada é aquela
+        db.session.rollback()
+        sincronizada = db.session.get(VendaSincronizada, chave) if chave else None
+        if sincronizada is None:
+            current_app.logger.exception("Erro na finalização da venda %s", venda_id)
+            return jsonify({"erro": str(e)}), 500
+        return jsonify(db.session.get(Venda, sincronizada.venda_id).to_dict()), 200
+    except Exception as e:
+        current_app.logger.exception("Erro na finalização da venda %s", venda_id)
+        db.session.rollback()
+        return jsonify({"erro": str(e)}), 500
+
+def _preparar_venda_offline(venda, posicao):
+    """Validar uma venda feita offline e montar as linhas de venda e itens (ValueError se inválida)"""
+    if not isinstance(venda, dict):
+        raise ValueError(f"Venda {posicao}: formato inválido")
+    try:
+        chave = _ler_uuid(venda.get("uuid"))
+    except ValueError:
+        raise ValueError(f"Venda {posicao}: uuid inválido")
+    
+    # Venda aberta no servidor antes de o caixa ficar sem conexão e continuar localmente
+    venda_aberta_id = venda.get("venda_aberta_id")
+    if venda_aberta_id is not None and (isinstance(venda_aberta_id, bool) or not isinstance(venda_aberta_id, int)):
+        raise ValueError(f"Venda {posicao}: venda_aberta_id inválido")
+    
+    itens = venda.get("itens")
+    if not isinstance(itens, list) or not itens:
+        raise ValueError(f"Venda {posicao}: não é possível finalizar uma venda sem itens")
+    
+    linhas_itens = []
+    total = 0
+    for item in itens:
+        try:
+            linha, subtotal = _validar_item(item)
+        except ValueError as e:
+            raise ValueError(f"Venda {posicao}: {e}")
+        total += subtotal
+        linhas_itens.append(linha)
+    
+    # Hora em que a venda foi feita no caixa, e não a hora em que chegou
+    data_venda = datetime.now()
+    if venda.get("data_venda"):
+        try:
+            data_venda = datetime.fromisoformat(venda["data_venda"])
+        except (TypeError, ValueError):
+            raise ValueError(f"Venda {posicao}: data_venda inválida")
+        if data_venda.tzinfo:
+            data_venda = data_venda.astimezone().replace(tzinfo=None)
+    
+    linha_venda = {
+        "data_venda": data_venda,
+        "total": total / 100,
+        "finalizada": True,
+        "nome_cliente": venda.get("nome_cliente"),
+        "forma_pagamento": venda.get("forma_pagamento")
+    }
+    return chave, linha_venda, linhas_itens, venda_aberta_id
+
+def _descartar_vendas_abandonadas(vendas_ids, terminal):
+    """Apagar as vendas do servidor que o caixa abandonou ao continuar offline
+
+    Só as que continuam abertas e vinculadas ao próprio terminal em venda_aberta:
+    um id de outro caixa (ou já trocado por outra venda) é ignorado. Uma venda
+    finalizada antes da queda tem o mesmo uuid da venda enviada, que então é
+    duplicada e nem chega aqui.
+    """
+    abertas = db.session.execute(
+        db.select(Venda.id).join(VendaAberta, VendaAberta.venda_id == Venda.id).where(
+            VendaAberta.terminal == terminal,
+            Venda.id.in_(vendas_ids),
+            Venda.finalizada == False
+        )
+    ).scalars().all()
+    if not abertas:
+        return
+    db.session.execute(db.delete(VendaAberta).where(VendaAberta.venda_id.in_(abertas)))
+    db.session.execute(db.delete(AlteracaoVenda).where(AlteracaoVenda.venda_id.in_(abertas)))
+    db.session.execute(db.delete(ItemVenda).where(ItemVenda.venda_id.in_(abertas)))
+    db.session.execute(db.delete(Venda).where(Venda.id.in_(abertas)))
+
+def _gravar_vendas_offline(preparadas, terminal):
+    """Gravar na transação atual as vendas cujo uuid ainda não foi recebido
+
+    Devolve o id de cada uuid e as vendas novas já montadas para o evento.
+    """
+    chaves = [chave for chave, _, _, _ in preparadas]
+    ids = dict(db.session.execute(
+        db.select(VendaSincronizada.uuid, VendaSincronizada.venda_id).where(VendaSincronizada.uuid.in_(chaves))
+    ).all())
+    
+    novas = []
+    abandonadas = []
+    for chave, linha_venda, linhas_itens, venda_aberta_id in preparadas:
+        if chave not in ids:
+            ids[chave] = None
+            novas.append((chave, linha_venda, linhas_itens))
+            if venda_aberta_id is not None:
+                abandonadas.append(venda_aberta_id)
+    if not novas:
+        return ids, []
+    
+    # Um INSERT por tabela para o lote inteiro, na ordem das vendas enviadas
+    vendas_ids = db.session.execute(
+        db.insert(Venda).returning(Venda.id, sort_by_parameter_order=True),
+        [linha_venda for _, linha_venda, _ in novas]
+    ).scalars().all()
+    
+    todos_itens = []
+    itens_por_venda = []
+    for venda_id, (chave, linha_venda, linhas_itens) in zip(vendas_ids, novas):
+        ids[chave] = venda_id
+        # Cópias: numa nova tentativa as linhas preparadas voltam sem id de venda nem de item
+        linhas_itens = [dict(linha, venda_id=venda_id) for linha in linhas_itens]
+        itens_por_venda.append(linhas_itens)
+        todos_itens.extend(linhas_itens)
+        registrar_no_resumo(
+            linha_venda["data_venda"],
+            linha_venda["forma_pagamento"],
+            _centavos(linha_venda["total"]),
+            [(linha["nome_produto"], linha["quantidade"], _centavos(linha["subtotal"])) for linha in linhas_itens]
+        )
+    
+    itens_ids = db.session.execute(
+        db.insert(ItemVenda).returning(ItemVenda.id, sort_by_parameter_order=True), todos_itens
+    ).scalars().all()
+    for item_id, linha in zip(itens_ids, todos_itens):
+        linha["id"] = item_id
+    
+    # Só depois dos INSERTs, para o SQLite não reaproveitar o id de uma venda apagada
+    if abandonadas:
+        _descartar_vendas_abandonadas(abandonadas, terminal)
+    
+    db.session.execute(db.insert(VendaSincronizada), [
+        {"uuid": chave, "venda_id": ids[chave], "terminal": terminal} for chave, _, _ in novas
+    ])
+    registrar_produtos(todos_itens)
+    
+    gravadas = [{
+        "id": ids[chave],
+        "data_venda": linha_venda["data_venda"].isoformat(),
+        "total": linha_venda["total"],
+        "finalizada": True,
+        "nome_cliente": linha_venda["nome_cliente"],
+        "forma_pagamento": linha_venda["forma_pagamento"],
+        "itens": linhas_itens
+    } for (chave, linha_venda, _), linhas_itens in zip(novas, itens_por_venda)]
+    return ids, gravadas
+
+@venda_bp.route("/vendas/sincronizar", methods=["POST"])
+def sincronizar_vendas():
+    """Receber num único commit as vendas finalizadas offline por um caixa
+
+    Cada venda traz o uuid gerado no navegador. As já recebidas não são gravadas
+    de novo e voltam com o mesmo id (duplicada = true), então o caixa pode
+    reenviar o lote até receber a resposta. Uma venda que começou no servidor
+    traz também venda_aberta_id, apagada se ainda estiver aberta.
+
+    Uma venda inválida não barra o lote: ela volta com erro (e sem id) na mesma
+    posição da lista, e as outras são gravadas normalmente.
+    """
+    try:
+        dados = request.get_json(silent=True)
+        vendas = dados.get("vendas") if isinstance(dados, dict) else None
         
-        print(f"DEBUG: Marcando venda como finalizada")
-        venda.finalizada = True
-        venda.calcular_total()
+        if not isinstance(vendas, list) or not vendas:
+            return jsonify({"erro": "Envie uma lista de vendas"}), 400
         
-        print(f"DEBUG: Antes do commit - Finalizada: {venda.finalizada}")
+        limite = current_app.config.get("SINCRONIZACAO_MAXIMO", SINCRONIZACAO_MAXIMO)
+        if len(vendas) > limite:
+            return jsonify({"erro": f"Envie no máximo {limite} vendas por vez"}), 413
         
-        # Forçar o flush e commit
-        db.session.flush()
-        db.session.commit()
+        # Validar todas as vendas antes de gravar qualquer uma; as inválidas ficam de fora
+        preparadas = []
+        erros = {}
+        for posicao, venda in enumerate(vendas, start=1):
+            try:
+                preparadas.append(_preparar_venda_offline(venda, posicao))
+            except ValueError as e:
+                erros[posicao] = str(e)
         
-        # Verificar imediatamente após commit
-        db.session.refresh(venda)
-        print(f"DEBUG: Após commit e refresh - Finalizada: {venda.finalizada}")
+        terminal = _terminal_atual()
+        for tentativa in range(2):
+            try:
+                ids, gravadas = _gravar_vendas_offline(preparadas, terminal)
+                db.session.commit()
+                break
+            except IntegrityError:
+                # Outro pedido gravou um dos uuids ao mesmo tempo: na nova tentativa ele já aparece
+                db.session.rollback()
+                if tentativa:
+                    raise
         
-        # Verificar se realmente foi salvo com nova query
-        venda_verificacao = db.session.query(Venda).filter_by(id=venda_id).first()
-        print(f"DEBUG: Verificação com nova query - Finalizada: {venda_verificacao.finalizada}")
+        for venda in gravadas:
+            publicar("venda_finalizada", venda)
+        atualizar_indice([item for venda in gravadas for item in venda["itens"]])
         
-        return jsonify(venda.to_dict()), 200
+        # duplicada: já recebida antes ou repetida dentro do próprio lote
+        novas = {venda["id"] for venda in gravadas}
+        aceitas = iter(preparadas)
+        resposta = []
+        for posicao, venda in enumerate(vendas, start=1):
+            if posicao in erros:
+                chave = venda.get("uuid") if isinstance(venda, dict) else None
+                resposta.append({"uuid": chave, "id": None, "erro": erros[posicao]})
+                continue
+            chave = next(aceitas)[0]
+            resposta.append({"uuid": chave, "id": ids[chave], "duplicada": ids[chave] not in novas})
+            novas.discard(ids[chave])
+        return jsonify({"vendas": resposta}), 200
     except Exception as e:
-        print(f"DEBUG: Erro na finalização: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        current_app.logger.exception("Erro na sincronização de vendas offline")
         db.session.rollback()
         return jsonify({"erro": str(e)}), 500
 
@@ -252,6 +1001,7 @@ def excluir_venda(venda_id):
         if venda.finalizada:
             return jsonify({"erro": "Não é possível excluir uma venda finalizada"}), 400
         
+        _apagar_alteracoes(venda.id)
         db.session.delete(venda)
         db.session.commit()
         
@@ -260,5 +1010,50 @@ def excluir_venda(venda_id):
         db.session.rollback()
         return jsonify({"erro": str(e)}), 500
 
+@venda_bp.cli.command("verificar-totais")
+@click.option("--corrigir", is_flag=True, help="Gravar os subtotais e totais recalculados")
+def verificar_totais(corrigir):
+    """Recalcular em lote subtotais e totais e apontar divergências
+
+    Com --corrigir, o resumo dos relatórios é reconstruído na mesma transação:
+    os totais corrigidos de vendas finalizadas também mudam os relatórios.
+    """
+    totais = {}
+    itens_corrigidos = []
+
+    # Percorrer os itens em blocos, sem carregar tudo em memória
+    itens = db.session.query(
+        ItemVenda.id, ItemVenda.venda_id, ItemVenda.quantidade,
+        ItemVenda.preco_unitario, ItemVenda.subtotal
+    ).execution_options(yield_per=1000)
+
+    for item_id, venda_id, quantidade, preco_unitario, subtotal in itens:
+        centavos = _subtotal_centavos(quantidade, preco_unitario)
+        totais[venda_id] = totais.get(venda_id, 0) + centavos
+        if centavos != _centavos(subtotal):
+            itens_corrigidos.append({"id": item_id, "subtotal": centavos / 100})
+
+    vendas_corrigidas = []
+    vendas = db.session.query(Venda.id, Venda.total).execution_options(yield_per=1000)
+    for venda_id, total in vendas:
+        centavos = totais.get(venda_id, 0)
+        if centavos != _centavos(total):
+            vendas_corrigidas.append({"id": venda_id, "total": centavos / 100})
+            click.echo(f"Venda #{venda_id}: total gravado {float(total or 0):.2f}, calculado {centavos / 100:.2f}")
+
+    click.echo(f"{len(itens_corrigidos)} subtotal(is) e {len(vendas_corrigidas)} total(is) divergente(s)")
+
+    if not itens_corrigidos and not vendas_corrigidas:
+        return
 
+    if not corrigir:
+        raise SystemExit(1)
 
+    # Atualização em lote pela chave primária
+    if itens_corrigidos:
+        db.session.execute(db.update(ItemVenda), itens_corrigidos)
+    if vendas_corrigidas:
+        db.session.execute(db.update(Venda), vendas_corrigidas)
+    reconstruir_resumo()
+    db.session.commit()
+    click.echo("Totais e resumo dos relatórios corrigidos")
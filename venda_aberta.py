@@ -0,0 +1,16 @@
+from src.models.user import db
+
+class VendaAberta(db.Model):
+    """Venda em andamento de cada terminal (caixa): no máximo uma por terminal
+
+    O uuid é gerado pelo caixa no início da venda e vai na finalização; se a
+    venda continuar offline, a sincronização usa o mesmo uuid.
+    """
+    __tablename__ = 'venda_aberta'
+    
+    terminal = db.Column(db.String(64), primary_key=True)
+    venda_id = db.Column(db.Integer, db.ForeignKey('venda.id'), nullable=False, index=True)
+    uuid = db.Column(db.String(36))
+    
+    def __repr__(self):
+        return f'<VendaAberta {self.terminal} #{self.venda_id}>'
@@ -0,0 +1,18 @@
+from src.models.user import db
+from datetime import datetime
+
+class VendaSincronizada(db.Model):
+    """Venda registrada offline por um caixa e recebida pela sincronização
+
+    O uuid é gerado no navegador: reenviar o mesmo lote (resposta perdida,
+    nova tentativa) devolve a venda já gravada em vez de criar outra.
+    """
+    __tablename__ = 'venda_sincronizada'
+
+    uuid = db.Column(db.String(36), primary_key=True)
+    venda_id = db.Column(db.Integer, db.ForeignKey('venda.id'), nullable=False, index=True)
+    terminal = db.Column(db.String(64))
+    recebida_em = db.Column(db.DateTime, default=datetime.now)
+
+    def __repr__(self):
+        return f'<VendaSincronizada {self.uuid} #{self.venda_id}>'
@@ -0,0 +1,16 @@
+from sqlalchemy.dialects.sqlite import insert
+from src.models.user import db
+from src.models.versao_dados import VersaoDados
+
+def ler_versao(nome):
+    """Versão gravada de um conjunto de dados (0 se nunca foi alterado)"""
+    return db.session.query(VersaoDados.versao).filter_by(nome=nome).scalar() or 0
+
+def incrementar_versao(nome):
+    """Avisar os outros workers, na transação atual, que os dados mudaram; devolve a versão nova"""
+    stmt = insert(VersaoDados).values(nome=nome, versao=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[VersaoDados.nome],
+        set_={'versao': VersaoDados.versao + 1}
+    )
+    return db.session.execute(stmt.returning(VersaoDados.versao)).scalar_one()
@@ -0,0 +1,15 @@
+from src.models.user import db
+
+class VersaoDados(db.Model):
+    """Versão de um conjunto de dados guardado em cache pelos workers (ex.: 'loja')
+
+    Quem altera os dados incrementa a versão na mesma transação; os caches de cada
+    processo comparam a versão antes de confiar no que têm em memória.
+    """
+    __tablename__ = 'versao_dados'
+    
+    nome = db.Column(db.String(50), primary_key=True)
+    versao = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<VersaoDados {self.nome} v{self.versao}>'